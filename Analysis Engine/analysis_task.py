@@ -0,0 +1,317 @@
+# analysis_task.py - Walkability-Analyse als Hintergrund-Task (QgsTask)
+
+import itertools
+
+from qgis.core import QgsTask, QgsApplication, QgsProject, QgsMessageLog, Qgis
+from qgis.PyQt.QtCore import pyqtSignal
+
+from .walkability_engine import WalkabilityAnalyzer
+from .pipeline_executor import PipelineExecutor
+
+
+class WalkabilityAnalysisTask(QgsTask):
+    """
+    Führt eine Analyse im Task-Manager von QGIS aus
+
+    API-Anfragen laufen im Hintergrund-Thread, Layer werden erst in
+    finished() auf dem Haupt-Thread erstellt und zum Projekt hinzugefügt.
+    Beim Abbrechen werden laufende HTTP-Anfragen sofort beendet.
+    """
+
+    stageChanged = pyqtSignal(str)
+    analysisFinished = pyqtSignal(dict)
+    analysisFailed = pyqtSignal(str)
+
+    def __init__(self, location_name, coordinates, time_limit, service_types, time_curve=False, layer_store=None,
+                 at_time=None):
+        super().__init__(f"Walkability-Analyse: {location_name}", QgsTask.CanCancel)
+        self.location_name = location_name
+        self.coordinates = coordinates
+        self.time_limit = time_limit
+        self.service_types = service_types
+        self.time_curve = time_curve
+        # Optionaler Zeitpunkt (datetime): nur dann geöffnete POIs zählen
+        self.at_time = at_time
+        # AnalysisLayerStore: Ergebnis im GeoPackage statt als Memory-Layer
+        self.layer_store = layer_store
+
+        self.analyzer = WalkabilityAnalyzer()
+        self.result = None
+        self.error = None
+
+    def _stage(self, progress, message):
+        """Fortschritt melden; False wenn der Task abgebrochen wurde"""
+        if self.isCanceled():
+            return False
+        self.setProgress(progress)
+        self.stageChanged.emit(message)
+        return True
+
+    def run(self):
+        """Analyse im Hintergrund-Thread (keine GUI- oder Projekt-Zugriffe)"""
+        try:
+            if not self._stage(5, "🔄 Prüfe Verbindung zur OpenRouteService API..."):
+                return False
+            if not self.analyzer.ors_client.test_connection():
+                self.error = ("Keine Verbindung zur OpenRouteService API!\n"
+                              "Bitte prüfen Sie Ihre Internetverbindung und den API-Key.")
+                return False
+
+            if self.time_curve:
+                if not self._stage(20, "📈 Berechne Isochronen-Ringe und POIs..."):
+                    return False
+                self.result = self.analyzer.analyze_time_curve(
+                    self.location_name, self.coordinates, self.time_limit, self.service_types,
+                    create_layers=False, at_time=self.at_time)
+                return not self.isCanceled()
+
+            if not self._stage(20, "🗺️ Berechne Isochrone..."):
+                return False
+            isochrone_data = self.analyzer.fetch_isochrone(self.coordinates, self.time_limit)
+
+            if not self._stage(50, "🏪 Suche Services (Overpass)..."):
+                return False
+            pois_data = self.analyzer.fetch_pois(
+                self.coordinates, self.time_limit, self.service_types, isochrone_data)
+
+            if not self._stage(85, "📊 Berechne Score..."):
+                return False
+            self.result = self.analyzer.build_result(
+                self.location_name, self.coordinates, self.time_limit, self.service_types,
+                isochrone_data, pois_data, create_layers=False, at_time=self.at_time)
+
+            self.setProgress(95)
+            return not self.isCanceled()
+
+        except Exception as e:
+            if not self.isCanceled():
+                self.error = str(e)
+            return False
+
+    def cancel(self):
+        """Abbrechen inkl. laufender HTTP-Anfragen"""
+        QgsMessageLog.logMessage(f"Analysis cancelled: {self.location_name}", level=Qgis.Info)
+        super().cancel()
+        self.analyzer.abort()
+
+    def finished(self, result):
+        """Auf dem Haupt-Thread: Layer erstellen und Ergebnis melden"""
+        if result and self.result:
+            if self.layer_store:
+                self.result['layers'] = self.analyzer.store_result_layers(self.result, self.layer_store)
+            else:
+                self.result['layers'] = self.analyzer.create_result_layers(self.result)
+            self.analyzer.add_layers_to_project(self.result['layers'])
+            self.analysisFinished.emit(self.result)
+        elif self.isCanceled():
+            self.analysisFailed.emit("Analyse abgebrochen")
+        else:
+            message = self.error or "Unbekannter Fehler"
+            QgsMessageLog.logMessage(f"Analysis Error: {message}", level=Qgis.Critical)
+            self.analysisFailed.emit(message)
+
+
+class BatchAnalysisTask(QgsTask):
+    """
+    Analyse vieler Standorte (PipelineExecutor) im Task-Manager
+
+    Jedes Ergebnis geht sofort an die Ergebnis-Senke, z.B. LayerStreamSink,
+    sodass sich die Karte schon während des Laufs füllt. Die Senke muss auf
+    dem Haupt-Thread erstellt worden sein und wird in finished() geschlossen.
+    Beim Abbrechen werden keine weiteren Standorte eingespeist.
+    """
+
+    batchFinished = pyqtSignal(dict)
+    batchFailed = pyqtSignal(str)
+
+    def __init__(self, origins, sink, at_time=None, use_cache=True, collect_reports=False):
+        """
+        :param origins: Liste von Origin-Dicts (walkability_cli.read_origins)
+        :param sink: Objekt mit write(item) und close()
+        :param at_time: Optionaler Zeitpunkt (datetime) für Öffnungszeiten
+        :param collect_reports: Erfolgreiche Ergebnisse in self.reports sammeln (PDF-Export)
+        """
+        super().__init__(f"Walkability-Batch: {len(origins)} Standorte", QgsTask.CanCancel)
+        self.origins = origins
+        self.sink = sink
+        self.executor = PipelineExecutor(
+            WalkabilityAnalyzer(), use_cache=use_cache, create_layers=False, at_time=at_time)
+        self.collect_reports = collect_reports
+        self.reports = []
+        self.error = None
+
+    def _on_result(self, done, item):
+        self.sink.write(item)
+        if self.collect_reports and item.get('result'):
+            self.reports.append({key: value for key, value in item['result'].items() if key != 'layers'})
+        self.setProgress(100.0 * done / max(len(self.origins), 1))
+
+    def run(self):
+        """Pipeline im Hintergrund-Thread; die Senke puffert nur"""
+        try:
+            origins = itertools.takewhile(lambda origin: not self.isCanceled(), self.origins)
+            self.executor.run(origins, progress_callback=self._on_result, collect_results=False)
+            return not self.isCanceled()
+        except Exception as e:
+            if not self.isCanceled():
+                self.error = str(e)
+            return False
+
+    def cancel(self):
+        """Abbrechen: keine neuen Standorte, laufende HTTP-Anfragen beenden"""
+        QgsMessageLog.logMessage("Batch analysis cancelled", level=Qgis.Info)
+        super().cancel()
+        self.executor.analyzer.abort()
+
+    def finished(self, result):
+        """Auf dem Haupt-Thread: restliche Features schreiben und Ergebnis melden"""
+        self.sink.close()
+        if result:
+            self.batchFinished.emit(self.executor.stats)
+        elif self.isCanceled():
+            self.batchFailed.emit("Batch-Analyse abgebrochen")
+        else:
+            message = self.error or "Unbekannter Fehler"
+            QgsMessageLog.logMessage(f"Batch analysis error: {message}", level=Qgis.Critical)
+            self.batchFailed.emit(message)
+
+
+class BatchPdfTask(QgsTask):
+    """
+    PDF-Berichte vieler Ergebnisse im Task-Manager
+
+    Kartenbilder werden im Hintergrund-Thread aus dem GeoJSON der
+    Ergebnisse gerendert (bzw. aus dem Cache übernommen), die Berichte
+    anschließend vom BatchPdfExporter parallel geschrieben.
+    """
+
+    exportFinished = pyqtSignal(list)
+    exportFailed = pyqtSignal(str)
+
+    def __init__(self, results, output_dir, atlas=False):
+        """
+        :param results: Analyse-Ergebnisse ohne Layer (BatchAnalysisTask.reports)
+        :param output_dir: Zielverzeichnis
+        :param atlas: Zusätzlich alle Berichte in einer PDF zusammenfassen
+        """
+        super().__init__(f"PDF-Berichte: {len(results)} Standorte", QgsTask.CanCancel)
+        self.results = results
+        self.output_dir = output_dir
+        self.atlas = atlas
+        self.outcomes = []
+        self.error = None
+
+    def _on_progress(self, done, total):
+        self.setProgress(100.0 * done / max(total, 1))
+
+    def run(self):
+        """Kartenbilder rendern und Berichte schreiben (Hintergrund-Thread)"""
+        try:
+            from .pdf_batch import BatchPdfExporter
+            exporter = BatchPdfExporter(self.output_dir, atlas=self.atlas, map_snapshots=True)
+            self.outcomes = exporter.export(
+                self.results, progress_callback=self._on_progress, is_canceled=self.isCanceled)
+            return not self.isCanceled()
+        except Exception as e:
+            if not self.isCanceled():
+                self.error = str(e)
+            return False
+
+    def finished(self, result):
+        """Auf dem Haupt-Thread: Ergebnis melden"""
+        if result:
+            self.exportFinished.emit(self.outcomes)
+        elif self.isCanceled():
+            self.exportFailed.emit("PDF-Export abgebrochen")
+        else:
+            message = self.error or "Unbekannter Fehler"
+            QgsMessageLog.logMessage(f"Batch PDF error: {message}", level=Qgis.Critical)
+            self.exportFailed.emit(message)
+
+
+class CatchmentTask(QgsTask):
+    """
+    Einzugsgebiete aller POIs eines Gebiets im Task-Manager
+
+    Grenze, Einwohnerdaten, POIs und Isochronen werden im Hintergrund-Thread
+    geladen; der Layer entsteht in finished() auf dem Haupt-Thread.
+    """
+
+    catchmentsFinished = pyqtSignal(dict)
+    catchmentsFailed = pyqtSignal(str)
+
+    def __init__(self, boundary_path, population_path, time_limit, service_types):
+        """
+        :param boundary_path: Stadt- oder Stadtteilgrenze (GeoJSON)
+        :param population_path: Einwohner als CSV (lat, lon, population) oder GeoJSON
+        :param time_limit: Gehzeit in Minuten
+        :param service_types: Liste der Service-Typen
+        """
+        super().__init__(f"Einzugsgebiete: {', '.join(service_types)}", QgsTask.CanCancel)
+        from .coverage_gaps import CoverageGapAnalyzer
+
+        self.boundary_path = boundary_path
+        self.population_path = population_path
+        self.time_limit = time_limit
+        self.service_types = service_types
+        self.gap_analyzer = CoverageGapAnalyzer()
+        self.catchments = None
+        self.error = None
+
+    def run(self):
+        """POIs und Isochronen abfragen, Einwohner zuordnen (Hintergrund-Thread)"""
+        try:
+            from .coverage_gaps import load_boundary
+            from .population_data import load_population
+            from .reverse_catchments import ReverseCatchmentAnalyzer
+
+            boundary = load_boundary(self.boundary_path)
+            demand = load_population(self.population_path)
+            self.setProgress(10)
+            if self.isCanceled():
+                return False
+
+            pois_data = self.gap_analyzer.fetch_service_pois(boundary, self.time_limit, self.service_types)
+            self.setProgress(30)
+            if self.isCanceled():
+                return False
+
+            self.catchments = ReverseCatchmentAnalyzer(self.gap_analyzer).analyze(
+                pois_data, demand, self.time_limit)
+            return not self.isCanceled()
+        except Exception as e:
+            if not self.isCanceled():
+                self.error = str(e)
+            return False
+
+    def cancel(self):
+        """Abbrechen inkl. laufender HTTP-Anfragen"""
+        QgsMessageLog.logMessage("Catchment analysis cancelled", level=Qgis.Info)
+        super().cancel()
+        self.gap_analyzer.ors_client.abort()
+        self.gap_analyzer.overpass_client.abort()
+
+    def finished(self, result):
+        """Auf dem Haupt-Thread: Layer erstellen und zum Projekt hinzufügen"""
+        if result and self.catchments:
+            from .reverse_catchments import create_catchment_layer
+
+            layer = create_catchment_layer(
+                self.catchments, f"Walkability_Einzugsgebiete_{self.time_limit}min")
+            QgsProject.instance().addMapLayer(layer)
+            self.catchmentsFinished.emit({
+                'catchments': len(self.catchments['features']),
+                'missing_isochrones': len(self.catchments['missing_isochrones'])
+            })
+        elif self.isCanceled():
+            self.catchmentsFailed.emit("Einzugsgebiete abgebrochen")
+        else:
+            message = self.error or "Unbekannter Fehler"
+            QgsMessageLog.logMessage(f"Catchment analysis error: {message}", level=Qgis.Critical)
+            self.catchmentsFailed.emit(message)
+
+
+def submit_analysis_task(task):
+    """Task beim Task-Manager von QGIS einreihen"""
+    QgsApplication.taskManager().addTask(task)
+    return task
@@ -0,0 +1,203 @@
+# bulk_geocoding.py - Adresslisten geokodieren und in die Batch-Analyse einspeisen
+
+import csv
+import queue
+import threading
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .config import is_in_muenster_area
+from .geocoding import get_geocoder, normalize_address
+from .gazetteer import get_gazetteer
+
+REJECT_REASON_FIELD = 'reject_reason'
+
+# Markiert das Ende der Geokodierung
+_END = object()
+
+
+def row_address(row, address_field='address'):
+    """Adresse einer Eingabezeile als Freitext ('' wenn keine vorhanden)"""
+    address = (row.get(address_field) or '').strip()
+    if address:
+        return address
+
+    street = ' '.join(part for part in (row.get('street'), row.get('housenumber')) if part and part.strip())
+    city = ' '.join(part for part in (row.get('postcode'), row.get('city')) if part and part.strip())
+    return ', '.join(part.strip() for part in (street, city) if part.strip())
+
+
+def read_address_rows(path):
+    """
+    Adressliste aus CSV
+
+    Spalten: address oder street, housenumber, postcode, city; optional
+    name, time_limit, services.
+
+    :return: Liste von Zeilen-Dicts
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+class RejectWriter:
+    """Nicht auflösbare Zeilen mit Begründung als CSV (erst bei Bedarf angelegt)"""
+
+    def __init__(self, path, fieldnames, on_reject=None):
+        self.path = path
+        self.fieldnames = list(fieldnames) + [REJECT_REASON_FIELD]
+        self.on_reject = on_reject
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row, reason):
+        if self.on_reject:
+            self.on_reject(row, reason)
+        if self.path is None:
+            self.count += 1
+            return
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow(dict(row, **{REJECT_REASON_FIELD: reason}))
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class BulkGeocoder:
+    """
+    Geokodierung vieler Adressen für die Batch-Analyse
+
+    Adressen werden normalisiert und Duplikate nur einmal geokodiert.
+    Treffer aus dem lokalen Adressverzeichnis und dem Cache werden sofort
+    ausgegeben; die übrigen Adressen laufen in einem Hintergrund-Thread über
+    die ratenbegrenzte Nominatim-Anfrage. Aufgelöste Zeilen werden
+    ausgegeben, sobald sie vorliegen, sodass die Analyse der ersten
+    Standorte bereits läuft, während der Rest noch geokodiert wird.
+    """
+
+    def __init__(self, geocoder=None, reject_path=None, reject_outside_area=True, on_reject=None):
+        """
+        :param geocoder: NominatimGeocoder; Standard: gemeinsamer Geocoder
+        :param reject_path: CSV für nicht auflösbare Zeilen
+        :param reject_outside_area: Treffer außerhalb Münsters verwerfen
+        :param on_reject: Optionale Funktion (Zeile, Begründung) je verworfener Zeile
+        """
+        self.geocoder = geocoder or get_geocoder()
+        self.reject_path = reject_path
+        self.reject_outside_area = reject_outside_area
+        self.on_reject = on_reject
+        self.stats = {}
+        self._rejects = None
+
+    def resolve(self, rows, address_field='address'):
+        """
+        Geokodiere Zeilen in der Reihenfolge, in der Ergebnisse vorliegen
+
+        :param rows: Liste von Zeilen-Dicts (read_address_rows)
+        :return: Generator von (Index, Zeile, Ergebnis-Dict mit lat, lon,
+            display_name)
+        """
+        rejects = RejectWriter(self.reject_path, dict.fromkeys(key for row in rows for key in row), self.on_reject)
+        self._rejects = rejects
+        self.stats = {'rows': len(rows), 'unique': 0, 'gazetteer_hits': 0, 'cache_hits': 0, 'requested': 0,
+                      'resolved': 0, 'rejected': 0}
+
+        # Duplikate nach Normalisierung zusammenfassen
+        groups = {}
+        for index, row in enumerate(rows):
+            address = row_address(row, address_field)
+            if not address:
+                rejects.write(row, 'keine Adresse')
+                continue
+            groups.setdefault(normalize_address(address), (address, []))[1].append((index, row))
+        self.stats['unique'] = len(groups)
+
+        stop = threading.Event()
+        worker = None
+        try:
+            misses = []
+            cache = self.geocoder.cache
+            gazetteer = get_gazetteer()
+            for address, members in groups.values():
+                result = gazetteer.lookup(address) if gazetteer is not None else None
+                if result is not None:
+                    self.stats['gazetteer_hits'] += 1
+                    yield from self._emit(members, result, None, rejects)
+                    continue
+
+                found, result = cache.get(address) if cache is not None else (False, None)
+                if found:
+                    self.stats['cache_hits'] += 1
+                    yield from self._emit(members, result, None, rejects)
+                else:
+                    misses.append((address, members))
+
+            results = queue.Queue()
+            worker = threading.Thread(target=self._request_all, args=(misses, results, stop),
+                                      name="walkability-geocode", daemon=True)
+            worker.start()
+
+            while True:
+                item = results.get()
+                if item is _END:
+                    break
+                members, result, error = item
+                self.stats['requested'] += 1
+                yield from self._emit(members, result, error, rejects)
+        finally:
+            # Auch bei vorzeitigem Abbruch durch den Verbraucher
+            stop.set()
+            if worker is not None:
+                worker.join()
+            rejects.close()
+            self.stats['rejected'] = rejects.count
+            QgsMessageLog.logMessage(
+                f"Bulk geocoding: {self.stats['rows']} rows, {self.stats['unique']} unique, "
+                f"{self.stats['gazetteer_hits']} offline, {self.stats['cache_hits']} cached, {self.stats['requested']} requested, "
+                f"{self.stats['resolved']} resolved, {self.stats['rejected']} rejected",
+                level=Qgis.Info)
+
+    def reject(self, row, reason):
+        """
+        Aufgelöste Zeile nachträglich verwerfen, z.B. bei ungültigen Services
+
+        Nur während resolve() läuft; die Zeile landet in derselben Reject-CSV.
+        """
+        self.stats['resolved'] -= 1
+        self._rejects.write(row, reason)
+
+    def _request_all(self, misses, results, stop):
+        """Hintergrund-Thread: nicht gecachte Adressen nacheinander anfragen"""
+        cache = self.geocoder.cache
+        for address, members in misses:
+            if stop.is_set():
+                break
+            try:
+                result = self.geocoder.request(address)
+                if cache is not None:
+                    cache.store(address, result)
+                results.put((members, result, None))
+            except Exception as e:
+                results.put((members, None, str(e)))
+        results.put(_END)
+
+    def _emit(self, members, result, error, rejects):
+        if result is None:
+            for _, row in members:
+                rejects.write(row, f"Fehler: {error}" if error else 'nicht gefunden')
+            return
+
+        if self.reject_outside_area and not is_in_muenster_area(result['lat'], result['lon']):
+            for _, row in members:
+                rejects.write(row, f"außerhalb Münster: {result['display_name']}")
+            return
+
+        for index, row in members:
+            self.stats['resolved'] += 1
+            yield index, row, result
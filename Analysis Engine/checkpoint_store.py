@@ -0,0 +1,171 @@
+# checkpoint_store.py - Dauerhaftes Protokoll abgeschlossener Analysen (SQLite)
+
+import hashlib
+import json
+import sqlite3
+import time
+from .qgis_compat import QgsMessageLog, Qgis
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def origin_hash(origin, at_time=None):
+    """
+    Eindeutiger Schlüssel eines Standorts inkl. Analyse-Parametern
+
+    Der Zeitpunkt für Öffnungszeiten gehört dazu, sonst würde ein Lauf mit
+    --at Ergebnisse eines Laufs ohne bzw. mit anderem Zeitpunkt übernehmen.
+
+    :param origin: Dict mit 'coordinates', 'time_limit' und 'service_types'
+    :param at_time: Zeitpunkt (datetime oder ISO-String) oder None
+    :return: Hex-String
+    """
+    lon, lat = origin['coordinates']
+    if hasattr(at_time, 'isoformat'):
+        at_time = at_time.isoformat()
+    key = json.dumps([round(lon, 6), round(lat, 6), origin['time_limit'], sorted(origin['service_types']),
+                      at_time])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Nur anhängendes Protokoll aller Analysen eines Batch-Laufs
+
+    Jede abgeschlossene oder fehlgeschlagene Analyse wird sofort geschrieben.
+    Maßgeblich ist der jeweils letzte Eintrag pro Standort, sodass ein
+    fortgesetzter Lauf fertige Standorte überspringt und nur fehlgeschlagene
+    bzw. noch offene erneut berechnet.
+    """
+
+    def __init__(self, path, at_time=None):
+        """
+        :param path: Pfad der SQLite-Datei
+        :param at_time: Zeitpunkt für Öffnungszeiten des Laufs (datetime) oder None
+        """
+        self.path = path
+        self.at_time = at_time
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                location_name TEXT,
+                created_at REAL NOT NULL,
+                result TEXT,
+                error TEXT
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_analysis_log_hash ON analysis_log (origin_hash, id)")
+        # Geokodierte Adressen (--addresses), Schlüssel ist die normalisierte Adresse
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS geocoded_addresses (
+                address_key TEXT PRIMARY KEY,
+                lon REAL NOT NULL,
+                lat REAL NOT NULL
+            )""")
+        self.connection.commit()
+
+    def latest_status(self):
+        """Letzter Status pro Standort-Hash"""
+        rows = self.connection.execute("""
+            SELECT origin_hash, status FROM analysis_log
+            WHERE id IN (SELECT MAX(id) FROM analysis_log GROUP BY origin_hash)""")
+        return dict(rows)
+
+    def plan(self, origins):
+        """
+        Teile Standorte in wiederverwendbare und neu zu berechnende auf
+
+        :param origins: Liste von Origin-Dicts
+        :return: (offene Origins, wiederverwendete Origins, Zusammenfassung)
+        """
+        status = self.latest_status()
+        pending, reused = [], []
+        summary = {'total': len(origins), 'reused': 0, 'retried': 0, 'new': 0}
+
+        for origin in origins:
+            previous = status.get(origin_hash(origin, self.at_time))
+            if previous == STATUS_DONE:
+                reused.append(origin)
+                summary['reused'] += 1
+            else:
+                pending.append(origin)
+                summary['retried' if previous == STATUS_FAILED else 'new'] += 1
+
+        QgsMessageLog.logMessage(
+            f"Checkpoint {self.path}: {summary['reused']} reused, "
+            f"{summary['retried']} failed before, {summary['new']} new",
+            level=Qgis.Info)
+
+        return pending, reused, summary
+
+    def record(self, item):
+        """
+        Schreibe das Ergebnis eines Standorts (PipelineExecutor-Item)
+
+        Layer werden nicht gespeichert, nur die serialisierbaren Ergebnisse.
+        """
+        result = item.get('result')
+        status = STATUS_FAILED if item.get('error') or not result else STATUS_DONE
+
+        payload = None
+        if status == STATUS_DONE:
+            payload = json.dumps({key: value for key, value in result.items() if key != 'layers'},
+                                 separators=(',', ':'))
+
+        self.connection.execute(
+            "INSERT INTO analysis_log (origin_hash, status, location_name, created_at, result, error) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (origin_hash(item, self.at_time), status, item.get('location_name'), time.time(), payload, item.get('error')))
+        self.connection.commit()
+
+    def load_item(self, origin):
+        """
+        Gespeichertes Ergebnis eines Standorts als PipelineExecutor-Item
+
+        :return: Item-Dict oder None
+        """
+        row = self.connection.execute(
+            "SELECT result FROM analysis_log WHERE origin_hash = ? AND status = ? ORDER BY id DESC LIMIT 1",
+            (origin_hash(origin, self.at_time), STATUS_DONE)).fetchone()
+        if row is None:
+            return None
+
+        item = dict(origin)
+        item['result'] = json.loads(row[0])
+        item['result']['layers'] = {}
+        item['error'] = None
+        return item
+
+    def record_address(self, address_key, coordinates):
+        """
+        Koordinaten einer geokodierten Adresse merken
+
+        :param address_key: normalisierte Adresse (geocoding.normalize_address)
+        :param coordinates: [lon, lat]
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO geocoded_addresses (address_key, lon, lat) VALUES (?, ?, ?)",
+            (address_key, coordinates[0], coordinates[1]))
+        self.connection.commit()
+
+    def resolved_addresses(self):
+        """Alle gemerkten Adressen als Dict normalisierte Adresse -> [lon, lat]"""
+        rows = self.connection.execute("SELECT address_key, lon, lat FROM geocoded_addresses")
+        return {address_key: [lon, lat] for address_key, lon, lat in rows}
+
+    def iter_results(self):
+        """Alle zuletzt erfolgreichen Ergebnisse, ohne sie gesammelt zu laden"""
+        rows = self.connection.execute("""
+            SELECT result FROM analysis_log
+            WHERE id IN (SELECT MAX(id) FROM analysis_log GROUP BY origin_hash) AND status = ?
+            ORDER BY id""", (STATUS_DONE,))
+        for (payload,) in rows:
+            yield json.loads(payload)
+
+    def close(self):
+        self.connection.close()
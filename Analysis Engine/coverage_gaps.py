@@ -0,0 +1,287 @@
+# coverage_gaps.py - Versorgungslücken: Flächen ohne fußläufig erreichbaren Service
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+import numpy as np
+import shapely
+from shapely.geometry import shape, mapping
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .ors_client import ORSClient
+from .overpass_client import OverpassClient
+from .result_cache import get_catchment_cache
+from .population_data import population_in_polygons
+
+# Metrisches Koordinatensystem für Flächen und Puffer (UTM 32N, Münster)
+METRIC_CRS = 'EPSG:25832'
+
+# Gehgeschwindigkeit zum Erweitern des POI-Suchgebiets über die Grenze hinaus
+WALKING_METERS_PER_MINUTE = 80
+
+# Kleinere Lücken (Splitter an Isochronen-Rändern) werden verworfen
+MIN_GAP_AREA_M2 = 1000
+
+
+@lru_cache(maxsize=None)
+def _transformer(source_crs, target_crs):
+    """pyproj-Transformer, erst bei der ersten Umrechnung geladen und erstellt"""
+    import pyproj
+    return pyproj.Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+def _transform(geometry, transformer):
+    def project(coords):
+        xs, ys = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([xs, ys])
+    return shapely.transform(geometry, project)
+
+
+def to_metric(geometry):
+    """Geometrie (lon/lat) nach METRIC_CRS"""
+    return _transform(geometry, _transformer('EPSG:4326', METRIC_CRS))
+
+
+def to_wgs84(geometry):
+    """Geometrie aus METRIC_CRS nach lon/lat"""
+    return _transform(geometry, _transformer(METRIC_CRS, 'EPSG:4326'))
+
+
+def to_metric_xy(xs, ys):
+    """Koordinaten-Arrays (lon/lat) nach METRIC_CRS"""
+    return _transformer('EPSG:4326', METRIC_CRS).transform(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+
+
+def load_boundary(path):
+    """
+    Lese eine Stadt- oder Stadtteilgrenze aus GeoJSON
+
+    :return: shapely-Fläche (Vereinigung aller Features)
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    features = data.get('features', [data] if data.get('type') == 'Feature' else [])
+    geometries = [shape(feature['geometry']) for feature in features if feature.get('geometry')]
+    if not geometries:
+        raise ValueError(f"Keine Flächen in {path}")
+    return shapely.union_all(geometries)
+
+
+class CoverageGapAnalyzer:
+    """
+    Versorgungsgebiete und -lücken pro Service-Typ
+
+    Für jeden POI eines Service-Typs wird die Isochrone mit dem Zeitlimit
+    bestimmt (Catchment-Cache, sonst ORS mit mehreren Standorten pro
+    Anfrage). Die Isochronen werden mit einer kaskadierten Vereinigung
+    (GEOS unary union über einen STRtree) zum Versorgungsgebiet
+    zusammengefasst, das von der Grenze abgezogen wird.
+    """
+
+    def __init__(self, ors_client=None, overpass_client=None, cache=None):
+        self.ors_client = ors_client or ORSClient()
+        self.overpass_client = overpass_client or OverpassClient()
+        self.cache = cache or get_catchment_cache()
+
+    def fetch_service_pois(self, boundary, time_limit, service_types):
+        """
+        POIs in der Grenze inkl. eines Randstreifens von time_limit Gehminuten
+
+        POIs knapp außerhalb der Grenze versorgen ebenfalls Einwohner innerhalb.
+
+        :return: Dictionary mit POIs pro Service-Typ
+        """
+        buffer_m = time_limit * WALKING_METERS_PER_MINUTE
+        search_area = to_wgs84(to_metric(boundary).buffer(buffer_m)).envelope
+
+        area_geojson = {'type': 'FeatureCollection',
+                        'features': [{'type': 'Feature', 'properties': {}, 'geometry': mapping(search_area)}]}
+        return self.overpass_client.get_pois_in_area(area_geojson, service_types)
+
+    def poi_isochrones(self, pois, time_limit):
+        """
+        Isochronen um POIs, aus dem Cache oder gebündelt über ORS
+
+        :param pois: Liste von POI-Dicts (lon, lat)
+        :return: (Liste von shapely-Flächen, Liste der POIs ohne Isochrone)
+        """
+        polygons = self.location_isochrones([[poi['lon'], poi['lat']] for poi in pois], time_limit)
+        missing = [poi for poi, polygon in zip(pois, polygons) if polygon is None]
+        return [polygon for polygon in polygons if polygon is not None], missing
+
+    def location_isochrones(self, locations, time_limit):
+        """
+        Isochronen für viele Standorte, aus dem Cache oder gebündelt über ORS
+
+        :param locations: Liste von [lon, lat]
+        :return: Liste von shapely-Flächen in Reihenfolge von locations,
+            None für fehlgeschlagene Standorte
+        """
+        isochrones = [self.cache.get_isochrone(location, time_limit) for location in locations]
+
+        missing = [index for index, isochrone in enumerate(isochrones) if isochrone is None]
+        if missing:
+            QgsMessageLog.logMessage(
+                f"Coverage: {len(locations) - len(missing)} isochrones from cache, "
+                f"requesting {len(missing)}", level=Qgis.Info)
+
+            fetched = self.ors_client.get_isochrones_for_locations([locations[index] for index in missing], time_limit)
+            for index, isochrone in zip(missing, fetched):
+                if isochrone:
+                    self.cache.store_isochrone(locations[index], isochrone)
+                    isochrones[index] = isochrone
+
+        return [shape(isochrone['features'][0]['geometry']) if isochrone else None for isochrone in isochrones]
+
+    @staticmethod
+    def service_area(polygons):
+        """
+        Vereinigung vieler, sich überlappender Isochronen
+
+        shapely.union_all nutzt die kaskadierte Vereinigung von GEOS, die
+        räumlich benachbarte Flächen über einen STRtree paarweise
+        zusammenfasst, statt Fläche für Fläche an ein wachsendes Polygon
+        anzuhängen.
+        """
+        if not polygons:
+            return shapely.Polygon()
+        return shapely.union_all(shapely.make_valid(np.asarray(polygons, dtype=object)))
+
+    def find_gaps(self, boundary, time_limit, service_types, population=None, pois_data=None):
+        """
+        Versorgungslücken pro Service-Typ
+
+        :param boundary: shapely-Fläche der Stadt bzw. des Stadtteils (lon/lat)
+        :param time_limit: Gehzeit in Minuten
+        :param service_types: Liste der Service-Typen
+        :param population: Optionale PopulationPoints (population_data.load_population)
+        :param pois_data: Optional bereits abgefragte POIs pro Service-Typ
+        :return: GeoJSON-FeatureCollection, ein Feature pro Lückenfläche mit
+            service_type, time_limit, area_m2, population und poi_count
+            (POIs innerhalb der Grenze, ohne Randstreifen);
+            'missing_isochrones' listet POIs, deren Isochrone ORS auch nach
+            Wiederholungen nicht geliefert hat (deren Umgebung zählt als Lücke)
+        """
+        if pois_data is None:
+            pois_data = self.fetch_service_pois(boundary, time_limit, service_types)
+
+        boundary_metric = to_metric(boundary)
+        shapely.prepare(boundary)
+        features = []
+        missing_isochrones = []
+
+        for service_type in service_types:
+            pois = pois_data.get(service_type, [])
+            poi_count = int(np.count_nonzero(shapely.contains_xy(
+                boundary, [poi['lon'] for poi in pois], [poi['lat'] for poi in pois]))) if pois else 0
+            polygons, missing = self.poi_isochrones(pois, time_limit)
+            covered = self.service_area(polygons)
+
+            if missing:
+                missing_isochrones.extend(missing_poi_entry(poi, service_type) for poi in missing)
+                QgsMessageLog.logMessage(
+                    f"Coverage {service_type}: no isochrone for {len(missing)} of {len(pois)} POIs, "
+                    f"gaps are overestimated", level=Qgis.Warning)
+
+            gap = to_metric(boundary.difference(covered)) if not covered.is_empty else boundary_metric
+            parts = shapely.get_parts(gap)
+            parts = parts[(shapely.get_type_id(parts) == 3) & (shapely.area(parts) >= MIN_GAP_AREA_M2)]
+
+            areas = shapely.area(parts)
+            parts_wgs84 = [to_wgs84(part) for part in parts]
+            residents = population_in_polygons(parts_wgs84, population) if population is not None else None
+
+            for index, part in enumerate(parts_wgs84):
+                features.append({
+                    'type': 'Feature',
+                    'geometry': mapping(part),
+                    'properties': {
+                        'service_type': service_type,
+                        'time_limit': time_limit,
+                        'area_m2': round(float(areas[index]), 1),
+                        'population': round(float(residents[index])) if residents is not None else None,
+                        'poi_count': poi_count
+                    }
+                })
+
+            share = float(areas.sum()) / boundary_metric.area if boundary_metric.area else 0.0
+            QgsMessageLog.logMessage(
+                f"Coverage {service_type}: {poi_count} POIs in area, {len(parts)} gaps, "
+                f"{100.0 * share:.1f}% of area not reached within {time_limit} min",
+                level=Qgis.Info)
+
+        return {'type': 'FeatureCollection', 'features': features, 'missing_isochrones': missing_isochrones}
+
+
+def missing_poi_entry(poi, service_type):
+    """Kurzbeschreibung eines POIs ohne Isochrone für 'missing_isochrones'"""
+    return {
+        'osm_id': str(poi.get('id', '')),
+        'name': poi.get('name', ''),
+        'service_type': service_type,
+        'lon': poi['lon'],
+        'lat': poi['lat']
+    }
+
+
+def write_gaps_geopackage(path, gaps, table='coverage_gaps'):
+    """Lücken-Features in eine GeoPackage-Tabelle schreiben"""
+    from .gpkg_writer import GeoPackageWriter
+
+    gpkg = GeoPackageWriter(path)
+    try:
+        gpkg.create_table(table, 'POLYGON', [
+            ('service_type', 'TEXT'), ('time_limit', 'INTEGER'), ('area_m2', 'REAL'),
+            ('population', 'INTEGER'), ('poi_count', 'INTEGER')
+        ])
+        return gpkg.insert(table, ((feature['geometry'], feature['properties']) for feature in gaps['features']))
+    finally:
+        gpkg.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='coverage_gaps', description='Versorgungslücken: Flächen ohne fußläufig erreichbaren Service')
+    parser.add_argument('boundary', help='Stadt- oder Stadtteilgrenze (GeoJSON)')
+    parser.add_argument('--time-limit', type=int, default=15, help='Gehzeit in Minuten (Standard: 15)')
+    parser.add_argument('--services', help='Service-Typen, getrennt durch ";" oder "," (Standard wie im Dialog)')
+    parser.add_argument('--population', help='Einwohner als CSV (lat, lon, population) oder GeoJSON')
+    parser.add_argument('--gpkg', dest='gpkg_path', help='Lücken als GeoPackage-Tabelle coverage_gaps')
+    parser.add_argument('--geojson', dest='geojson_path', help='Lücken als GeoJSON (inkl. missing_isochrones)')
+    args = parser.parse_args(argv)
+
+    from .walkability_cli import parse_services, DEFAULT_SERVICES
+    from .population_data import load_population
+
+    if not (args.gpkg_path or args.geojson_path):
+        sys.stderr.write("Mindestens --gpkg oder --geojson angeben\n")
+        return 2
+
+    try:
+        services = parse_services(args.services, DEFAULT_SERVICES)
+        boundary = load_boundary(args.boundary)
+        population = load_population(args.population) if args.population else None
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"Eingabe konnte nicht gelesen werden: {str(e)}\n")
+        return 2
+
+    gaps = CoverageGapAnalyzer().find_gaps(boundary, args.time_limit, services, population)
+
+    if args.gpkg_path:
+        write_gaps_geopackage(args.gpkg_path, gaps)
+    if args.geojson_path:
+        with open(args.geojson_path, 'w', encoding='utf-8') as f:
+            json.dump(gaps, f)
+
+    sys.stderr.write(f"{len(gaps['features'])} Lückenflächen\n")
+    if gaps['missing_isochrones']:
+        sys.stderr.write(f"{len(gaps['missing_isochrones'])} POIs ohne Isochrone, Lücken dort überschätzt\n")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+# gazetteer.py - Lokales Adressverzeichnis für Geokodierung und Autovervollständigung
+#
+# Einmalig erstellen aus einem OSM-Extrakt oder einer städtischen Adress-CSV:
+#   python -m walkability_analyzer.gazetteer muenster.osm
+
+import argparse
+import csv
+import gzip
+import os
+import re
+import sys
+import threading
+import xml.etree.ElementTree as ElementTree
+from array import array
+from bisect import bisect_left
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .geocoding import normalize_address, plugin_data_directory
+
+GAZETTEER_FILENAME = 'address_gazetteer.tsv.gz'
+MAX_SUGGESTIONS = 10
+
+# Spaltennamen städtischer Adresslisten
+CSV_STREET_FIELDS = ('street', 'strasse', 'straße', 'addr:street')
+CSV_NUMBER_FIELDS = ('housenumber', 'hausnummer', 'hnr', 'addr:housenumber')
+CSV_POSTCODE_FIELDS = ('postcode', 'plz', 'addr:postcode')
+
+# Projizierte Koordinaten (x, y) städtischer Daten
+CSV_SOURCE_CRS = 'EPSG:25832'
+
+
+_POSTCODE = re.compile(r'\b\d{5}\b')
+
+
+def query_key(address):
+    """Suchschlüssel: normalisierte Straße und Hausnummer (vor dem ersten Komma)"""
+    return normalize_address(address.split(',')[0])
+
+
+def place_parts(address):
+    """
+    Postleitzahl und Ort hinter dem ersten Komma ('' wenn nicht angegeben)
+
+    "Domplatz 10, 48143 Münster" ergibt ('48143', 'münster').
+    """
+    place = address.split(',', 1)[1] if ',' in address else ''
+    postcode = _POSTCODE.search(place)
+    city = normalize_address(_POSTCODE.sub(' ', place).replace(',', ' '))
+    return (postcode.group(0) if postcode else ''), city
+
+
+def places_match(query, label):
+    """
+    Passt der Ort einer Anfrage zum Eintrag?
+
+    Angegebene Postleitzahl und Ort müssen mit dem Eintrag übereinstimmen,
+    sofern dieser sie kennt; "Bahnhofstraße 1, Berlin" ist keine Münsteraner
+    Adresse. Ortsangaben wie "Münster (Westf.)" gelten als gleich.
+    """
+    postcode, city = place_parts(query)
+    entry_postcode, entry_city = place_parts(label)
+    if postcode and entry_postcode and postcode != entry_postcode:
+        return False
+    if city and entry_city and not (city.startswith(entry_city) or entry_city.startswith(city)):
+        return False
+    return True
+
+
+def _first_field(row, names):
+    for name in names:
+        value = row.get(name)
+        if value and value.strip():
+            return value.strip()
+    return ''
+
+
+def _label(street, housenumber, postcode, city='Münster'):
+    place = ' '.join(part for part in (postcode, city) if part)
+    return f"{street} {housenumber}, {place}"
+
+
+class Gazetteer:
+    """
+    Sortiertes Adressverzeichnis mit Präfix-Suche
+
+    Die normalisierten Schlüssel liegen sortiert in einer Liste; Koordinaten
+    in kompakten Arrays. Exakte Suche und Präfix-Suche sind je eine binäre
+    Suche (bisect), also unabhängig von der Größe des Verzeichnisses im
+    Bereich von Mikrosekunden.
+    """
+
+    def __init__(self, entries):
+        """
+        :param entries: Iterable von (Schlüssel, lat, lon, Anzeigename);
+            bei doppelten Schlüsseln gilt der erste
+        """
+        unique = {}
+        for key, lat, lon, label in entries:
+            unique.setdefault(key, (lat, lon, label))
+
+        self.keys = sorted(unique)
+        self.lats = array('d', (unique[key][0] for key in self.keys))
+        self.lons = array('d', (unique[key][1] for key in self.keys))
+        self.labels = [unique[key][2] for key in self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, address):
+        """
+        :param address: Adresse als Freitext (Straße Hausnummer[, PLZ Ort])
+        :return: Dict mit lat, lon, display_name oder None (auch wenn PLZ
+            oder Ort der Anfrage nicht passen; der Aufrufer fragt dann Nominatim)
+        """
+        key = query_key(address)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key and places_match(address, self.labels[index]):
+            return {'lat': self.lats[index], 'lon': self.lons[index], 'display_name': self.labels[index]}
+        return None
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Anzeigenamen der ersten Adressen, die mit der Eingabe beginnen"""
+        key = query_key(prefix)
+        if not key:
+            return []
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + '\uffff', lo=start, hi=min(start + limit, len(self.keys)))
+        return self.labels[start:end]
+
+    def save(self, path):
+        """Als komprimierte TSV-Datei speichern"""
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for key, lat, lon, label in zip(self.keys, self.lats, self.lons, self.labels):
+                f.write(f"{key}\t{lat:.7f}\t{lon:.7f}\t{label}\n")
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            rows = (line.rstrip('\n').split('\t') for line in f)
+            return cls((key, float(lat), float(lon), label) for key, lat, lon, label in rows)
+
+
+def entries_from_osm(path):
+    """
+    Adressen (addr:street, addr:housenumber) aus einem OSM-XML-Extrakt
+
+    Gebäude-Umrisse (Ways) erhalten den Mittelwert ihrer Knoten. Da Knoten
+    vor den Ways stehen, wird die Datei zweimal gelesen: zuerst die
+    Adress-Ways und ihre Knoten-IDs, dann nur deren Koordinaten.
+    """
+    if path.lower().endswith('.pbf'):
+        return _entries_from_pbf(path)
+
+    def address(tags):
+        street, housenumber = tags.get('addr:street'), tags.get('addr:housenumber')
+        if not street or not housenumber:
+            return None
+        return street, housenumber, tags.get('addr:postcode', ''), tags.get('addr:city', 'Münster')
+
+    # 1. Adress-Ways und benötigte Knoten
+    way_addresses = []
+    needed = set()
+    for _, element in ElementTree.iterparse(path):
+        if element.tag == 'way':
+            tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+            parts = address(tags)
+            if parts:
+                refs = [nd.get('ref') for nd in element.iter('nd')]
+                way_addresses.append((parts, refs))
+                needed.update(refs)
+        if element.tag in ('node', 'way', 'relation'):
+            element.clear()
+
+    # 2. Adress-Knoten und Koordinaten der Way-Knoten
+    entries = []
+    coordinates = {}
+    for _, element in ElementTree.iterparse(path):
+        if element.tag == 'node':
+            lat, lon = float(element.get('lat')), float(element.get('lon'))
+            if element.get('id') in needed:
+                coordinates[element.get('id')] = (lat, lon)
+            parts = address({tag.get('k'): tag.get('v') for tag in element.iter('tag')})
+            if parts:
+                entries.append((query_key(f"{parts[0]} {parts[1]}"), lat, lon, _label(*parts)))
+        if element.tag in ('node', 'way', 'relation'):
+            element.clear()
+
+    for parts, refs in way_addresses:
+        points = [coordinates[ref] for ref in refs if ref in coordinates]
+        if points:
+            lat = sum(point[0] for point in points) / len(points)
+            lon = sum(point[1] for point in points) / len(points)
+            entries.append((query_key(f"{parts[0]} {parts[1]}"), lat, lon, _label(*parts)))
+
+    return entries
+
+
+def _entries_from_pbf(path):
+    """Adressen aus einem .osm.pbf-Extrakt (benötigt pyosmium)"""
+    try:
+        import osmium
+    except ImportError:
+        raise ValueError("Für .pbf-Dateien wird pyosmium benötigt (oder Extrakt als .osm speichern)")
+
+    entries = []
+
+    class AddressHandler(osmium.SimpleHandler):
+        def add(self, tags, lat, lon):
+            street, housenumber = tags.get('addr:street'), tags.get('addr:housenumber')
+            if street and housenumber:
+                label = _label(street, housenumber, tags.get('addr:postcode', ''), tags.get('addr:city', 'Münster'))
+                entries.append((query_key(f"{street} {housenumber}"), lat, lon, label))
+
+        def node(self, node):
+            self.add(node.tags, node.location.lat, node.location.lon)
+
+        def way(self, way):
+            points = [(nd.location.lat, nd.location.lon) for nd in way.nodes if nd.location.valid()]
+            if points:
+                self.add(way.tags, sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+    AddressHandler().apply_file(path, locations=True)
+    return entries
+
+
+def entries_from_csv(path):
+    """
+    Adressen aus einer städtischen CSV
+
+    Spalten: Straße und Hausnummer (z.B. street/strasse, housenumber/
+    hausnummer), optional Postleitzahl, sowie lat/lon oder x/y in
+    EPSG:25832.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f, delimiter=_sniff_delimiter(path))
+        rows = [{key.strip().lower(): value for key, value in row.items() if key} for row in reader]
+
+    transformer = None
+    if rows and 'lat' not in rows[0] and 'x' in rows[0]:
+        from pyproj import Transformer
+        transformer = Transformer.from_crs(CSV_SOURCE_CRS, 'EPSG:4326', always_xy=True)
+
+    entries = []
+    for row in rows:
+        street, housenumber = _first_field(row, CSV_STREET_FIELDS), _first_field(row, CSV_NUMBER_FIELDS)
+        if not street or not housenumber:
+            continue
+        if transformer is not None:
+            lon, lat = transformer.transform(float(row['x'].replace(',', '.')), float(row['y'].replace(',', '.')))
+        else:
+            lat, lon = float(row['lat'].replace(',', '.')), float(row['lon'].replace(',', '.'))
+        label = _label(street, housenumber, _first_field(row, CSV_POSTCODE_FIELDS))
+        entries.append((query_key(f"{street} {housenumber}"), lat, lon, label))
+
+    return entries
+
+
+def _sniff_delimiter(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = f.readline()
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def default_gazetteer_path():
+    return os.path.join(plugin_data_directory(), GAZETTEER_FILENAME)
+
+
+def build_gazetteer(source_path, target_path=None):
+    """
+    Erstelle das Adressverzeichnis aus OSM-Extrakt (.osm, .pbf) oder CSV
+
+    Das gemeinsame Verzeichnis der Sitzung (get_gazetteer) wird nur ersetzt,
+    wenn in die Standard-Datei geschrieben wird.
+
+    :param target_path: Zieldatei; Standard: default_gazetteer_path()
+    :return: Gazetteer
+    """
+    if source_path.lower().endswith('.csv'):
+        entries = entries_from_csv(source_path)
+    else:
+        entries = entries_from_osm(source_path)
+
+    default_path = default_gazetteer_path()
+    target_path = target_path or default_path
+
+    gazetteer = Gazetteer(entries)
+    gazetteer.save(target_path)
+    QgsMessageLog.logMessage(
+        f"Gazetteer: {len(gazetteer)} addresses from {source_path}", level=Qgis.Info)
+
+    if os.path.abspath(target_path) == os.path.abspath(default_path):
+        global _shared_gazetteer, _shared_loaded
+        with _shared_lock:
+            _shared_gazetteer, _shared_loaded = gazetteer, True
+    return gazetteer
+
+
+_shared_gazetteer = None
+_shared_loaded = False
+_shared_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Gemeinsames Adressverzeichnis (beim ersten Aufruf geladen) oder None"""
+    global _shared_gazetteer, _shared_loaded
+    with _shared_lock:
+        if not _shared_loaded:
+            _shared_loaded = True
+            path = default_gazetteer_path()
+            if os.path.exists(path):
+                try:
+                    _shared_gazetteer = Gazetteer.load(path)
+                except (OSError, ValueError) as e:
+                    QgsMessageLog.logMessage(f"Gazetteer could not be loaded: {str(e)}", level=Qgis.Warning)
+        return _shared_gazetteer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='gazetteer', description='Lokales Adressverzeichnis für die Adresssuche erstellen')
+    parser.add_argument('source', help='OSM-Extrakt (.osm, .osm.pbf) oder Adress-CSV')
+    parser.add_argument('--output', help=f'Zieldatei (Standard: {GAZETTEER_FILENAME} im Plugin-Datenverzeichnis)')
+    args = parser.parse_args(argv)
+
+    try:
+        gazetteer = build_gazetteer(args.source, args.output)
+    except (OSError, ValueError, KeyError, ElementTree.ParseError) as e:
+        sys.stderr.write(f"Adressverzeichnis konnte nicht erstellt werden: {str(e)}\n")
+        return 2
+
+    sys.stderr.write(f"{len(gazetteer)} Adressen gespeichert\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# geocoding.py - Nominatim-Geokodierung mit dauerhaftem Cache und Ratenbegrenzung
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from .qgis_compat import QgsMessageLog, Qgis, QGIS_AVAILABLE
+from .config import NOMINATIM_URL
+
+CACHE_FILENAME = 'geocode_cache.sqlite'
+
+# Treffer 90 Tage, Fehlschläge 1 Tag wiederverwenden
+DEFAULT_TTL_SECONDS = 90 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+
+# Nutzungsrichtlinie von Nominatim: höchstens 1 Anfrage pro Sekunde, aussagekräftiger User-Agent
+NOMINATIM_MIN_INTERVAL = 1.0
+USER_AGENT = 'QGIS-Walkability-Analyzer (Muenster)'
+
+_STREET_SUFFIX = re.compile(r'(str\.|strasse)(?=\s|\d|,|$)')
+_NON_WORD = re.compile(r'[^\w,]+')
+_SPACES = re.compile(r'\s*,\s*|\s+')
+
+
+def normalize_address(address):
+    """
+    Vergleichbare Form einer Adresse für den Cache
+
+    Kleinschreibung, einheitliche Straßen-Endung, ohne Satzzeichen und
+    doppelte Leerzeichen: "Domplatz  10, Münster" und "domplatz 10,münster"
+    ergeben denselben Schlüssel.
+    """
+    address = _STREET_SUFFIX.sub('straße', address.strip().lower())
+    address = _NON_WORD.sub(' ', address)
+    return _SPACES.sub(lambda match: ',' if ',' in match.group(0) else ' ', address).strip(' ,')
+
+
+def plugin_data_directory():
+    """Datenverzeichnis im QGIS-Profil, ohne QGIS im Benutzer-Cache"""
+    if QGIS_AVAILABLE:
+        from qgis.core import QgsApplication
+        directory = os.path.join(QgsApplication.qgisSettingsDirPath(), 'walkability_analyzer')
+    else:
+        directory = os.path.join(os.path.expanduser('~'), '.cache', 'walkability_analyzer')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def default_cache_path():
+    """Cache-Datei im Datenverzeichnis des Plugins"""
+    return os.path.join(plugin_data_directory(), CACHE_FILENAME)
+
+
+class RateLimiter:
+    """Mindestabstand zwischen Anfragen, gemeinsam für alle Threads"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        """Blockiere bis zum nächsten freien Zeitfenster"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class GeocodeCache:
+    """
+    Dauerhafter Cache für Geokodierungs-Ergebnisse (SQLite)
+
+    Schlüssel ist die normalisierte Adresse. Nicht gefundene Adressen werden
+    ebenfalls gespeichert (negativer Cache, kürzere Gültigkeit), damit
+    Tippfehler nicht bei jeder Wiederholung eine Anfrage auslösen.
+    """
+
+    def __init__(self, path=None, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS):
+        self.path = path or default_cache_path()
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                address TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                display_name TEXT,
+                created_at REAL NOT NULL
+            )""")
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, address):
+        """
+        :return: (gefunden, Ergebnis): Ergebnis ist ein Dict (lat, lon,
+            display_name) oder None für eine bekannte Fehlanfrage
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT lat, lon, display_name, created_at FROM geocode_cache WHERE address = ?",
+                (normalize_address(address),)).fetchone()
+
+            if row is not None:
+                lat, lon, display_name, created_at = row
+                ttl = self.ttl_seconds if lat is not None else self.negative_ttl_seconds
+                if time.time() - created_at <= ttl:
+                    self.hits += 1
+                    if lat is None:
+                        return True, None
+                    return True, {'lat': lat, 'lon': lon, 'display_name': display_name}
+
+            self.misses += 1
+            return False, None
+
+    def store(self, address, result):
+        """Speichere ein Ergebnis (None = nicht gefunden)"""
+        values = (result['lat'], result['lon'], result['display_name']) if result else (None, None, None)
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO geocode_cache (address, lat, lon, display_name, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (normalize_address(address), *values, time.time()))
+            self.connection.commit()
+
+    def purge_expired(self):
+        """Abgelaufene Einträge löschen"""
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "DELETE FROM geocode_cache WHERE (lat IS NOT NULL AND created_at < ?) "
+                "OR (lat IS NULL AND created_at < ?)",
+                (now - self.ttl_seconds, now - self.negative_ttl_seconds))
+            self.connection.commit()
+
+
+class NominatimGeocoder:
+    """
+    Geokodierung über Nominatim mit Cache, Keep-Alive-Session und
+    globaler Ratenbegrenzung
+
+    Wiederholte Adressen werden aus dem Cache beantwortet. Alle Anfragen
+    aller Worker laufen über denselben RateLimiter, sodass die Richtlinie
+    von 1 Anfrage pro Sekunde auch bei parallelen Geokodierungen gilt.
+    """
+
+    def __init__(self, cache=None, session=None, rate_limiter=None):
+        self.cache = cache
+        if session is None:
+            # requests erst bei der ersten Anfrage laden, nicht beim Öffnen des Dialogs
+            from .http_session import create_session
+            session = create_session()
+        self.session = session
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        self.rate_limiter = rate_limiter or _nominatim_rate_limiter
+
+    @staticmethod
+    def prepare_query(address):
+        """Münster ergänzen, falls weder Ort noch Postleitzahl angegeben sind"""
+        if 'münster' not in address.lower() and '48' not in address:
+            address += ', Münster, Germany'
+        return address
+
+    def geocode(self, address):
+        """
+        :param address: Adresse als Freitext
+        :return: Dict mit lat, lon, display_name oder None
+        """
+        if self.cache is not None:
+            found, result = self.cache.get(address)
+            if found:
+                return result
+
+        result = self.request(address)
+        if self.cache is not None:
+            self.cache.store(address, result)
+        return result
+
+    def request(self, address):
+        """
+        Eine Nominatim-Anfrage (ohne Cache)
+
+        :return: Dict oder None, wenn die Adresse nicht gefunden wurde
+        :raises requests.RequestException: bei Netzwerk- oder Serverfehlern
+            (diese werden nicht im negativen Cache gespeichert)
+        """
+        params = {
+            'q': self.prepare_query(address),
+            'format': 'json',
+            'limit': 1,
+            'countrycodes': 'de',
+            'addressdetails': 1
+        }
+
+        self.rate_limiter.wait()
+        response = self.session.get(NOMINATIM_URL, params=params, timeout=10)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data:
+            return None
+        return {
+            'lat': float(data[0]['lat']),
+            'lon': float(data[0]['lon']),
+            'display_name': data[0]['display_name']
+        }
+
+
+_nominatim_rate_limiter = RateLimiter(NOMINATIM_MIN_INTERVAL)
+_shared_geocoder = None
+_shared_lock = threading.Lock()
+
+
+def get_geocoder():
+    """Gemeinsamer Geocoder (Cache und Session) für alle Worker der QGIS-Sitzung"""
+    global _shared_geocoder
+    with _shared_lock:
+        if _shared_geocoder is None:
+            cache = None
+            try:
+                cache = GeocodeCache()
+                cache.purge_expired()
+            except (OSError, sqlite3.Error) as e:
+                QgsMessageLog.logMessage(f"Geocode cache unavailable: {str(e)}", level=Qgis.Warning)
+            _shared_geocoder = NominatimGeocoder(cache)
+        return _shared_geocoder
@@ -0,0 +1,55 @@
+# geometry_utils.py - Vektorisierte Geometrie-Hilfsfunktionen
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+
+def as_geometry(geometry):
+    """Shapely-Geometrie aus GeoJSON-Geometrie (dict) oder Shapely-Geometrie"""
+    return shape(geometry) if isinstance(geometry, dict) else geometry
+
+
+def points_in_polygon(xs, ys, geometry):
+    """
+    Punkt-in-Polygon-Test für viele Punkte gleichzeitig
+
+    Berücksichtigt Löcher und alle Teilflächen von MultiPolygonen.
+
+    :param xs: Array der x-Koordinaten (lon)
+    :param ys: Array der y-Koordinaten (lat)
+    :param geometry: (Multi-)Polygon als GeoJSON-Geometrie oder Shapely-Geometrie
+    :return: Boolean-Array, True für Punkte innerhalb des Polygons
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if len(xs) == 0:
+        return np.zeros(0, dtype=bool)
+
+    geometry = as_geometry(geometry)
+    shapely.prepare(geometry)
+    return shapely.contains_xy(geometry, xs, ys)
+
+
+def assign_smallest_ring(xs, ys, rings):
+    """
+    Ordne Punkte dem kleinsten enthaltenden Ring verschachtelter Polygone zu
+
+    :param xs: Array der x-Koordinaten (lon)
+    :param ys: Array der y-Koordinaten (lat)
+    :param rings: Geometrien der Ringe (GeoJSON oder Shapely), aufsteigend nach Größe sortiert
+    :return: Integer-Array mit Ring-Index, -1 für Punkte außerhalb aller Ringe
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    ring_index = np.full(len(xs), -1, dtype=int)
+
+    # Vom kleinsten zum größten Ring, nur noch nicht zugeordnete Punkte prüfen
+    for index, ring in enumerate(rings):
+        candidates = np.flatnonzero(ring_index == -1)
+        if len(candidates) == 0:
+            break
+        inside = points_in_polygon(xs[candidates], ys[candidates], ring)
+        ring_index[candidates[inside]] = index
+
+    return ring_index
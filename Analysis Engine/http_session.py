@@ -0,0 +1,65 @@
+# http_session.py - HTTP-Session mit abbrechbaren Anfragen
+
+import socket
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class AbortableAdapter(HTTPAdapter):
+    """
+    HTTPAdapter, der offene Verbindungen kennt
+
+    abort() schließt die Sockets aller offenen Verbindungen, sodass eine
+    laufende Anfrage in einem anderen Thread sofort mit einem
+    ConnectionError abbricht statt bis zum Timeout zu warten.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._connections = weakref.WeakSet()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self._tracking_pool(HTTPConnectionPool),
+            'https': self._tracking_pool(HTTPSConnectionPool)
+        }
+
+    def _tracking_pool(self, pool_cls):
+        registry = self._connections
+
+        class TrackingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                super().connect()
+                registry.add(self)
+
+        return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': TrackingConnection})
+
+    def abort(self):
+        """Breche alle laufenden Anfragen ab"""
+        for connection in list(self._connections):
+            sock = getattr(connection, 'sock', None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def create_session():
+    """requests.Session mit AbortableAdapter für http und https"""
+    session = requests.Session()
+    adapter = AbortableAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def abort_session(session):
+    """Breche alle laufenden Anfragen einer Session aus create_session ab"""
+    for adapter in session.adapters.values():
+        if isinstance(adapter, AbortableAdapter):
+            adapter.abort()
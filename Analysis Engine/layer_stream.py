@@ -0,0 +1,164 @@
+# layer_stream.py - Batch-Ergebnisse schrittweise in Projekt-Layer schreiben
+
+import threading
+import time
+from collections import deque
+from qgis.core import (
+    QgsVectorLayer, QgsFeature, QgsGeometry, QgsField, QgsPointXY, QgsProject, QgsMessageLog, Qgis
+)
+from qgis.PyQt.QtCore import QObject, QTimer, QThread, QVariant
+
+from .layer_styles import get_layer_style_cache
+from .walkability_engine import geometry_from_geojson
+
+# Features sammeln und gemeinsam schreiben
+DEFAULT_CHUNK_SIZE = 50
+# Höchstens ein Schreibvorgang und Neuzeichnen pro Intervall
+DEFAULT_FLUSH_INTERVAL_MS = 500
+
+
+class LayerStreamSink(QObject):
+    """
+    Ergebnis-Senke für Batch-Läufe (PipelineExecutor) mit Live-Anzeige
+
+    write() kann aus beliebigen Threads aufgerufen werden und puffert nur.
+    Auf dem Haupt-Thread werden die Features blockweise über den
+    Data-Provider an je einen Standort- und Isochronen-Layer angehängt,
+    höchstens alle flush_interval_ms bzw. sobald chunk_size Ergebnisse
+    vorliegen. Die Karte wird gedrosselt neu gezeichnet, die
+    Attributtabelle erhält pro Block nur eine Änderung.
+
+    Verwendung wie CsvResultWriter: write(item) pro Ergebnis, close() am Ende.
+    """
+
+    def __init__(self, name="Walkability_Batch", chunk_size=DEFAULT_CHUNK_SIZE,
+                 flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS, add_to_project=True, parent=None):
+        super().__init__(parent)
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.count = 0
+
+        self.results_layer = self._create_results_layer(f"{name}_Standorte")
+        self.isochrone_layer = self._create_isochrone_layer(f"{name}_Isochronen")
+
+        self._lock = threading.Lock()
+        self._pending_results = deque()
+        self._pending_isochrones = deque()
+        self._last_repaint = 0.0
+        self._needs_repaint = False
+
+        if add_to_project:
+            project = QgsProject.instance()
+            project.addMapLayer(self.isochrone_layer)
+            project.addMapLayer(self.results_layer)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def _create_results_layer(self, layer_name):
+        layer = QgsVectorLayer("Point?crs=EPSG:4326", layer_name, "memory")
+        layer.dataProvider().addAttributes([
+            QgsField('origin_index', QVariant.Int),
+            QgsField('name', QVariant.String),
+            QgsField('time_limit', QVariant.Int),
+            QgsField('total_score', QVariant.Double),
+            QgsField('total_services', QVariant.Int),
+            QgsField('error', QVariant.String)
+        ])
+        layer.updateFields()
+        layer.setRenderer(get_layer_style_cache().score_renderer())
+        return layer
+
+    def _create_isochrone_layer(self, layer_name):
+        layer = QgsVectorLayer("MultiPolygon?crs=EPSG:4326", layer_name, "memory")
+        layer.dataProvider().addAttributes([
+            QgsField('origin_index', QVariant.Int),
+            QgsField('name', QVariant.String),
+            QgsField('time_minutes', QVariant.Int)
+        ])
+        layer.updateFields()
+        layer.renderer().setSymbol(get_layer_style_cache().isochrone_symbol())
+        return layer
+
+    def write(self, item):
+        """
+        Ergebnis puffern (thread-sicher)
+
+        :param item: PipelineExecutor-Item mit 'location_name', 'coordinates', 'result', 'error'
+        """
+        result = item.get('result')
+        score = result['score'] if result else None
+
+        feature = QgsFeature(self.results_layer.fields())
+        lon, lat = item['coordinates']
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
+        feature.setAttributes([
+            item.get('index'),
+            item['location_name'],
+            item['time_limit'],
+            round(score['total_score'], 2) if score else None,
+            score['total_services'] if score else None,
+            item.get('error') or ''
+        ])
+
+        isochrones = []
+        if result:
+            for feature_data in result['isochrone'].get('features', []):
+                geometry = geometry_from_geojson(feature_data['geometry']) if feature_data.get('geometry') else None
+                if geometry is None:
+                    continue
+                geometry.convertToMultiType()
+                isochrone = QgsFeature(self.isochrone_layer.fields())
+                isochrone.setGeometry(geometry)
+                isochrone.setAttributes([
+                    item.get('index'),
+                    item['location_name'],
+                    feature_data['properties'].get('time_minutes', item['time_limit'])
+                ])
+                isochrones.append(isochrone)
+
+        with self._lock:
+            self._pending_results.append(feature)
+            self._pending_isochrones.extend(isochrones)
+            self.count += 1
+            chunk_full = len(self._pending_results) >= self.chunk_size
+
+        # Läuft der Batch auf dem Haupt-Thread, kommt der Timer nicht zum Zug
+        if chunk_full and QThread.currentThread() == self.thread():
+            self.flush()
+
+    def flush(self, force_repaint=False):
+        """Gepufferte Features anhängen (nur auf dem Haupt-Thread aufrufen)"""
+        with self._lock:
+            results = list(self._pending_results)
+            isochrones = list(self._pending_isochrones)
+            self._pending_results.clear()
+            self._pending_isochrones.clear()
+
+        if results or isochrones:
+            try:
+                if isochrones:
+                    self.isochrone_layer.dataProvider().addFeatures(isochrones)
+                    self.isochrone_layer.updateExtents()
+                if results:
+                    self.results_layer.dataProvider().addFeatures(results)
+                    self.results_layer.updateExtents()
+                self._needs_repaint = True
+            except Exception as e:
+                QgsMessageLog.logMessage(f"Layer stream error: {str(e)}", level=Qgis.Warning)
+
+        now = time.monotonic()
+        if self._needs_repaint and (force_repaint or now - self._last_repaint >= self.flush_interval):
+            self.isochrone_layer.triggerRepaint()
+            self.results_layer.triggerRepaint()
+            self._last_repaint = now
+            self._needs_repaint = False
+
+    def close(self):
+        """Restliche Features schreiben und Timer stoppen"""
+        self._timer.stop()
+        self.flush(force_repaint=True)
+        QgsMessageLog.logMessage(
+            f"Layer stream: {self.count} results in {self.results_layer.name()}", level=Qgis.Info)
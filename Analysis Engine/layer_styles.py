@@ -0,0 +1,127 @@
+# layer_styles.py - Einmal erstellte Symbole und Renderer für die Analyse-Layer
+
+import threading
+from qgis.core import (
+    QgsFillSymbol, QgsMarkerSymbol, QgsCategorizedSymbolRenderer, QgsRendererCategory,
+    QgsGraduatedSymbolRenderer, QgsRendererRange
+)
+from qgis.PyQt.QtGui import QColor
+
+from .config import SERVICE_CATEGORIES
+
+# Farben, falls ein Eintrag in SERVICE_CATEGORIES kein 'color' angibt
+DEFAULT_SERVICE_COLORS = {
+    'Supermarkt': '#228b22',    # Forest Green
+    'Apotheke': '#dc143c',      # Crimson Red
+    'Arzt': '#4169e1',          # Royal Blue
+    'Schule': '#ff8c00',        # Dark Orange
+    'Restaurant': '#8a2be2',    # Blue Violet
+    'Bank': '#b8860b'           # Dark Goldenrod
+}
+
+# Bewertungsskala für Score-Layer (untere Grenze, obere Grenze, Farbe, Beschriftung)
+SCORE_CLASSES = [
+    (0, 40, '#d7191c', '0-39 Poor'),
+    (40, 60, '#fdae61', '40-59 Fair'),
+    (60, 80, '#ffd700', '60-79 Good'),
+    (80, 100, '#1a9641', '80-100 Excellent')
+]
+
+# Für neue Kategorien ohne Farbe der Reihe nach vergeben
+FALLBACK_PALETTE = ['#2f4f4f', '#008b8b', '#c71585', '#556b2f', '#8b4513', '#483d8b']
+
+
+def service_color(service_type, index=0):
+    """Farbe einer Service-Kategorie (config 'color', Standardfarbe oder Palette)"""
+    config = SERVICE_CATEGORIES.get(service_type, {})
+    color = config.get('color') or DEFAULT_SERVICE_COLORS.get(service_type)
+    return QColor(color or FALLBACK_PALETTE[index % len(FALLBACK_PALETTE)])
+
+
+class LayerStyleCache:
+    """
+    Prototyp-Symbole und POI-Renderer, einmal pro Sitzung erstellt
+
+    Layer erhalten jeweils Kopien (clone), da QGIS die Symbole bzw. den
+    Renderer eines Layers übernimmt. Die Prototypen selbst werden nie
+    verändert und können daher aus Worker-Threads geklont werden.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._isochrone_symbol = None
+        self._center_symbol = None
+        self._poi_renderer = None
+        self._score_renderer = None
+
+    def _build(self):
+        with self._lock:
+            if self._poi_renderer is not None:
+                return
+
+            self._isochrone_symbol = QgsFillSymbol.createSimple({
+                'color': '70,130,180,100',  # Semi-transparent blue
+                'outline_color': '30,80,120,255',
+                'outline_width': '2'
+            })
+
+            self._center_symbol = QgsMarkerSymbol.createSimple({
+                'name': 'star',
+                'color': 'red',
+                'size': '8',
+                'outline_color': 'black',
+                'outline_width': '1'
+            })
+
+            categories = []
+            for index, (service_type, config) in enumerate(SERVICE_CATEGORIES.items()):
+                symbol = QgsMarkerSymbol.createSimple({
+                    'name': 'circle',
+                    'color': service_color(service_type, index).name(),
+                    'size': '6',
+                    'outline_color': 'black',
+                    'outline_width': '0.5'
+                })
+                label = f"{config['icon']} {service_type}" if config.get('icon') else service_type
+                categories.append(QgsRendererCategory(service_type, symbol, label))
+
+            self._poi_renderer = QgsCategorizedSymbolRenderer('service_type', categories)
+
+            ranges = []
+            for lower, upper, color, label in SCORE_CLASSES:
+                symbol = QgsMarkerSymbol.createSimple({
+                    'name': 'circle',
+                    'color': color,
+                    'size': '4',
+                    'outline_color': 'black',
+                    'outline_width': '0.3'
+                })
+                ranges.append(QgsRendererRange(lower, upper, symbol, label))
+            self._score_renderer = QgsGraduatedSymbolRenderer('total_score', ranges)
+
+    def isochrone_symbol(self):
+        self._build()
+        return self._isochrone_symbol.clone()
+
+    def center_symbol(self):
+        self._build()
+        return self._center_symbol.clone()
+
+    def poi_renderer(self):
+        self._build()
+        return self._poi_renderer.clone()
+
+    def score_renderer(self):
+        self._build()
+        return self._score_renderer.clone()
+
+
+_shared_styles = None
+
+
+def get_layer_style_cache():
+    """Gemeinsamer Style-Cache für alle Layer der QGIS-Sitzung"""
+    global _shared_styles
+    if _shared_styles is None:
+        _shared_styles = LayerStyleCache()
+    return _shared_styles
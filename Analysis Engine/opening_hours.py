@@ -0,0 +1,190 @@
+# opening_hours.py - Auswertung des OSM-Tags opening_hours
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+WEEKDAYS = ['Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su']
+
+# Anzahl unterschiedlicher opening_hours-Strings im Speicher
+PARSE_CACHE_SIZE = 4096
+
+_WEEKDAY = r'(?:Mo|Tu|We|Th|Fr|Sa|Su|PH)'
+_RULE_SPLIT = re.compile(r';')
+# ", " trennt zusätzliche Regeln nur nach einer Zeit bzw. off/closed und vor einem Wochentag
+_ADDITIONAL_SPLIT = re.compile(rf'(?<=[\d+fd]),\s*(?={_WEEKDAY}\b)')
+_DAYS_PART = re.compile(rf'^\s*({_WEEKDAY}(?:\s*-\s*{_WEEKDAY})?(?:\s*,\s*{_WEEKDAY}(?:\s*-\s*{_WEEKDAY})?)*)\s*(.*)$')
+_TIME_SPAN = re.compile(r'^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\+?$')
+
+
+class OpeningHours:
+    """
+    Kompilierte Öffnungszeiten einer Woche
+
+    Intern eine Minuten-Maske über die Woche (Montag 00:00 = 0), sodass
+    Abfragen für viele POIs und Zeitpunkte reine Array-Indizierung sind.
+    """
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def is_open(self, week_minute):
+        return bool(self.mask[int(week_minute) % MINUTES_PER_WEEK])
+
+    def intervals(self):
+        """Offene Intervalle als Liste von (Start, Ende) in Wochenminuten"""
+        changes = np.flatnonzero(np.diff(np.concatenate([[0], self.mask.astype(np.int8), [0]])))
+        return list(zip(changes[::2].tolist(), changes[1::2].tolist()))
+
+
+def _parse_days(selector):
+    days = set()
+    for part in selector.split(','):
+        part = part.strip()
+        if part == 'PH':
+            continue
+        if '-' in part:
+            start, end = (WEEKDAYS.index(day.strip()) for day in part.split('-'))
+            day = start
+            while True:
+                days.add(day)
+                if day == end:
+                    break
+                day = (day + 1) % 7
+        else:
+            days.add(WEEKDAYS.index(part))
+    return days
+
+
+def _parse_rule(rule):
+    """
+    :return: (Tage, Liste von (Start, Ende) in Tagesminuten) oder None falls
+        die Regel nicht unterstützte Selektoren enthält
+    """
+    rule = rule.strip()
+    days = set(range(7))
+
+    match = _DAYS_PART.match(rule)
+    if match:
+        if match.group(1).strip() == 'PH':
+            return set(), []
+        days = _parse_days(match.group(1))
+        rule = match.group(2).strip()
+
+    if rule in ('off', 'closed'):
+        return days, []
+    if rule == '':
+        return days, [(0, MINUTES_PER_DAY)]
+
+    spans = []
+    for span in rule.split(','):
+        time_match = _TIME_SPAN.match(span.strip())
+        if not time_match:
+            return None
+        start_h, start_m, end_h, end_m = (int(value) for value in time_match.groups())
+        spans.append((start_h * 60 + start_m, end_h * 60 + end_m))
+    return days, spans
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_opening_hours(value):
+    """
+    Kompiliere einen opening_hours-String (memoisiert, da viele POIs
+    denselben String tragen)
+
+    Unterstützt: 24/7, Wochentage und -bereiche, mehrere Zeitspannen,
+    Spannen über Mitternacht, off/closed, ';' (spätere Regel ersetzt die
+    Tage früherer Regeln) und ', ' (zusätzliche Regel). Feiertagsregeln
+    (PH) werden ignoriert. Andere Selektoren (Monate, Wochen,
+    Sonnenaufgang, Kommentare) ergeben None.
+
+    :param value: opening_hours-String
+    :return: OpeningHours oder None, wenn der String nicht auswertbar ist
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value == '24/7':
+        return OpeningHours(np.ones(MINUTES_PER_WEEK, dtype=bool))
+
+    mask = np.zeros(MINUTES_PER_WEEK, dtype=bool)
+
+    for rule_group in _RULE_SPLIT.split(value):
+        if not rule_group.strip():
+            continue
+        replaced = set()
+
+        for rule in _ADDITIONAL_SPLIT.split(rule_group):
+            parsed = _parse_rule(rule)
+            if parsed is None:
+                return None
+            days, spans = parsed
+
+            # Normale Regel ersetzt die bisherigen Zeiten dieser Tage
+            for day in days - replaced:
+                mask[day * MINUTES_PER_DAY:(day + 1) * MINUTES_PER_DAY] = False
+            replaced |= days
+
+            for day in days:
+                for start, end in spans:
+                    start += day * MINUTES_PER_DAY
+                    end += day * MINUTES_PER_DAY
+                    if end <= start:
+                        # Über Mitternacht in den Folgetag
+                        end += MINUTES_PER_DAY
+                    positions = np.arange(start, end) % MINUTES_PER_WEEK
+                    mask[positions] = True
+
+    return OpeningHours(mask)
+
+
+def week_minute(at_time):
+    """Minute innerhalb der Woche (Montag 00:00 = 0) für ein datetime"""
+    return at_time.weekday() * MINUTES_PER_DAY + at_time.hour * 60 + at_time.minute
+
+
+def open_matrix(pois, week_minutes, unknown_open=True):
+    """
+    Offen-Status vieler POIs zu vielen Zeitpunkten
+
+    Jeder unterschiedliche opening_hours-String wird nur einmal kompiliert;
+    die Auswertung ist eine einzige Indizierung in die gestapelten Masken.
+
+    :param pois: Liste von POI-Dicts mit 'tags'
+    :param week_minutes: Array von Wochenminuten
+    :param unknown_open: POIs ohne bzw. mit nicht auswertbaren Öffnungszeiten als offen zählen
+    :return: Boolean-Array (Anzahl POIs x Anzahl Zeitpunkte)
+    """
+    week_minutes = np.asarray(week_minutes, dtype=np.intp) % MINUTES_PER_WEEK
+    strings = [(poi.get('tags') or {}).get('opening_hours') for poi in pois]
+
+    unique = {}
+    schedule_index = np.array([unique.setdefault(value, len(unique)) for value in strings], dtype=np.intp)
+
+    # Erst die Zeitpunkte pro Schedule auswählen, dann auf die POIs verteilen
+    schedules = np.empty((len(unique), len(week_minutes)), dtype=bool)
+    for value, index in unique.items():
+        compiled = parse_opening_hours(value)
+        schedules[index] = compiled.mask[week_minutes] if compiled is not None else unknown_open
+
+    return schedules[schedule_index]
+
+
+def filter_open_pois(pois_data, at_time, unknown_open=True):
+    """
+    Nur zum Zeitpunkt geöffnete POIs
+
+    :param pois_data: Dictionary mit POIs pro Service-Typ
+    :param at_time: datetime
+    :return: Dictionary mit geöffneten POIs pro Service-Typ
+    """
+    minute = week_minute(at_time)
+    result = {}
+    for service_type, pois in pois_data.items():
+        is_open = open_matrix(pois, [minute], unknown_open)[:, 0]
+        result[service_type] = [poi for poi, open_now in zip(pois, is_open) if open_now]
+    return result
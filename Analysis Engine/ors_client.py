@@ -2,20 +2,43 @@
 
 import requests
 import json
-from qgis.core import QgsMessageLog, Qgis
+import threading
+from .qgis_compat import QgsMessageLog, Qgis
+from .http_session import create_session, abort_session
+from .geocoding import RateLimiter
 from .config import ORS_API_KEY, ORS_ISOCHRONE_URL, ORS_BASE_URL
 
+# ORS-Limit für Standorte pro Isochronen-Anfrage
+ORS_MAX_LOCATIONS = 5
+
+# Mindestabstand zwischen gebündelten Anfragen (Standard-Kontingent: 20 Isochronen-Anfragen pro Minute)
+ORS_BATCH_MIN_INTERVAL = 3.0
+
+# Wiederholungen bei Ratenbegrenzung, Serverfehlern und Verbindungsproblemen
+ORS_MAX_RETRIES = 3
+ORS_RETRY_BACKOFF = 5.0
+ORS_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Gemeinsam für alle Clients, das Kontingent gilt pro API-Key
+_batch_rate_limiter = RateLimiter(ORS_BATCH_MIN_INTERVAL)
+
 class ORSClient:
     """OpenRouteService API Client für Isochrone und Routing"""
     
     def __init__(self):
         self.api_key = ORS_API_KEY
         self.base_url = ORS_BASE_URL
-        self.session = requests.Session()
+        self.session = create_session()
         self.session.headers.update({
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         })
+        self._aborted = threading.Event()
+    
+    def abort(self):
+        """Breche laufende Anfragen ab (aus einem anderen Thread aufrufbar)"""
+        self._aborted.set()
+        abort_session(self.session)
     
     def test_connection(self):
         """Teste die Verbindung zur ORS API"""
@@ -90,6 +113,148 @@ class ORSClient:
             QgsMessageLog.logMessage(f"ORS API error: {str(e)}", level=Qgis.Critical)
             return None
     
+    def get_isochrone_rings(self, coordinates, time_minutes_list):
+        """
+        Berechne verschachtelte Isochronen für mehrere Zeiten in einer Anfrage
+        
+        :param coordinates: [lon, lat]
+        :param time_minutes_list: Liste von Zeiten in Minuten (max. 10)
+        :return: GeoJSON mit einem Feature pro Zeit (aufsteigend sortiert) oder None
+        """
+        try:
+            time_minutes_list = sorted(set(time_minutes_list))
+            
+            payload = {
+                'locations': [coordinates],
+                'range': [time_min * 60 for time_min in time_minutes_list],
+                'range_type': 'time',
+                'units': 'm'
+            }
+            
+            QgsMessageLog.logMessage(f"ORS Request: {coordinates}, rings {time_minutes_list}min", level=Qgis.Info)
+            
+            response = self.session.post(
+                ORS_ISOCHRONE_URL,
+                json=payload,
+                timeout=30
+            )
+            
+            if response.status_code != 200:
+                error_msg = f"ORS API Error {response.status_code}: {response.text}"
+                QgsMessageLog.logMessage(error_msg, level=Qgis.Critical)
+                return None
+            
+            data = response.json()
+            if 'features' not in data or len(data['features']) == 0:
+                QgsMessageLog.logMessage("No isochrone features found", level=Qgis.Warning)
+                return None
+            
+            # Zeit-Info ergänzen, kleinste Isochrone zuerst
+            for feature in data['features']:
+                feature['properties']['time_minutes'] = int(round(feature['properties']['value'] / 60))
+            data['features'].sort(key=lambda f: f['properties']['value'])
+            
+            QgsMessageLog.logMessage(f"{len(data['features'])} isochrone rings retrieved", level=Qgis.Info)
+            return data
+            
+        except requests.exceptions.Timeout:
+            QgsMessageLog.logMessage("ORS API timeout", level=Qgis.Critical)
+            return None
+        except Exception as e:
+            QgsMessageLog.logMessage(f"ORS API error: {str(e)}", level=Qgis.Critical)
+            return None
+    
+    def get_isochrones_for_locations(self, locations, time_minutes):
+        """
+        Berechne je eine Isochrone für viele Standorte (ORS_MAX_LOCATIONS pro Anfrage)
+        
+        Die Anfragen werden auf ORS_BATCH_MIN_INTERVAL gedrosselt und bei
+        Ratenbegrenzung oder Serverfehlern wiederholt (_request_batch).
+        
+        :param locations: Liste von [lon, lat]
+        :param time_minutes: Zeit in Minuten
+        :return: Liste in Reihenfolge von locations: GeoJSON mit einem Feature
+            oder None für Standorte, die auch nach allen Versuchen fehlen
+        """
+        results = [None] * len(locations)
+        self._aborted.clear()
+        
+        for start in range(0, len(locations), ORS_MAX_LOCATIONS):
+            if self._aborted.is_set():
+                break
+            batch = locations[start:start + ORS_MAX_LOCATIONS]
+            
+            data = self._request_batch(batch, time_minutes)
+            if data is None:
+                continue
+            
+            collection = {key: value for key, value in data.items() if key != 'features'}
+            
+            # group_index ordnet die Features den Standorten der Anfrage zu
+            for feature in data.get('features', []):
+                feature['properties']['time_minutes'] = time_minutes
+                index = start + feature['properties'].get('group_index', 0)
+                results[index] = dict(collection, features=[feature])
+        
+        retrieved = sum(1 for result in results if result)
+        QgsMessageLog.logMessage(
+            f"{retrieved}/{len(locations)} isochrones retrieved",
+            level=Qgis.Info if retrieved == len(locations) else Qgis.Warning)
+        return results
+    
+    def _request_batch(self, batch, time_minutes):
+        """
+        Eine Isochronen-Anfrage für bis zu ORS_MAX_LOCATIONS Standorte
+        
+        Bei Ratenbegrenzung (429), Serverfehlern und Verbindungsproblemen wird
+        mit wachsendem Abstand erneut angefragt, mindestens so lange wie
+        Retry-After verlangt.
+        
+        :return: GeoJSON der Antwort oder None
+        """
+        for attempt in range(ORS_MAX_RETRIES + 1):
+            delay = ORS_RETRY_BACKOFF * 2 ** attempt
+            _batch_rate_limiter.wait()
+            
+            try:
+                response = self.session.post(
+                    ORS_ISOCHRONE_URL,
+                    json={
+                        'locations': batch,
+                        'range': [time_minutes * 60],
+                        'range_type': 'time',
+                        'units': 'm'
+                    },
+                    timeout=30
+                )
+                
+                if response.status_code == 200:
+                    return response.json()
+                
+                QgsMessageLog.logMessage(f"ORS API Error {response.status_code}: {response.text}", level=Qgis.Warning)
+                if response.status_code not in ORS_RETRY_STATUS:
+                    return None
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                    
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                QgsMessageLog.logMessage(f"ORS API error: {str(e)}", level=Qgis.Warning)
+            except Exception as e:
+                QgsMessageLog.logMessage(f"ORS API error: {str(e)}", level=Qgis.Warning)
+                return None
+            
+            if attempt == ORS_MAX_RETRIES:
+                break
+            QgsMessageLog.logMessage(
+                f"ORS retry {attempt + 1}/{ORS_MAX_RETRIES} for {len(batch)} locations in {delay:.0f}s",
+                level=Qgis.Info)
+            # Abbruch beendet auch das Warten auf den nächsten Versuch
+            if self._aborted.wait(delay):
+                break
+        
+        return None
+    
     def get_multiple_isochrones(self, coordinates, time_minutes_list):
         """
         Berechne mehrere Isochronen für verschiedene Zeiten
@@ -137,4 +302,20 @@ class ORSClient:
                 
         except Exception as e:
             QgsMessageLog.logMessage(f"Directions API error: {str(e)}", level=Qgis.Critical)
-            return None
\ No newline at end of file
+            return None
+
+
+def select_isochrone_ring(isochrone_data, time_minutes):
+    """
+    Extrahiere eine einzelne Isochrone aus einem Mehrfach-Ergebnis
+    
+    :param isochrone_data: GeoJSON aus get_isochrone_rings
+    :param time_minutes: Gesuchte Zeit in Minuten
+    :return: GeoJSON mit genau einem Feature oder None
+    """
+    for feature in isochrone_data.get('features', []):
+        if feature['properties'].get('time_minutes') == time_minutes:
+            ring = {key: value for key, value in isochrone_data.items() if key != 'features'}
+            ring['features'] = [feature]
+            return ring
+    return None
\ No newline at end of file
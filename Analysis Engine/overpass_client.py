@@ -1,18 +1,15 @@
 # overpass_client.py - OpenStreetMap POI Client über Overpass API
 
-import requests
 import json
-from qgis.core import QgsMessageLog, Qgis
-from shapely.geometry import Point, Polygon
-from shapely.ops import transform
-import pyproj
+from .qgis_compat import QgsMessageLog, Qgis
+from .http_session import create_session, abort_session
 
 class OverpassClient:
     """Client für Overpass API zum Abrufen von OpenStreetMap POIs"""
     
     def __init__(self):
         self.base_url = "https://overpass-api.de/api/interpreter"
-        self.session = requests.Session()
+        self.session = create_session()
         
         # Service-Mapping: Plugin-Name -> OSM-Tags
         self.service_mappings = {
@@ -45,6 +42,10 @@ class OverpassClient:
             ]
         }
     
+    def abort(self):
+        """Breche laufende Anfragen ab (aus einem anderen Thread aufrufbar)"""
+        abort_session(self.session)
+    
     def create_overpass_query(self, bbox, service_types):
         """
         Erstelle Overpass-Abfrage für gegebene Bounding Box und Services
@@ -128,7 +129,8 @@ class OverpassClient:
             # POIs nach Service-Typ gruppieren
             results = {service_type: [] for service_type in service_types}
             
-            # Polygon für Punkt-in-Polygon-Test erstellen
+            # Polygon für Punkt-in-Polygon-Test erstellen (shapely erst hier laden)
+            from shapely.geometry import Point, Polygon
             polygon = Polygon(coords)
             
             # Elemente verarbeiten
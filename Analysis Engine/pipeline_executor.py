@@ -0,0 +1,237 @@
+# pipeline_executor.py - Überlappende Ausführung der Analyse-Schritte für mehrere Standorte
+
+import queue
+import threading
+import time
+from .qgis_compat import QgsMessageLog, Qgis
+
+# Maximale Anzahl wartender Standorte zwischen zwei Schritten
+DEFAULT_QUEUE_SIZE = 2
+
+# Felder, die pro Standort zurückgegeben werden
+RESULT_KEYS = ('index', 'location_name', 'coordinates', 'time_limit', 'service_types', 'result', 'error')
+
+# Markiert das Ende des Datenstroms
+_END = object()
+
+
+class PipelineStage(threading.Thread):
+    """Ein Analyse-Schritt, der Standorte aus einer Queue verarbeitet"""
+
+    def __init__(self, name, func, input_queue, output_queue, stop_event=None):
+        super().__init__(name=f"walkability-{name}", daemon=True)
+        self.stage_name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        # Gesetzt, wenn der Lauf abgebrochen wird: restliche Standorte verwerfen
+        self.stop_event = stop_event or threading.Event()
+
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._depth_sum = 0
+
+    def run(self):
+        """Verarbeite Standorte, bis das Ende-Signal eintrifft"""
+        while True:
+            depth = self.input_queue.qsize()
+            item = self.input_queue.get()
+            if item is _END:
+                self.output_queue.put(_END)
+                return
+            if self.stop_event.is_set():
+                continue
+
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self._depth_sum += depth
+
+            # Fehlgeschlagene Standorte nur durchreichen
+            if item.get('error') is None:
+                started = time.perf_counter()
+                try:
+                    self.func(item)
+                    self.processed += 1
+                except Exception as e:
+                    item['error'] = f"{self.stage_name}: {str(e)}"
+                    self.failed += 1
+                    QgsMessageLog.logMessage(
+                        f"Pipeline {self.stage_name} error for {item['location_name']}: {str(e)}",
+                        level=Qgis.Warning)
+                self.busy_seconds += time.perf_counter() - started
+
+            self.output_queue.put(item)
+
+    def stats(self):
+        """Durchsatz und Queue-Tiefe des Schritts"""
+        handled = self.processed + self.failed
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': self.busy_seconds,
+            'throughput': self.processed / self.busy_seconds if self.busy_seconds > 0 else 0.0,
+            'max_queue_depth': self.max_queue_depth,
+            'mean_queue_depth': self._depth_sum / handled if handled else 0.0
+        }
+
+
+class PipelineExecutor:
+    """
+    Führe die Schritte von analyze_custom_location für viele Standorte
+    überlappend aus
+
+    Jeder Schritt (ORS, Overpass, Score/Layer) läuft in einem eigenen Thread.
+    Während Standort k auf Overpass wartet, ist die Isochrone von Standort
+    k+1 bereits angefragt. Die Gesamtdauer nähert sich damit der Dauer des
+    langsamsten Schritts statt der Summe aller Schritte.
+    """
+
+    def __init__(self, analyzer, queue_size=DEFAULT_QUEUE_SIZE, use_cache=True, create_layers=True, at_time=None):
+        """
+        :param analyzer: WalkabilityAnalyzer aus walkability_engine
+        :param queue_size: Maximale Anzahl wartender Standorte pro Queue
+        :param use_cache: Ergebnis-Cache verwenden
+        :param create_layers: QGIS-Layer für jedes Ergebnis erstellen
+        :param at_time: Optionaler Zeitpunkt (datetime) für Öffnungszeiten
+        """
+        self.analyzer = analyzer
+        self.queue_size = queue_size
+        self.use_cache = use_cache
+        self.create_layers = create_layers
+        self.at_time = at_time
+        self.stats = {}
+
+    def _isochrone_stage(self, item):
+        item['isochrone'] = self.analyzer.fetch_isochrone(
+            item['coordinates'], item['time_limit'], self.use_cache)
+
+    def _poi_stage(self, item):
+        item['services'] = self.analyzer.fetch_pois(
+            item['coordinates'], item['time_limit'], item['service_types'],
+            item['isochrone'], self.use_cache)
+
+    def _result_stage(self, item):
+        item['result'] = self.analyzer.build_result(
+            item['location_name'], item['coordinates'], item['time_limit'], item['service_types'],
+            item['isochrone'], item['services'], self.create_layers, self.at_time)
+
+        # Layer gehören sonst zum Worker-Thread und können nicht ins Projekt
+        main_thread = self._main_thread()
+        if main_thread is not None:
+            for layer in item['result']['layers'].values():
+                layer.moveToThread(main_thread)
+
+    @staticmethod
+    def _main_thread():
+        try:
+            from qgis.PyQt.QtCore import QCoreApplication
+            app = QCoreApplication.instance()
+            return app.thread() if app else None
+        except ImportError:
+            return None
+
+    def run(self, origins, progress_callback=None, collect_results=True):
+        """
+        Analysiere mehrere Standorte
+
+        :param origins: Iterable von Dicts mit 'location_name', 'coordinates',
+            'time_limit' und 'service_types'
+        :param progress_callback: Optionale Funktion (fertig, Ergebnis-Dict)
+        :param collect_results: Ergebnisse sammeln; bei False werden sie nur
+            an progress_callback übergeben (konstanter Speicherbedarf)
+        :return: Liste von Dicts (RESULT_KEYS) mit 'result' bzw. 'error',
+            in Eingabereihenfolge
+        :raises: Fehler aus dem Iterable origins, nachdem alle bereits
+            eingereihten Standorte abgearbeitet sind
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(3)]
+        done_queue = queue.Queue()
+        stop_event = threading.Event()
+
+        stages = [
+            PipelineStage('isochrone', self._isochrone_stage, queues[0], queues[1], stop_event),
+            PipelineStage('pois', self._poi_stage, queues[1], queues[2], stop_event),
+            PipelineStage('result', self._result_stage, queues[2], done_queue, stop_event)
+        ]
+
+        started = time.perf_counter()
+        for stage in stages:
+            stage.start()
+
+        # Eingabe in eigenem Thread, damit die Ergebnisse parallel abgeholt werden.
+        # Das Ende-Signal wird auch gesendet, wenn das Iterable einen Fehler wirft,
+        # sonst warten die Schritte und die Ergebnis-Schleife endlos.
+        feed_errors = []
+
+        def feed():
+            try:
+                for index, origin in enumerate(origins):
+                    if stop_event.is_set():
+                        break
+                    item = dict(origin)
+                    item.setdefault('index', index)
+                    item['error'] = None
+                    queues[0].put(item)
+            except BaseException as e:
+                feed_errors.append(e)
+            finally:
+                queues[0].put(_END)
+
+        feeder = threading.Thread(target=feed, name="walkability-feed", daemon=True)
+        feeder.start()
+
+        items = []
+        done = 0
+        failed = 0
+        try:
+            while True:
+                item = done_queue.get()
+                if item is _END:
+                    break
+                done += 1
+                failed += 1 if item['error'] else 0
+                item = {key: item[key] for key in RESULT_KEYS if key in item}
+                if collect_results:
+                    items.append(item)
+                if progress_callback:
+                    progress_callback(done, item)
+        finally:
+            # Wirft progress_callback, keine weiteren Standorte einspeisen oder
+            # berechnen; die Threads laufen leer und werden beendet
+            stop_event.set()
+            feeder.join()
+            for stage in stages:
+                stage.join()
+
+        if feed_errors:
+            QgsMessageLog.logMessage(
+                f"Pipeline input error after {done} origins: {str(feed_errors[0])}", level=Qgis.Critical)
+            raise feed_errors[0]
+
+        elapsed = time.perf_counter() - started
+        self.stats = {
+            'origins': done,
+            'failed': failed,
+            'elapsed_seconds': elapsed,
+            'throughput': done / elapsed if elapsed > 0 else 0.0,
+            'stages': {stage.stage_name: stage.stats() for stage in stages}
+        }
+        self.log_stats()
+
+        items.sort(key=lambda item: item['index'])
+        return items
+
+    def log_stats(self):
+        """Schreibe Durchsatz und Queue-Tiefen ins QGIS-Log"""
+        QgsMessageLog.logMessage(
+            f"Pipeline: {self.stats['origins']} origins in {self.stats['elapsed_seconds']:.1f}s "
+            f"({self.stats['throughput']:.2f}/s, {self.stats['failed']} failed)",
+            level=Qgis.Info)
+
+        for name, stage_stats in self.stats['stages'].items():
+            QgsMessageLog.logMessage(
+                f"  {name}: {stage_stats['processed']} done, busy {stage_stats['busy_seconds']:.1f}s, "
+                f"{stage_stats['throughput']:.2f}/s, queue max {stage_stats['max_queue_depth']}, "
+                f"mean {stage_stats['mean_queue_depth']:.1f}",
+                level=Qgis.Info)
@@ -0,0 +1,220 @@
+# population_aggregation.py - Einwohnergewichtete Erreichbarkeit pro Stadtteil
+
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .coverage_gaps import to_metric_xy
+
+# Schwellen der Bewertungsskala (Poor < 40, Fair < 60)
+DEFAULT_THRESHOLDS = (40, 60)
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Einwohner weiter entfernt vom nächsten bewerteten Standort bleiben unbewertet
+DEFAULT_MAX_DISTANCE_M = 500
+
+
+def load_score_points(path, score_field='total_score'):
+    """
+    Bewertete Standorte aus einer Ergebnis-CSV (walkability_cli) oder GeoJSON
+
+    :return: (xs, ys, scores) als numpy-Arrays; fehlgeschlagene Standorte fehlen
+    """
+    xs, ys, scores = [], [], []
+
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+        for feature in features:
+            value = (feature.get('properties') or {}).get(score_field)
+            if value in (None, '') or not feature.get('geometry') or feature['geometry']['type'] != 'Point':
+                continue
+            lon, lat = feature['geometry']['coordinates'][:2]
+            xs.append(lon)
+            ys.append(lat)
+            scores.append(float(value))
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                if row.get(score_field) in (None, ''):
+                    continue
+                xs.append(float(row['lon']))
+                ys.append(float(row['lat']))
+                scores.append(float(row[score_field]))
+
+    return np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), np.asarray(scores, dtype=float)
+
+
+def load_districts(path, name_field='name'):
+    """
+    Stadtteil-Flächen aus GeoJSON
+
+    :return: (Namen, Array von shapely-Flächen)
+    """
+    with open(path, encoding='utf-8') as f:
+        features = [feature for feature in json.load(f).get('features', []) if feature.get('geometry')]
+
+    names = [str((feature.get('properties') or {}).get(name_field) or f"Fläche {index + 1}")
+             for index, feature in enumerate(features)]
+    polygons = np.asarray([shape(feature['geometry']) for feature in features], dtype=object)
+    return names, polygons
+
+
+def _weighted_percentiles(values, weights, percentiles):
+    """Gewichtete Perzentile einer Gruppe (values aufsteigend sortiert)"""
+    cumulative = np.cumsum(weights)
+    targets = np.asarray(percentiles, dtype=float) / 100.0 * cumulative[-1]
+    positions = np.minimum(np.searchsorted(cumulative, targets), len(values) - 1)
+    return values[positions]
+
+
+def aggregate_by_district(score_points, population, district_names, district_polygons,
+                          thresholds=DEFAULT_THRESHOLDS, percentiles=DEFAULT_PERCENTILES,
+                          max_distance_m=DEFAULT_MAX_DISTANCE_M):
+    """
+    Einwohnergewichtete Score-Statistik pro Stadtteil
+
+    Jeder Einwohner-Punkt (Rasterzelle oder Gebäude) erhält den Score des
+    nächstgelegenen bewerteten Standorts (STRtree-Nachbarsuche in Metern)
+    und wird per STRtree-Abfrage einem Stadtteil zugeordnet. Beide Joins
+    laufen vektorisiert über alle Punkte; die Statistik wird gruppiert mit
+    numpy berechnet.
+
+    :param score_points: (xs, ys, scores) aus load_score_points
+    :param population: PopulationPoints (population_data.load_population)
+    :param district_names: Liste der Stadtteil-Namen
+    :param district_polygons: Array von shapely-Flächen (lon/lat)
+    :param thresholds: Score-Schwellen für den Anteil darunter
+    :param percentiles: Gewichtete Perzentile
+    :param max_distance_m: Maximaler Abstand zum nächsten bewerteten Standort
+    :return: Liste von Dicts pro Stadtteil (district, population,
+        scored_population, mean_score, p<N>, share_below_<T>)
+    """
+    score_xs, score_ys, scores = score_points
+    if len(scores) == 0:
+        raise ValueError("Keine bewerteten Standorte")
+
+    # 1. Score des nächsten bewerteten Standorts pro Einwohner-Punkt
+    score_tree = shapely.STRtree(shapely.points(*to_metric_xy(score_xs, score_ys)))
+    population_metric = shapely.points(*to_metric_xy(population.xs, population.ys))
+    point_index, score_index = score_tree.query_nearest(
+        population_metric, max_distance=max_distance_m, all_matches=False)
+
+    point_scores = np.full(len(population.xs), np.nan)
+    point_scores[point_index] = scores[score_index]
+
+    # 2. Stadtteil pro Einwohner-Punkt
+    district_tree = shapely.STRtree(district_polygons)
+    population_points = shapely.points(population.xs, population.ys)
+    located_index, district_index = district_tree.query(population_points, predicate='within')
+    located_index, first = np.unique(located_index, return_index=True)
+
+    point_district = np.full(len(population.xs), -1, dtype=np.intp)
+    point_district[located_index] = district_index[first]
+
+    # 3. Gruppierte Statistik
+    n_districts = len(district_names)
+    in_district = point_district >= 0
+    weights = population.population
+    total = np.bincount(point_district[in_district], weights=weights[in_district], minlength=n_districts)
+
+    scored = in_district & ~np.isnan(point_scores)
+    groups = point_district[scored]
+    group_weights = weights[scored]
+    group_scores = point_scores[scored]
+    scored_total = np.bincount(groups, weights=group_weights, minlength=n_districts)
+    weighted_sum = np.bincount(groups, weights=group_weights * group_scores, minlength=n_districts)
+
+    below = {threshold: np.bincount(groups, weights=group_weights * (group_scores < threshold),
+                                    minlength=n_districts)
+             for threshold in thresholds}
+
+    order = np.lexsort((group_scores, groups))
+    sorted_groups = groups[order]
+    bounds = np.searchsorted(sorted_groups, np.arange(n_districts + 1))
+
+    rows = []
+    for district in range(n_districts):
+        row = {
+            'district': district_names[district],
+            'population': round(float(total[district])),
+            'scored_population': round(float(scored_total[district])),
+            'mean_score': None
+        }
+        row.update({f"p{percentile}": None for percentile in percentiles})
+        row.update({f"share_below_{threshold}": None for threshold in thresholds})
+
+        if scored_total[district] > 0:
+            start, end = bounds[district], bounds[district + 1]
+            values = group_scores[order[start:end]]
+            value_weights = group_weights[order[start:end]]
+
+            row['mean_score'] = round(float(weighted_sum[district] / scored_total[district]), 2)
+            for percentile, value in zip(percentiles, _weighted_percentiles(values, value_weights, percentiles)):
+                row[f"p{percentile}"] = round(float(value), 2)
+            for threshold in thresholds:
+                row[f"share_below_{threshold}"] = round(float(below[threshold][district] / scored_total[district]), 4)
+
+        rows.append(row)
+
+    unscored = float(weights[in_district & np.isnan(point_scores)].sum())
+    QgsMessageLog.logMessage(
+        f"Aggregation: {len(population.xs)} population points, {n_districts} districts, "
+        f"{unscored:.0f} residents without score within {max_distance_m} m",
+        level=Qgis.Info)
+
+    return rows
+
+
+def write_district_csv(path, rows):
+    """Stadtteil-Statistik als CSV schreiben"""
+    if not rows:
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='population_aggregation', description='Einwohnergewichtete Scores pro Stadtteil')
+    parser.add_argument('scores', help='Batch-Ergebnisse (CSV von walkability_cli oder GeoJSON)')
+    parser.add_argument('population', help='Einwohner als CSV (lat, lon, population) oder GeoJSON')
+    parser.add_argument('districts', help='Stadtteil-Flächen (GeoJSON)')
+    parser.add_argument('--name-field', default='name', help='Namensfeld der Stadtteile (Standard: name)')
+    parser.add_argument('--score-field', default='total_score', help='Score-Spalte (Standard: total_score)')
+    parser.add_argument('--max-distance', type=float, default=DEFAULT_MAX_DISTANCE_M,
+                        help=f'Maximaler Abstand zum nächsten Standort in Metern (Standard: {DEFAULT_MAX_DISTANCE_M})')
+    parser.add_argument('--csv', dest='csv_path', help='Statistik als CSV (Standard: Ausgabe auf stdout)')
+    args = parser.parse_args(argv)
+
+    from .population_data import load_population
+
+    try:
+        score_points = load_score_points(args.scores, args.score_field)
+        population = load_population(args.population)
+        names, polygons = load_districts(args.districts, args.name_field)
+        rows = aggregate_by_district(score_points, population, names, polygons,
+                                     max_distance_m=args.max_distance)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"Eingabe konnte nicht gelesen werden: {str(e)}\n")
+        return 2
+
+    if args.csv_path:
+        write_district_csv(args.csv_path, rows)
+    elif rows:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
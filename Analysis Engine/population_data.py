@@ -0,0 +1,94 @@
+# population_data.py - Einwohnerdaten (Raster-Zellen oder Gebäude) aus Dateien lesen
+
+import csv
+import json
+from collections import namedtuple
+
+import numpy as np
+import shapely
+
+# Spaltennamen, unter denen die Einwohnerzahl gesucht wird
+POPULATION_FIELDS = ('population', 'pop', 'einwohner', 'ew')
+
+PopulationPoints = namedtuple('PopulationPoints', ['xs', 'ys', 'population'])
+
+
+def _population_field(names, field):
+    if field:
+        if field not in names:
+            raise ValueError(f"Feld '{field}' nicht in den Einwohnerdaten gefunden")
+        return field
+    lower = {name.lower(): name for name in names}
+    for candidate in POPULATION_FIELDS:
+        if candidate in lower:
+            return lower[candidate]
+    return None
+
+
+def load_population(path, field=None):
+    """
+    Lese Einwohnerdaten als Punkte mit Gewicht
+
+    CSV: Spalten lat, lon und eine Einwohner-Spalte.
+    GeoJSON: Punkte oder Flächen (Raster-Zellen, Gebäude); Flächen werden
+    durch einen inneren Punkt ersetzt. Ohne Einwohner-Feld zählt jedes
+    Feature als 1 (z.B. Wohngebäude).
+
+    :param path: Pfad zur CSV- oder GeoJSON-Datei
+    :param field: Name des Einwohner-Felds (Standard: POPULATION_FIELDS)
+    :return: PopulationPoints mit numpy-Arrays xs (lon), ys (lat), population
+    """
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            features = [feature for feature in json.load(f).get('features', []) if feature.get('geometry')]
+
+        names = set()
+        for feature in features[:100]:
+            names.update((feature.get('properties') or {}).keys())
+        population_field = _population_field(names, field)
+
+        geometries = shapely.from_geojson([json.dumps(feature['geometry']) for feature in features]) \
+            if features else np.empty(0, dtype=object)
+        points = shapely.point_on_surface(geometries)
+        coords = shapely.get_coordinates(points)
+        xs, ys = coords[:, 0], coords[:, 1]
+
+        if population_field:
+            population = np.array([(feature.get('properties') or {}).get(population_field) or 0
+                                   for feature in features], dtype=float)
+        else:
+            population = np.ones(len(features))
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            population_field = _population_field(reader.fieldnames or [], field)
+            rows = list(reader)
+
+        xs = np.array([float(row['lon']) for row in rows])
+        ys = np.array([float(row['lat']) for row in rows])
+        if population_field:
+            population = np.array([float(row[population_field] or 0) for row in rows])
+        else:
+            population = np.ones(len(rows))
+
+    return PopulationPoints(xs, ys, population)
+
+
+def population_in_polygons(polygons, population_points):
+    """
+    Einwohner innerhalb mehrerer Flächen (STRtree-Abfrage, vektorisiert)
+
+    :param polygons: Array/Liste von shapely-Flächen (lon/lat)
+    :param population_points: PopulationPoints
+    :return: numpy-Array mit der Einwohnersumme pro Fläche
+    """
+    polygons = np.asarray(polygons, dtype=object)
+    totals = np.zeros(len(polygons))
+    if len(polygons) == 0 or len(population_points.xs) == 0:
+        return totals
+
+    points = shapely.points(population_points.xs, population_points.ys)
+    tree = shapely.STRtree(points)
+    polygon_index, point_index = tree.query(polygons, predicate='contains')
+    np.add.at(totals, polygon_index, population_points.population[point_index])
+    return totals
@@ -0,0 +1,211 @@
+# result_cache.py - Zwischenspeicher für Isochronen und POIs pro Standort
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+# Kleinste Gehzeit des Dialogs und ORS-Limit für Intervalle pro Anfrage
+MIN_RING_MINUTES = 5
+MAX_RINGS = 10
+
+# Anzahl gespeicherter Standorte
+CACHE_MAX_LOCATIONS = 200
+
+# Anzahl gespeicherter POI-Standorte für Einzugsgebiete (Versorgungslücken)
+CATCHMENT_CACHE_MAX_LOCATIONS = 5000
+
+
+def ring_minutes_for(time_limit):
+    """
+    Bestimme die Zeiten, die zusammen mit einer Isochrone angefragt werden
+
+    Neben dem Zeitlimit selbst werden volle 5-Minuten-Schritte und die direkt
+    darunter liegenden Minuten angefragt, damit spätere Analysen mit kürzerer
+    Gehzeit ohne neue ORS-Anfrage beantwortet werden können.
+
+    :param time_limit: Maximale Gehzeit in Minuten
+    :return: Aufsteigend sortierte Liste von Minuten
+    """
+    rings = {time_limit}
+    rings.update(range(MIN_RING_MINUTES, time_limit, 5))
+
+    minutes = time_limit - 1
+    while len(rings) < MAX_RINGS and minutes >= MIN_RING_MINUTES:
+        rings.add(minutes)
+        minutes -= 1
+
+    return sorted(rings)
+
+
+class ResultCache:
+    """Speicher für Isochronen-Ringe und POIs, geordnet nach Standort"""
+
+    def __init__(self, max_locations=CACHE_MAX_LOCATIONS, precision=6):
+        self.max_locations = max_locations
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def location_key(self, coordinates):
+        """Schlüssel für [lon, lat] (gerundet auf ca. 10 cm)"""
+        return (round(coordinates[0], self.precision), round(coordinates[1], self.precision))
+
+    def _get_entry(self, coordinates, create=False):
+        key = self.location_key(coordinates)
+        entry = self._entries.get(key)
+
+        if entry is None and create:
+            entry = {'collection': {}, 'rings': {}, 'pois': {}}
+            self._entries[key] = entry
+
+            # Ältesten Standort verwerfen
+            while len(self._entries) > self.max_locations:
+                self._entries.popitem(last=False)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+
+        return entry
+
+    def store_isochrone(self, coordinates, isochrone_data):
+        """
+        Speichere eine (Mehrfach-)Isochrone
+
+        :param coordinates: [lon, lat]
+        :param isochrone_data: GeoJSON mit 'time_minutes' in den Properties
+        """
+        with self._lock:
+            entry = self._get_entry(coordinates, create=True)
+            entry['collection'] = {key: value for key, value in isochrone_data.items() if key != 'features'}
+
+            for feature in isochrone_data.get('features', []):
+                minutes = feature['properties'].get('time_minutes')
+                if minutes is not None:
+                    entry['rings'][minutes] = feature
+
+    def get_isochrone(self, coordinates, time_limit):
+        """
+        Hole eine einzelne Isochrone aus dem Cache
+
+        :return: GeoJSON mit genau einem Feature oder None
+        """
+        with self._lock:
+            entry = self._get_entry(coordinates)
+            if entry is None or time_limit not in entry['rings']:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            isochrone = dict(entry['collection'])
+            isochrone['features'] = [entry['rings'][time_limit]]
+            return isochrone
+
+    def largest_ring(self, coordinates):
+        """Größte gespeicherte Gehzeit für einen Standort oder None"""
+        with self._lock:
+            entry = self._get_entry(coordinates)
+            if entry is None or not entry['rings']:
+                return None
+            return max(entry['rings'])
+
+    def store_pois(self, coordinates, time_limit, pois_data):
+        """
+        Speichere POIs, die für die Isochrone mit time_limit abgefragt wurden
+
+        Bereits gespeicherte Service-Typen werden nur ersetzt, wenn die neue
+        Abfrage eine mindestens ebenso große Fläche abdeckt.
+        """
+        with self._lock:
+            entry = self._get_entry(coordinates, create=True)
+
+            for service_type, pois in pois_data.items():
+                cached = entry['pois'].get(service_type)
+                if cached is None or cached[0] <= time_limit:
+                    entry['pois'][service_type] = (time_limit, pois)
+
+    def get_pois(self, coordinates, time_limit, service_types):
+        """
+        Beantworte eine POI-Anfrage aus dem Cache
+
+        POIs, die für eine größere Isochrone gespeichert sind, werden auf die
+        Isochrone mit time_limit gefiltert.
+
+        :return: (POIs pro Service-Typ, Liste fehlender Service-Typen)
+        """
+        with self._lock:
+            entry = self._get_entry(coordinates)
+            if entry is None:
+                return {}, list(service_types)
+
+            ring = entry['rings'].get(time_limit)
+            polygon = None
+            results = {}
+            missing = []
+
+            for service_type in service_types:
+                cached = entry['pois'].get(service_type)
+
+                if cached is None or cached[0] < time_limit:
+                    missing.append(service_type)
+                    continue
+
+                fetched_minutes, pois = cached
+                if fetched_minutes == time_limit:
+                    results[service_type] = list(pois)
+                    continue
+
+                if ring is None:
+                    missing.append(service_type)
+                    continue
+
+                if polygon is None:
+                    # Ganze Geometrie inkl. Löchern und Teilflächen
+                    polygon = shape(ring['geometry'])
+
+                if not pois:
+                    results[service_type] = []
+                    continue
+                lons = np.fromiter((poi['lon'] for poi in pois), dtype=float, count=len(pois))
+                lats = np.fromiter((poi['lat'] for poi in pois), dtype=float, count=len(pois))
+                inside = shapely.contains_xy(polygon, lons, lats)
+                results[service_type] = [poi for poi, is_inside in zip(pois, inside) if is_inside]
+
+            return results, missing
+
+    def clear(self):
+        """Leere den Cache"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_shared_cache = None
+
+
+def get_result_cache():
+    """Gemeinsamer Cache für alle Analysen der QGIS-Sitzung"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResultCache()
+    return _shared_cache
+
+
+_catchment_cache = None
+
+
+def get_catchment_cache():
+    """
+    Eigener Cache für Isochronen um POIs
+
+    Flächenanalysen fragen Isochronen für hunderte POIs ab; ein eigener
+    Cache verhindert, dass sie die Standorte der Einzelanalysen verdrängen.
+    """
+    global _catchment_cache
+    if _catchment_cache is None:
+        _catchment_cache = ResultCache(max_locations=CATCHMENT_CACHE_MAX_LOCATIONS)
+    return _catchment_cache
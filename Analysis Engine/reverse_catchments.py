@@ -0,0 +1,195 @@
+# reverse_catchments.py - Einzugsgebiete: welche Einwohner erreichen welchen POI
+
+import argparse
+import json
+import sys
+
+import numpy as np
+from shapely.geometry import mapping
+
+try:
+    from qgis.core import QgsVectorLayer, QgsFeature, QgsField
+    from qgis.PyQt.QtCore import QVariant
+    from .layer_styles import get_layer_style_cache
+except ImportError:
+    # Headless-Betrieb ohne QGIS: nur GeoJSON/GeoPackage-Ausgabe
+    pass
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .coverage_gaps import CoverageGapAnalyzer, load_boundary, missing_poi_entry
+from .site_selection import coverage_index
+
+CATCHMENT_FIELDS = [
+    ('osm_id', 'TEXT'), ('name', 'TEXT'), ('service_type', 'TEXT'), ('time_limit', 'INTEGER'),
+    ('demand_points', 'INTEGER'), ('population', 'REAL'),
+    ('exclusive_population', 'REAL'), ('shared_share', 'REAL')
+]
+
+
+class ReverseCatchmentAnalyzer:
+    """
+    Umkehrung von get_pois_in_area: Einwohner im Einzugsgebiet jedes POIs
+
+    Pro POI wird eine Isochrone bestimmt (Catchment-Cache, sonst ORS mit
+    mehreren Standorten pro Anfrage). Alle Nachfrage-Punkte werden in einer
+    einzigen STRtree-Abfrage den Einzugsgebieten zugeordnet. Neben der
+    Einwohnerzahl wird ausgewiesen, wie viele Einwohner nur diesen POI
+    erreichen (exclusive_population) und welcher Anteil auch andere POIs
+    desselben Typs erreicht (shared_share): hohe Einwohnerzahlen deuten auf
+    überlastete, hohe Überschneidung auf redundante Einrichtungen.
+    """
+
+    def __init__(self, gap_analyzer=None):
+        self.gap_analyzer = gap_analyzer or CoverageGapAnalyzer()
+
+    def analyze(self, pois_data, demand, time_limit):
+        """
+        :param pois_data: Dictionary mit POIs pro Service-Typ (wie get_pois_in_area)
+        :param demand: PopulationPoints (population_data.load_population)
+        :param time_limit: Gehzeit in Minuten
+        :return: GeoJSON-FeatureCollection, ein Einzugsgebiet pro POI;
+            'missing_isochrones' listet POIs ohne Isochrone (kein Feature,
+            ihre Einwohner zählen bei den übrigen POIs als exklusiv)
+        """
+        features = []
+        missing_isochrones = []
+
+        for service_type, pois in pois_data.items():
+            if not pois:
+                continue
+
+            polygons = self.gap_analyzer.location_isochrones([[poi['lon'], poi['lat']] for poi in pois], time_limit)
+            ptr, cells = coverage_index(polygons, demand)
+
+            # Anzahl erreichbarer POIs pro Nachfrage-Punkt
+            multiplicity = np.bincount(cells, minlength=len(demand.xs))
+            poi_of_entry = np.repeat(np.arange(len(pois)), np.diff(ptr))
+            weights = demand.population[cells]
+
+            points = np.diff(ptr)
+            population = np.bincount(poi_of_entry, weights=weights, minlength=len(pois))
+            exclusive = np.bincount(poi_of_entry, weights=weights * (multiplicity[cells] == 1), minlength=len(pois))
+
+            for index, (poi, polygon) in enumerate(zip(pois, polygons)):
+                if polygon is None:
+                    missing_isochrones.append(missing_poi_entry(poi, service_type))
+                    continue
+                features.append({
+                    'type': 'Feature',
+                    'geometry': mapping(polygon),
+                    'properties': {
+                        'osm_id': str(poi.get('id', '')),
+                        'name': poi.get('name', ''),
+                        'service_type': service_type,
+                        'time_limit': time_limit,
+                        'demand_points': int(points[index]),
+                        'population': round(float(population[index]), 1),
+                        'exclusive_population': round(float(exclusive[index]), 1),
+                        'shared_share': round(float(1.0 - exclusive[index] / population[index]), 4) if population[index] else None
+                    }
+                })
+
+            QgsMessageLog.logMessage(
+                f"Catchments {service_type}: {len(pois)} POIs, median population "
+                f"{float(np.median(population)):.0f}, max {float(population.max()):.0f}",
+                level=Qgis.Info)
+
+        if missing_isochrones:
+            QgsMessageLog.logMessage(
+                f"Catchments: no isochrone for {len(missing_isochrones)} POIs, "
+                f"exclusive population of neighbouring POIs is overestimated", level=Qgis.Warning)
+
+        return {'type': 'FeatureCollection', 'features': features, 'missing_isochrones': missing_isochrones}
+
+
+def create_catchment_layer(catchments, layer_name="Walkability_Einzugsgebiete"):
+    """
+    Memory-Layer mit Einzugsgebieten und Einwohnerzahlen
+
+    :param catchments: FeatureCollection aus ReverseCatchmentAnalyzer.analyze
+    :return: QgsVectorLayer
+    """
+    from .walkability_engine import geometry_from_geojson
+
+    layer = QgsVectorLayer("MultiPolygon?crs=EPSG:4326", layer_name, "memory")
+    field_types = {'TEXT': QVariant.String, 'INTEGER': QVariant.Int, 'REAL': QVariant.Double}
+    layer.dataProvider().addAttributes([QgsField(name, field_types[sql_type]) for name, sql_type in CATCHMENT_FIELDS])
+    layer.updateFields()
+
+    features = []
+    for feature_data in catchments['features']:
+        geometry = geometry_from_geojson(feature_data['geometry'])
+        if geometry is None:
+            continue
+        geometry.convertToMultiType()
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(geometry)
+        feature.setAttributes([feature_data['properties'][name] for name, _ in CATCHMENT_FIELDS])
+        features.append(feature)
+
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    layer.renderer().setSymbol(get_layer_style_cache().isochrone_symbol())
+    return layer
+
+
+def write_catchments_geopackage(path, catchments, table='reverse_catchments'):
+    """Einzugsgebiete in eine GeoPackage-Tabelle schreiben"""
+    from .gpkg_writer import GeoPackageWriter
+    from .layer_store import as_multipolygon
+
+    gpkg = GeoPackageWriter(path)
+    try:
+        gpkg.create_table(table, 'MULTIPOLYGON', CATCHMENT_FIELDS)
+        return gpkg.insert(table, ((as_multipolygon(feature['geometry']), feature['properties'])
+                                   for feature in catchments['features']))
+    finally:
+        gpkg.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='reverse_catchments', description='Einzugsgebiete: Einwohner in Gehzeit um jeden POI')
+    parser.add_argument('boundary', help='Stadt- oder Stadtteilgrenze (GeoJSON)')
+    parser.add_argument('population', help='Einwohner als CSV (lat, lon, population) oder GeoJSON')
+    parser.add_argument('--time-limit', type=int, default=15, help='Gehzeit in Minuten (Standard: 15)')
+    parser.add_argument('--services', help='Service-Typen, getrennt durch ";" oder "," (Standard wie im Dialog)')
+    parser.add_argument('--gpkg', dest='gpkg_path', help='Einzugsgebiete als GeoPackage-Tabelle reverse_catchments')
+    parser.add_argument('--geojson', dest='geojson_path', help='Einzugsgebiete als GeoJSON (inkl. missing_isochrones)')
+    args = parser.parse_args(argv)
+
+    from .walkability_cli import parse_services, DEFAULT_SERVICES
+    from .population_data import load_population
+
+    if not (args.gpkg_path or args.geojson_path):
+        sys.stderr.write("Mindestens --gpkg oder --geojson angeben\n")
+        return 2
+
+    try:
+        services = parse_services(args.services, DEFAULT_SERVICES)
+        boundary = load_boundary(args.boundary)
+        demand = load_population(args.population)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"Eingabe konnte nicht gelesen werden: {str(e)}\n")
+        return 2
+
+    gap_analyzer = CoverageGapAnalyzer()
+    pois_data = gap_analyzer.fetch_service_pois(boundary, args.time_limit, services)
+    catchments = ReverseCatchmentAnalyzer(gap_analyzer).analyze(pois_data, demand, args.time_limit)
+
+    if args.gpkg_path:
+        write_catchments_geopackage(args.gpkg_path, catchments)
+    if args.geojson_path:
+        with open(args.geojson_path, 'w', encoding='utf-8') as f:
+            json.dump(catchments, f)
+
+    sys.stderr.write(f"{len(catchments['features'])} Einzugsgebiete\n")
+    if catchments['missing_isochrones']:
+        sys.stderr.write(f"{len(catchments['missing_isochrones'])} POIs ohne Isochrone, "
+                         f"exklusive Einwohner der Nachbarn überschätzt\n")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# site_selection.py - Greedy-Standortwahl für neue Einrichtungen
+
+import argparse
+import csv
+import heapq
+import json
+import sys
+
+import numpy as np
+import shapely
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .config import SERVICE_CATEGORIES
+from .walkability_engine import WalkabilityAnalyzer
+from .coverage_gaps import CoverageGapAnalyzer, load_boundary, missing_poi_entry, to_metric, to_wgs84
+
+
+def candidate_grid(boundary, spacing_m):
+    """
+    Regelmäßiges Raster von Kandidaten-Standorten innerhalb einer Fläche
+
+    :param boundary: shapely-Fläche (lon/lat)
+    :param spacing_m: Rasterweite in Metern
+    :return: Liste von Kandidaten-Dicts (name, lon, lat)
+    """
+    boundary_metric = to_metric(boundary)
+    minx, miny, maxx, maxy = boundary_metric.bounds
+    xs, ys = np.meshgrid(np.arange(minx + spacing_m / 2, maxx, spacing_m),
+                         np.arange(miny + spacing_m / 2, maxy, spacing_m))
+    points = shapely.points(xs.ravel(), ys.ravel())
+    points = points[shapely.contains(boundary_metric, points)]
+
+    coords = shapely.get_coordinates(to_wgs84(shapely.multipoints(points))) if len(points) else np.empty((0, 2))
+    return [{'name': f"Raster {index + 1}", 'lon': float(lon), 'lat': float(lat)}
+            for index, (lon, lat) in enumerate(coords)]
+
+
+def load_candidates(path):
+    """
+    Kandidaten-Standorte aus CSV (name, lat, lon) oder GeoJSON-Punkten
+
+    :return: Liste von Kandidaten-Dicts (name, lon, lat)
+    """
+    candidates = []
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+        for index, feature in enumerate(features):
+            if not feature.get('geometry') or feature['geometry']['type'] != 'Point':
+                continue
+            lon, lat = feature['geometry']['coordinates'][:2]
+            name = (feature.get('properties') or {}).get('name') or f"Kandidat {index + 1}"
+            candidates.append({'name': name, 'lon': float(lon), 'lat': float(lat)})
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for index, row in enumerate(csv.DictReader(f)):
+                candidates.append({'name': row.get('name') or f"Kandidat {index + 1}",
+                                   'lon': float(row['lon']), 'lat': float(row['lat'])})
+    return candidates
+
+
+def coverage_index(polygons, demand):
+    """
+    Welche Nachfrage-Punkte liegen in welcher Isochrone (CSR-Struktur)
+
+    :param polygons: Liste von shapely-Flächen oder None
+    :param demand: PopulationPoints
+    :return: (ptr, cells): Zellen von Fläche i sind cells[ptr[i]:ptr[i + 1]]
+    """
+    valid = [index for index, polygon in enumerate(polygons) if polygon is not None]
+    tree = shapely.STRtree(shapely.points(demand.xs, demand.ys))
+
+    if valid:
+        polygon_index, cells = tree.query(np.asarray([polygons[index] for index in valid], dtype=object),
+                                          predicate='contains')
+        sites = np.asarray(valid)[polygon_index]
+        order = np.lexsort((cells, sites))
+        sites, cells = sites[order], cells[order]
+    else:
+        sites = cells = np.empty(0, dtype=np.intp)
+
+    ptr = np.searchsorted(sites, np.arange(len(polygons) + 1))
+    return ptr, cells
+
+
+def _ranges(starts, ends):
+    """Indizes aller Bereiche starts[i]:ends[i] als ein Array"""
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def greedy_select(site_ptr, site_cells, weights, base_counts, score_table, k):
+    """
+    Wähle k Standorte mit dem größten Zuwachs des gewichteten Scores
+
+    Die Zuwächse liegen in einer Prioritäts-Queue. Nach jeder Wahl ändern
+    sich nur die Zellen im Einzugsgebiet des gewählten Standorts; nur
+    Kandidaten, die eine dieser Zellen erreichen, werden neu bewertet.
+    Veraltete Queue-Einträge werden über eine Versionsnummer verworfen.
+
+    :param site_ptr, site_cells: Einzugsgebiete (coverage_index)
+    :param weights: Gewicht (Einwohner) pro Zelle
+    :param base_counts: Anzahl bereits erreichbarer Einrichtungen pro Zelle
+    :param score_table: Score für 0..n erreichbare Einrichtungen (Sättigung bei n)
+    :param k: Anzahl zu wählender Standorte
+    :return: Liste von (Kandidaten-Index, Zuwachs der gewichteten Score-Summe)
+    """
+    score_table = np.asarray(score_table, dtype=float)
+    saturation = len(score_table) - 1
+    delta = np.append(np.diff(score_table), 0.0)
+
+    weights = np.asarray(weights, dtype=float)
+    counts = np.minimum(np.asarray(base_counts, dtype=np.intp), saturation)
+    n_sites = len(site_ptr) - 1
+
+    # Umkehrindex: Kandidaten, die eine Zelle erreichen
+    site_of_entry = np.repeat(np.arange(n_sites), np.diff(site_ptr))
+    order = np.argsort(site_cells, kind='stable')
+    cell_sites = site_of_entry[order]
+    cell_ptr = np.searchsorted(site_cells[order], np.arange(len(weights) + 1))
+
+    def gain(site):
+        cells = site_cells[site_ptr[site]:site_ptr[site + 1]]
+        return float(np.dot(weights[cells], delta[counts[cells]]))
+
+    version = np.zeros(n_sites, dtype=np.intp)
+    chosen = np.zeros(n_sites, dtype=bool)
+    heap = [(-gain(site), site, 0) for site in range(n_sites)]
+    heapq.heapify(heap)
+
+    selected = []
+    while heap and len(selected) < k:
+        negative_gain, site, site_version = heapq.heappop(heap)
+        if chosen[site] or site_version != version[site]:
+            continue
+
+        chosen[site] = True
+        selected.append((site, -negative_gain))
+
+        cells = site_cells[site_ptr[site]:site_ptr[site + 1]]
+        counts[cells] = np.minimum(counts[cells] + 1, saturation)
+
+        affected = np.unique(cell_sites[_ranges(cell_ptr[cells], cell_ptr[cells + 1])])
+        for other in affected:
+            if chosen[other]:
+                continue
+            version[other] += 1
+            heapq.heappush(heap, (-gain(other), other, version[other]))
+
+    return selected
+
+
+class SiteSelectionOptimizer:
+    """
+    Wo erhöht eine neue Einrichtung den einwohnergewichteten Score am meisten?
+
+    Für jede Nachfrage-Zelle zählt, wie viele Einrichtungen eines
+    Service-Typs innerhalb der Gehzeit erreichbar sind; der Score folgt
+    WalkabilityAnalyzer.score_service_count. Erreichbarkeit wird über die
+    Isochronen der bestehenden POIs und der Kandidaten bestimmt.
+    """
+
+    def __init__(self, gap_analyzer=None):
+        self.gap_analyzer = gap_analyzer or CoverageGapAnalyzer()
+
+    def optimize(self, candidates, demand, service_type, time_limit, k, existing_pois=None):
+        """
+        :param candidates: Liste von Kandidaten-Dicts (name, lon, lat)
+        :param demand: PopulationPoints (population_data.load_population)
+        :param service_type: Service-Typ aus SERVICE_CATEGORIES
+        :param time_limit: Gehzeit in Minuten
+        :param k: Anzahl zu wählender Standorte
+        :param existing_pois: Bestehende POIs; Standard: Abfrage über Overpass
+        :return: Dict mit 'base_score', 'final_score' und 'ranking' (Liste
+            mit rank, name, lon, lat, marginal_gain, score); 'missing_isochrones'
+            listet bestehende POIs und Kandidaten ohne Isochrone
+        """
+        min_count = SERVICE_CATEGORIES[service_type]['min_count']
+        score_table = [WalkabilityAnalyzer.score_service_count(count, min_count) for count in range(min_count + 1)]
+
+        total_population = float(demand.population.sum())
+        if total_population <= 0:
+            raise ValueError("Nachfrage-Daten enthalten keine Einwohner")
+
+        if existing_pois is None:
+            area = shapely.box(demand.xs.min(), demand.ys.min(), demand.xs.max(), demand.ys.max())
+            existing_pois = self.gap_analyzer.fetch_service_pois(area, time_limit, [service_type]).get(service_type, [])
+
+        # Bestehende Versorgung pro Zelle
+        existing_polygons, missing = self.gap_analyzer.poi_isochrones(existing_pois, time_limit)
+        _, existing_cells = coverage_index(existing_polygons, demand)
+        base_counts = np.bincount(existing_cells, minlength=len(demand.xs))
+
+        # Einzugsgebiete der Kandidaten
+        candidate_polygons = self.gap_analyzer.location_isochrones(
+            [[candidate['lon'], candidate['lat']] for candidate in candidates], time_limit)
+        site_ptr, site_cells = coverage_index(candidate_polygons, demand)
+
+        # Ohne Isochrone zählt ein POI nicht zur Versorgung und ein Kandidat wird nie gewählt
+        missing_isochrones = [missing_poi_entry(poi, service_type) for poi in missing]
+        missing_isochrones.extend(
+            {'name': candidate['name'], 'lon': candidate['lon'], 'lat': candidate['lat'], 'candidate': True}
+            for candidate, polygon in zip(candidates, candidate_polygons) if polygon is None)
+        if missing_isochrones:
+            QgsMessageLog.logMessage(
+                f"Site selection {service_type}: no isochrone for {len(missing_isochrones)} POIs/candidates",
+                level=Qgis.Warning)
+
+        base_score = float(np.dot(demand.population, np.asarray(score_table)[np.minimum(base_counts, min_count)]))
+        base_score /= total_population
+
+        selected = greedy_select(site_ptr, site_cells, demand.population, base_counts, score_table, k)
+
+        ranking = []
+        score = base_score
+        for rank, (index, gain) in enumerate(selected, start=1):
+            marginal_gain = gain / total_population
+            score += marginal_gain
+            candidate = candidates[index]
+            ranking.append({
+                'rank': rank,
+                'name': candidate['name'],
+                'lon': candidate['lon'],
+                'lat': candidate['lat'],
+                'marginal_gain': round(marginal_gain, 3),
+                'score': round(score, 2)
+            })
+
+        QgsMessageLog.logMessage(
+            f"Site selection {service_type}: {len(candidates)} candidates, {len(existing_pois)} existing, "
+            f"score {base_score:.1f} -> {score:.1f} with {len(ranking)} new sites",
+            level=Qgis.Info)
+
+        return {
+            'service_type': service_type,
+            'time_limit': time_limit,
+            'base_score': round(base_score, 2),
+            'final_score': round(score, 2),
+            'ranking': ranking,
+            'missing_isochrones': missing_isochrones
+        }
+
+
+RANKING_FIELDS = ['rank', 'name', 'lat', 'lon', 'marginal_gain', 'score']
+
+
+def write_ranking_csv(path, ranking):
+    """Rangliste der gewählten Standorte als CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RANKING_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(ranking)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='site_selection', description='Standortwahl: wo erhöht eine neue Einrichtung den Score am meisten?')
+    parser.add_argument('population', help='Einwohner als CSV (lat, lon, population) oder GeoJSON')
+    parser.add_argument('output', help='Rangliste der gewählten Standorte (CSV)')
+    parser.add_argument('--service', required=True, help='Service-Typ, z.B. "Apotheke"')
+    candidates_group = parser.add_mutually_exclusive_group(required=True)
+    candidates_group.add_argument('--candidates', help='Kandidaten als CSV (name, lat, lon) oder GeoJSON-Punkte')
+    candidates_group.add_argument('--grid-spacing', type=float, help='Kandidaten-Raster mit dieser Weite in Metern')
+    parser.add_argument('--boundary', help='Fläche (GeoJSON) für das Kandidaten-Raster')
+    parser.add_argument('--time-limit', type=int, default=15, help='Gehzeit in Minuten (Standard: 15)')
+    parser.add_argument('-k', type=int, default=3, help='Anzahl neuer Standorte (Standard: 3)')
+    args = parser.parse_args(argv)
+
+    from .population_data import load_population
+
+    if args.service not in SERVICE_CATEGORIES:
+        sys.stderr.write(f"Unbekannter Service-Typ: {args.service}\n")
+        return 2
+    if args.grid_spacing is not None and not args.boundary:
+        sys.stderr.write("--grid-spacing benötigt --boundary\n")
+        return 2
+
+    try:
+        demand = load_population(args.population)
+        if args.candidates:
+            candidates = load_candidates(args.candidates)
+        else:
+            candidates = candidate_grid(load_boundary(args.boundary), args.grid_spacing)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"Eingabe konnte nicht gelesen werden: {str(e)}\n")
+        return 2
+    if not candidates:
+        sys.stderr.write("Keine Kandidaten-Standorte\n")
+        return 2
+
+    try:
+        result = SiteSelectionOptimizer().optimize(candidates, demand, args.service, args.time_limit, args.k)
+    except ValueError as e:
+        sys.stderr.write(f"{str(e)}\n")
+        return 2
+
+    write_ranking_csv(args.output, result['ranking'])
+
+    sys.stderr.write(f"Score {result['base_score']} -> {result['final_score']} "
+                     f"mit {len(result['ranking'])} neuen Standorten\n")
+    if result['missing_isochrones']:
+        sys.stderr.write(f"{len(result['missing_isochrones'])} POIs/Kandidaten ohne Isochrone, "
+                         f"Rangliste unvollständig\n")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
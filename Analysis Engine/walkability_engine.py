@@ -1,88 +1,206 @@
 # walkability_engine.py - Hauptanalysefunktionalität
 
 import json
-from qgis.core import (
-    QgsVectorLayer, QgsFeature, QgsGeometry, QgsProject, 
-    QgsSymbol, QgsRendererRange, QgsGraduatedSymbolRenderer,
-    QgsSimpleMarkerSymbolLayer, QgsMarkerSymbol, QgsCategorizedSymbolRenderer,
-    QgsRendererCategory, QgsMessageLog, Qgis, QgsFillSymbol
-)
-from qgis.PyQt.QtCore import QVariant
-from qgis.PyQt.QtGui import QColor
+import numpy as np
+try:
+    from qgis.core import (
+        QgsVectorLayer, QgsFeature, QgsGeometry, QgsProject, 
+        QgsSymbol, QgsRendererRange, QgsGraduatedSymbolRenderer,
+        QgsSimpleMarkerSymbolLayer, QgsMarkerSymbol, QgsCategorizedSymbolRenderer,
+        QgsRendererCategory, QgsFillSymbol, QgsField, QgsPointXY
+    )
+    from qgis.PyQt.QtCore import QVariant
+    from qgis.PyQt.QtGui import QColor
+    from .layer_styles import get_layer_style_cache
+except ImportError:
+    # Headless-Betrieb ohne QGIS: Analyse ohne Layer (create_layers=False)
+    pass
 
-from .ors_client import ORSClient
+from .qgis_compat import QgsMessageLog, Qgis, QGIS_AVAILABLE
+from .ors_client import ORSClient, select_isochrone_ring
 from .overpass_client import OverpassClient
+from .result_cache import get_result_cache, ring_minutes_for, MAX_RINGS
+from .geometry_utils import assign_smallest_ring
+from .opening_hours import filter_open_pois, open_matrix, week_minute, MINUTES_PER_WEEK
 from .config import MUENSTER_DISTRICTS, SERVICE_CATEGORIES
 
+# Abstand der Ringe für den Score-Verlauf in Minuten
+TIME_CURVE_STEP = 2
+
 class WalkabilityAnalyzer:
     """Hauptklasse für Walkability-Analyse"""
     
     def __init__(self):
         self.ors_client = ORSClient()
         self.overpass_client = OverpassClient()
+        self.result_cache = get_result_cache()
     
-    def analyze_district(self, district_name, time_limit, service_types):
+    def analyze_district(self, district_name, time_limit, service_types, use_cache=True):
         """
         Führe vollständige Walkability-Analyse für einen Stadtteil durch
         
         :param district_name: Name des Stadtteils
         :param time_limit: Maximale Gehzeit in Minuten
         :param service_types: Liste der zu analysierenden Service-Typen
+        :param use_cache: Ergebnisse früherer Analysen wiederverwenden
+        :return: Analyse-Ergebnisse
+        """
+        
+        # Koordinaten des Stadtteils abrufen
+        if district_name not in MUENSTER_DISTRICTS:
+            QgsMessageLog.logMessage(f"Analysis error: Stadtteil '{district_name}' nicht gefunden", level=Qgis.Critical)
+            raise ValueError(f"Stadtteil '{district_name}' nicht gefunden")
+        
+        lat, lon = MUENSTER_DISTRICTS[district_name]
+        coordinates = [lon, lat]  # ORS erwartet [lon, lat]
+        
+        result = self.analyze_custom_location(district_name, coordinates, time_limit, service_types, use_cache)
+        result['district'] = district_name
+        return result
+    
+    def analyze_custom_location(self, location_name, coordinates, time_limit, service_types, use_cache=True, create_layers=True,
+                                at_time=None):
+        """
+        Führe vollständige Walkability-Analyse für beliebige Koordinaten durch
+        
+        :param location_name: Anzeigename des Standorts
+        :param coordinates: [lon, lat]
+        :param time_limit: Maximale Gehzeit in Minuten
+        :param service_types: Liste der zu analysierenden Service-Typen
+        :param use_cache: Ergebnisse früherer Analysen wiederverwenden
+        :param create_layers: QGIS-Layer für das Ergebnis erstellen
+        :param at_time: Optionaler Zeitpunkt (datetime); nur dann geöffnete POIs zählen
         :return: Analyse-Ergebnisse
         """
         
         try:
-            # Koordinaten des Stadtteils abrufen
-            if district_name not in MUENSTER_DISTRICTS:
-                raise ValueError(f"Stadtteil '{district_name}' nicht gefunden")
-            
-            lat, lon = MUENSTER_DISTRICTS[district_name]
-            coordinates = [lon, lat]  # ORS erwartet [lon, lat]
-            
-            QgsMessageLog.logMessage(f"Analyzing {district_name} at {lat}, {lon}", level=Qgis.Info)
+            QgsMessageLog.logMessage(f"Analyzing {location_name} at {coordinates[1]}, {coordinates[0]}", level=Qgis.Info)
             
             # 1. Isochrone berechnen
-            isochrone_data = self.ors_client.get_isochrone(coordinates, time_limit)
-            
-            if not isochrone_data:
-                raise Exception("Konnte keine Isochrone berechnen")
+            isochrone_data = self.fetch_isochrone(coordinates, time_limit, use_cache)
             
             # 2. POIs in Isochrone finden
-            pois_data = self.overpass_client.get_pois_in_area(isochrone_data, service_types)
-            
-            # 3. Score berechnen
-            score_data = self.calculate_walkability_score(pois_data, service_types)
+            pois_data = self.fetch_pois(coordinates, time_limit, service_types, isochrone_data, use_cache)
             
-            # 4. QGIS-Layer erstellen
-            layers = self.create_qgis_layers(district_name, isochrone_data, pois_data, coordinates)
-            
-            # 5. Ergebnisse zusammenstellen
-            result = {
-                'district': district_name,
-                'coordinates': coordinates,
-                'time_limit': time_limit,
-                'service_types': service_types,
-                'isochrone': isochrone_data,
-                'services': pois_data,
-                'score': score_data,
-                'layers': layers
-            }
-            
-            return result
+            # 3. Score berechnen, Layer erstellen und Ergebnis zusammenstellen
+            return self.build_result(location_name, coordinates, time_limit, service_types,
+                                     isochrone_data, pois_data, create_layers, at_time)
             
         except Exception as e:
             QgsMessageLog.logMessage(f"Analysis error: {str(e)}", level=Qgis.Critical)
             raise
     
-    def calculate_walkability_score(self, pois_data, service_types):
+    def fetch_isochrone(self, coordinates, time_limit, use_cache=True):
+        """
+        Analyse-Schritt 1: Isochrone berechnen (ORS)
+        
+        :return: GeoJSON der Isochrone
+        """
+        if use_cache:
+            isochrone_data = self.get_cached_isochrone(coordinates, time_limit)
+        else:
+            isochrone_data = self.ors_client.get_isochrone(coordinates, time_limit)
+        
+        if not isochrone_data:
+            raise Exception("Konnte keine Isochrone berechnen")
+        
+        return isochrone_data
+    
+    def fetch_pois(self, coordinates, time_limit, service_types, isochrone_data, use_cache=True):
+        """
+        Analyse-Schritt 2: POIs in der Isochrone finden (Overpass)
+        
+        :return: Dictionary mit POIs pro Service-Typ
+        """
+        if use_cache:
+            return self.get_cached_pois(coordinates, time_limit, service_types)
+        return self.overpass_client.get_pois_in_area(isochrone_data, service_types)
+    
+    def build_result(self, location_name, coordinates, time_limit, service_types,
+                     isochrone_data, pois_data, create_layers=True, at_time=None):
+        """
+        Analyse-Schritt 3: Score berechnen und QGIS-Layer erstellen
+        
+        :return: Analyse-Ergebnisse
+        """
+        score_data = self.calculate_walkability_score(pois_data, service_types, at_time)
+        
+        layers = {}
+        if create_layers and QGIS_AVAILABLE:
+            layers = self.create_qgis_layers(location_name, isochrone_data, pois_data, coordinates)
+        
+        return {
+            'location_name': location_name,
+            'coordinates': coordinates,
+            'time_limit': time_limit,
+            'service_types': service_types,
+            'isochrone': isochrone_data,
+            'services': pois_data,
+            'score': score_data,
+            'at_time': at_time.isoformat(timespec='minutes') if at_time else None,
+            'layers': layers
+        }
+    
+    def get_cached_isochrone(self, coordinates, time_limit):
+        """
+        Hole Isochrone aus dem Cache oder frage alle Ringe bis time_limit an
+        
+        :return: GeoJSON mit genau einem Feature oder None
+        """
+        isochrone_data = self.result_cache.get_isochrone(coordinates, time_limit)
+        if isochrone_data:
+            QgsMessageLog.logMessage(f"Isochrone {time_limit}min from cache", level=Qgis.Info)
+            return isochrone_data
+        
+        rings_data = self.ors_client.get_isochrone_rings(coordinates, ring_minutes_for(time_limit))
+        if not rings_data:
+            return None
+        
+        self.result_cache.store_isochrone(coordinates, rings_data)
+        return select_isochrone_ring(rings_data, time_limit)
+    
+    def get_cached_pois(self, coordinates, time_limit, service_types):
+        """
+        Hole POIs aus dem Cache und frage nur fehlende Service-Typen ab
+        
+        Fehlende Service-Typen werden für die größte bekannte Isochrone
+        abgefragt, damit spätere Analysen mit längerer Gehzeit sie ebenfalls
+        wiederverwenden können.
+        
+        :return: Dictionary mit POIs pro Service-Typ
+        """
+        pois_data, missing = self.result_cache.get_pois(coordinates, time_limit, service_types)
+        
+        if not missing:
+            QgsMessageLog.logMessage("POIs from cache", level=Qgis.Info)
+            return {service_type: pois_data[service_type] for service_type in service_types}
+        
+        QgsMessageLog.logMessage(f"Fetching POIs for: {', '.join(missing)}", level=Qgis.Info)
+        
+        fetch_minutes = max(time_limit, self.result_cache.largest_ring(coordinates) or time_limit)
+        fetch_area = self.result_cache.get_isochrone(coordinates, fetch_minutes)
+        fetched = self.overpass_client.get_pois_in_area(fetch_area, missing) if fetch_area else {}
+        
+        if fetched:
+            self.result_cache.store_pois(coordinates, fetch_minutes, fetched)
+            cached, _ = self.result_cache.get_pois(coordinates, time_limit, missing)
+            pois_data.update(cached)
+        
+        return {service_type: pois_data.get(service_type, []) for service_type in service_types}
+    
+    def calculate_walkability_score(self, pois_data, service_types, at_time=None):
         """
         Berechne Walkability-Score basierend auf verfügbaren Services
         
         :param pois_data: Dictionary mit POIs pro Service-Typ
         :param service_types: Liste der analysierten Service-Typen
+        :param at_time: Optionaler Zeitpunkt (datetime); nur geöffnete POIs zählen
         :return: Score-Daten
         """
         
+        # POIs mit opening_hours, die zum Zeitpunkt geschlossen sind, nicht zählen
+        open_pois = filter_open_pois(pois_data, at_time) if at_time else pois_data
+        
         service_scores = {}
         total_weighted_score = 0.0
         total_weight = 0.0
@@ -95,26 +213,19 @@ class WalkabilityAnalyzer:
                 min_count = config['min_count']
                 
                 # Anzahl gefundener Services
-                found_count = len(pois_data.get(service_type, []))
+                found_count = len(open_pois.get(service_type, []))
                 total_services += found_count
                 
                 # Score berechnen (0-100)
-                if found_count == 0:
-                    raw_score = 0.0
-                elif found_count >= min_count:
-                    # Vollpunktzahl wenn Minimum erreicht, Bonus für mehr
-                    raw_score = 100.0 + min(50.0, (found_count - min_count) * 10)
-                    raw_score = min(100.0, raw_score)  # Maximal 100
-                else:
-                    # Teilpunktzahl wenn unter Minimum
-                    raw_score = (found_count / min_count) * 70.0  # Max 70% wenn unter Minimum
+                raw_score = self.score_service_count(found_count, min_count)
                 
                 service_scores[service_type] = {
                     'count': found_count,
                     'min_count': min_count,
                     'raw_score': raw_score,
                     'weight': weight,
-                    'weighted_score': raw_score * weight
+                    'weighted_score': raw_score * weight,
+                    'closed_count': len(pois_data.get(service_type, [])) - found_count
                 }
                 
                 total_weighted_score += raw_score * weight
@@ -133,6 +244,223 @@ class WalkabilityAnalyzer:
             'total_weight': total_weight
         }
     
+    def calculate_weekly_scores(self, pois_data, service_types, step_minutes=60):
+        """
+        Score für jeden Zeitpunkt einer Woche (z.B. 168 Stunden) unter
+        Berücksichtigung der Öffnungszeiten
+        
+        :param pois_data: Dictionary mit POIs pro Service-Typ
+        :param service_types: Liste der analysierten Service-Typen
+        :param step_minutes: Abstand der Zeitpunkte
+        :return: Wochenminuten (Montag 00:00 = 0), Gesamt-Scores und offene
+            POIs pro Service-Typ und Zeitpunkt
+        """
+        slots = np.arange(0, MINUTES_PER_WEEK, step_minutes)
+        weighted_totals = np.zeros(len(slots))
+        total_weight = 0.0
+        counts = {}
+        
+        for service_type in service_types:
+            if service_type not in SERVICE_CATEGORIES:
+                continue
+            
+            config = SERVICE_CATEGORIES[service_type]
+            open_counts = open_matrix(pois_data.get(service_type, []), slots).sum(axis=0)
+            
+            # Score-Tabelle bis zur Sättigung bei min_count, dann nachschlagen
+            score_table = np.array([self.score_service_count(count, config['min_count'])
+                                    for count in range(config['min_count'] + 1)])
+            raw_scores = score_table[np.minimum(open_counts, config['min_count'])]
+            
+            counts[service_type] = open_counts.tolist()
+            weighted_totals += raw_scores * config['weight']
+            total_weight += config['weight']
+        
+        total_scores = weighted_totals / total_weight if total_weight > 0 else np.zeros(len(slots))
+        
+        return {
+            'week_minutes': slots.tolist(),
+            'total_scores': total_scores.tolist(),
+            'open_counts': counts
+        }
+    
+    @staticmethod
+    def score_service_count(found_count, min_count):
+        """
+        Score (0-100) eines Service-Typs aus der Anzahl gefundener POIs
+        
+        :param found_count: Anzahl gefundener Services
+        :param min_count: Geforderte Mindestanzahl
+        :return: Score
+        """
+        if found_count == 0:
+            return 0.0
+        elif found_count >= min_count:
+            # Vollpunktzahl wenn Minimum erreicht, Bonus für mehr
+            raw_score = 100.0 + min(50.0, (found_count - min_count) * 10)
+            return min(100.0, raw_score)  # Maximal 100
+        else:
+            # Teilpunktzahl wenn unter Minimum
+            return (found_count / min_count) * 70.0  # Max 70% wenn unter Minimum
+    
+    def analyze_time_curve(self, location_name, coordinates, time_limit, service_types, step=TIME_CURVE_STEP,
+                           create_layers=True, at_time=None):
+        """
+        Berechne den Walkability-Score in Abhängigkeit von der Gehzeit
+        
+        Alle Isochronen werden in einer ORS-Anfrage geholt, die POIs einmal
+        für die größte Isochrone. Jeder POI wird dem kleinsten Ring
+        zugeordnet, der ihn enthält.
+        
+        :param location_name: Anzeigename des Standorts
+        :param coordinates: [lon, lat]
+        :param time_limit: Maximale Gehzeit in Minuten
+        :param service_types: Liste der zu analysierenden Service-Typen
+        :param step: Abstand der Ringe in Minuten
+        :param create_layers: QGIS-Layer für das Ergebnis erstellen
+        :param at_time: Optionaler Zeitpunkt (datetime); nur dann geöffnete POIs zählen
+        :return: Analyse-Ergebnisse mit zusätzlichen Einträgen 'time_curve'
+            und 'isochrone_rings'
+        """
+        
+        try:
+            QgsMessageLog.logMessage(f"Time curve for {location_name}, {time_limit}min", level=Qgis.Info)
+            
+            # 1. Verschachtelte Isochronen in einer Anfrage
+            step = max(step, -(-time_limit // MAX_RINGS))
+            thresholds = list(range(step, time_limit, step)) + [time_limit]
+            
+            rings_data = self.ors_client.get_isochrone_rings(coordinates, thresholds)
+            if not rings_data:
+                raise Exception("Konnte keine Isochrone berechnen")
+            
+            self.result_cache.store_isochrone(coordinates, rings_data)
+            thresholds = [feature['properties']['time_minutes'] for feature in rings_data['features']]
+            time_limit = thresholds[-1]
+            
+            # 2. POIs einmal für den größten Ring
+            pois_data = self.get_cached_pois(coordinates, time_limit, service_types)
+            
+            # 3. Kleinsten enthaltenden Ring pro POI bestimmen
+            all_pois = [poi for service_type in service_types for poi in pois_data.get(service_type, [])]
+            rings = [feature['geometry'] for feature in rings_data['features']]
+            ring_index = assign_smallest_ring(
+                [poi['lon'] for poi in all_pois],
+                [poi['lat'] for poi in all_pois],
+                rings
+            )
+            
+            service_index = {}
+            offset = 0
+            for service_type in service_types:
+                count = len(pois_data.get(service_type, []))
+                service_index[service_type] = ring_index[offset:offset + count]
+                pois_data[service_type] = [
+                    dict(poi, walk_minutes=thresholds[index] if index >= 0 else None)
+                    for poi, index in zip(pois_data.get(service_type, []), service_index[service_type])
+                ]
+                offset += count
+            
+            if at_time:
+                # Geschlossene POIs bleiben im Ergebnis, zählen aber in keinem Ring
+                minute = week_minute(at_time)
+                for service_type in service_types:
+                    is_open = open_matrix(pois_data.get(service_type, []), [minute])[:, 0]
+                    service_index[service_type] = np.where(is_open, service_index[service_type], -1)
+            
+            # 4. Score pro Schwelle
+            time_curve = self.calculate_time_curve(service_index, thresholds, service_types)
+            
+            # 5. Ergebnis für die größte Isochrone inkl. aller Ringe als Layer
+            isochrone_data = select_isochrone_ring(rings_data, time_limit)
+            score_data = self.calculate_walkability_score(pois_data, service_types, at_time)
+            
+            layers = {}
+            if create_layers and QGIS_AVAILABLE:
+                layers = self.create_qgis_layers(location_name, rings_data, pois_data, coordinates)
+            
+            return {
+                'location_name': location_name,
+                'coordinates': coordinates,
+                'time_limit': time_limit,
+                'service_types': service_types,
+                'isochrone': isochrone_data,
+                'isochrone_rings': rings_data,
+                'services': pois_data,
+                'score': score_data,
+                'time_curve': time_curve,
+                'at_time': at_time.isoformat(timespec='minutes') if at_time else None,
+                'layers': layers
+            }
+            
+        except Exception as e:
+            QgsMessageLog.logMessage(f"Time curve error: {str(e)}", level=Qgis.Critical)
+            raise
+    
+    def calculate_time_curve(self, service_index, thresholds, service_types):
+        """
+        Berechne Scores für alle Gehzeit-Schwellen
+        
+        :param service_index: Ring-Index-Array pro Service-Typ (-1 = außerhalb)
+        :param thresholds: Aufsteigende Liste der Ring-Zeiten in Minuten
+        :param service_types: Liste der analysierten Service-Typen
+        :return: Score-Verlauf und minimale Gehzeit für volle Punktzahl
+        """
+        
+        counts = {}
+        service_curves = {}
+        full_score_minutes = {}
+        weighted_totals = np.zeros(len(thresholds))
+        total_weight = 0.0
+        
+        for service_type in service_types:
+            if service_type not in SERVICE_CATEGORIES:
+                continue
+            
+            config = SERVICE_CATEGORIES[service_type]
+            indices = service_index.get(service_type, np.empty(0, dtype=int))
+            
+            # Kumulierte Anzahl POIs bis einschließlich Ring i
+            per_ring = np.bincount(indices[indices >= 0], minlength=len(thresholds))
+            cumulative = np.cumsum(per_ring)
+            
+            raw_scores = [self.score_service_count(int(count), config['min_count']) for count in cumulative]
+            
+            counts[service_type] = cumulative.tolist()
+            service_curves[service_type] = raw_scores
+            full_score_minutes[service_type] = next(
+                (minutes for minutes, raw_score in zip(thresholds, raw_scores) if raw_score >= 100.0), None)
+            
+            weighted_totals += np.asarray(raw_scores) * config['weight']
+            total_weight += config['weight']
+        
+        total_scores = (weighted_totals / total_weight).tolist() if total_weight > 0 else [0.0] * len(thresholds)
+        
+        return {
+            'minutes': thresholds,
+            'total_scores': total_scores,
+            'service_scores': service_curves,
+            'counts': counts,
+            'full_score_minutes': full_score_minutes,
+            'total_full_score_minutes': next(
+                (minutes for minutes, score in zip(thresholds, total_scores) if score >= 100.0), None)
+        }
+    
+    def create_result_layers(self, result):
+        """
+        Erstelle QGIS-Layer für ein ohne Layer berechnetes Ergebnis
+        
+        :param result: Ergebnis aus analyze_custom_location / analyze_time_curve
+        :return: Dictionary mit erstellten Layern
+        """
+        isochrone_data = result.get('isochrone_rings') or result['isochrone']
+        return self.create_qgis_layers(result['location_name'], isochrone_data, result['services'], result['coordinates'])
+    
+    def abort(self):
+        """Breche laufende ORS- und Overpass-Anfragen ab"""
+        self.ors_client.abort()
+        self.overpass_client.abort()
+    
     def create_qgis_layers(self, district_name, isochrone_data, pois_data, center_coords):
         """
         Erstelle QGIS-Layer für Visualisierung
@@ -169,36 +497,59 @@ class WalkabilityAnalyzer:
             return {}
     
     def create_isochrone_layer(self, district_name, isochrone_data):
-        """Erstelle Isochrone-Layer"""
+        """
+        Erstelle Isochrone-Layer direkt als Memory-Layer
+        
+        Die ORS-Properties werden als typisierte Felder übernommen
+        (z.B. value, group_index, time_minutes), Listen als JSON-Text.
+        """
         
         try:
-            # Temporäre Datei für GeoJSON
-            import tempfile
-            import os
+            features_data = [feature for feature in isochrone_data.get('features', [])
+                             if feature.get('geometry')]
+            if not features_data:
+                QgsMessageLog.logMessage("Isochrone layer has no features", level=Qgis.Critical)
+                return None
             
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.geojson', delete=False)
-            json.dump(isochrone_data, temp_file, indent=2)
-            temp_file.close()
+            multi = any(feature['geometry']['type'] == 'MultiPolygon' for feature in features_data)
             
-            # Layer erstellen
             layer_name = f"Walkability_Isochrone_{district_name}"
-            layer = QgsVectorLayer(temp_file.name, layer_name, "ogr")
+            layer = QgsVectorLayer(f"{'MultiPolygon' if multi else 'Polygon'}?crs=EPSG:4326", layer_name, "memory")
+            
+            # Felder aus den ORS-Properties ableiten
+            field_types = {}
+            for feature in features_data:
+                for name, value in (feature.get('properties') or {}).items():
+                    if value is None:
+                        continue
+                    field_type = isochrone_field_type(value)
+                    # Ganzzahl-Feld zu Double erweitern, wenn ein Ring Nachkommastellen hat
+                    if name not in field_types or (field_types[name] == QVariant.LongLong and field_type == QVariant.Double):
+                        field_types[name] = field_type
+            
+            field_names = list(field_types)
+            layer.dataProvider().addAttributes([QgsField(name, field_types[name]) for name in field_names])
+            layer.updateFields()
             
-            if not layer.isValid():
-                QgsMessageLog.logMessage("Isochrone layer is invalid", level=Qgis.Critical)
-                os.unlink(temp_file.name)
-                return None
+            features = []
+            for feature_data in features_data:
+                geometry = geometry_from_geojson(feature_data['geometry'])
+                if geometry is None:
+                    continue
+                if multi:
+                    geometry.convertToMultiType()
+                
+                properties = feature_data.get('properties') or {}
+                feature = QgsFeature(layer.fields())
+                feature.setGeometry(geometry)
+                feature.setAttributes([isochrone_field_value(properties.get(name)) for name in field_names])
+                features.append(feature)
             
-            # Styling
-            symbol = QgsFillSymbol.createSimple({
-                'color': '70,130,180,100',  # Semi-transparent blue
-                'outline_color': '30,80,120,255',
-                'outline_width': '2'
-            })
-            layer.renderer().setSymbol(symbol)
+            layer.dataProvider().addFeatures(features)
+            layer.updateExtents()
             
-            # Aufräumen
-            os.unlink(temp_file.name)
+            # Styling
+            self.style_isochrone_layer(layer)
             
             return layer
             
@@ -230,14 +581,7 @@ class WalkabilityAnalyzer:
             layer.updateExtents()
             
             # Styling
-            symbol = QgsMarkerSymbol.createSimple({
-                'name': 'star',
-                'color': 'red',
-                'size': '8',
-                'outline_color': 'black',
-                'outline_width': '1'
-            })
-            layer.renderer().setSymbol(symbol)
+            self.style_center_layer(layer)
             
             return layer
             
@@ -287,36 +631,45 @@ class WalkabilityAnalyzer:
             QgsMessageLog.logMessage(f"POI layer error: {str(e)}", level=Qgis.Critical)
             return None
     
-    def apply_poi_categorized_renderer(self, layer):
-        """Wende kategorisierte Symbolisierung auf POI-Layer an"""
+    def style_isochrone_layer(self, layer):
+        """Halbtransparente Füllung für Isochronen"""
+        layer.renderer().setSymbol(get_layer_style_cache().isochrone_symbol())
+    
+    def style_center_layer(self, layer):
+        """Roter Stern für den Standort"""
+        layer.renderer().setSymbol(get_layer_style_cache().center_symbol())
+    
+    def style_layer(self, key, layer):
+        """Styling nach Layer-Art ('isochrone', 'center', 'pois')"""
+        if key == 'isochrone':
+            self.style_isochrone_layer(layer)
+        elif key == 'center':
+            self.style_center_layer(layer)
+        elif key == 'pois':
+            self.apply_poi_categorized_renderer(layer)
+    
+    def store_result_layers(self, result, store):
+        """
+        Ergebnis im GeoPackage-Store speichern statt Memory-Layer zu erstellen
         
+        :param result: Ergebnis aus analyze_custom_location / analyze_time_curve
+        :param store: AnalysisLayerStore
+        :return: Dictionary mit den auf diesen Lauf gefilterten Store-Layern
+        """
         try:
-            # Service-Typ Farben
-            colors = {
-                'Supermarkt': QColor(34, 139, 34),    # Forest Green
-                'Apotheke': QColor(220, 20, 60),      # Crimson Red
-                'Arzt': QColor(65, 105, 225),         # Royal Blue
-                'Schule': QColor(255, 140, 0),        # Dark Orange
-                'Restaurant': QColor(138, 43, 226),    # Blue Violet
-                'Bank': QColor(184, 134, 11)          # Dark Goldenrod
-            }
+            run_id = store.append_run(result)
+            result['run_id'] = run_id
+            return store.project_layers(run_id, result['location_name'], style_callback=self.style_layer)
             
-            # Kategorien erstellen
-            categories = []
-            for service_type, color in colors.items():
-                symbol = QgsMarkerSymbol.createSimple({
-                    'name': 'circle',
-                    'color': color.name(),
-                    'size': '6',
-                    'outline_color': 'black',
-                    'outline_width': '0.5'
-                })
-                category = QgsRendererCategory(service_type, symbol, service_type)
-                categories.append(category)
-            
-            # Renderer erstellen und anwenden
-            renderer = QgsCategorizedSymbolRenderer('service_type', categories)
-            layer.setRenderer(renderer)
+        except Exception as e:
+            QgsMessageLog.logMessage(f"Layer store error: {str(e)}", level=Qgis.Critical)
+            return {}
+    
+    def apply_poi_categorized_renderer(self, layer):
+        """Wende kategorisierte Symbolisierung auf POI-Layer an (Farben aus SERVICE_CATEGORIES)"""
+        
+        try:
+            layer.setRenderer(get_layer_style_cache().poi_renderer())
             
         except Exception as e:
             QgsMessageLog.logMessage(f"POI renderer error: {str(e)}", level=Qgis.Warning)
@@ -333,6 +686,10 @@ class WalkabilityAnalyzer:
             for layer_key in layer_order:
                 if layer_key in layers:
                     layer = layers[layer_key]
+                    # Store-Layer sind nach dem ersten Lauf schon im Projekt
+                    if project.mapLayer(layer.id()):
+                        layer.triggerRepaint()
+                        continue
                     project.addMapLayer(layer)
                     QgsMessageLog.logMessage(f"Added layer: {layer.name()}", level=Qgis.Info)
             
@@ -348,6 +705,41 @@ class WalkabilityAnalyzer:
             QgsMessageLog.logMessage(f"Add layers error: {str(e)}", level=Qgis.Critical)
 
 
+def isochrone_field_type(value):
+    """QVariant-Typ für einen ORS-Property-Wert"""
+    if isinstance(value, bool):
+        return QVariant.Bool
+    if isinstance(value, int):
+        return QVariant.LongLong
+    if isinstance(value, float):
+        return QVariant.Double
+    return QVariant.String
+
+
+def isochrone_field_value(value):
+    """Listen und Dicts (z.B. 'center') als JSON-Text speichern"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+def geometry_from_geojson(geometry):
+    """
+    QgsGeometry aus einer geparsten GeoJSON-Geometrie (Polygon, MultiPolygon)
+    
+    :return: QgsGeometry oder None bei anderen Geometrietypen
+    """
+    def ring_points(ring):
+        return [QgsPointXY(x, y) for x, y, *_ in ring]
+    
+    if geometry['type'] == 'Polygon':
+        return QgsGeometry.fromPolygonXY([ring_points(ring) for ring in geometry['coordinates']])
+    if geometry['type'] == 'MultiPolygon':
+        return QgsGeometry.fromMultiPolygonXY(
+            [[ring_points(ring) for ring in polygon] for polygon in geometry['coordinates']])
+    return None
+
+
 # Factory-Funktion für den Dialog
 def get_walkability_analyzer():
     """Factory-Funktion für WalkabilityAnalyzer"""
@@ -0,0 +1,301 @@
+# weight_sensitivity.py - Monte-Carlo-Sensitivität der Service-Gewichte
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .config import SERVICE_CATEGORIES
+
+# Streuung der Dirichlet-Stichproben: größer = näher an den konfigurierten Gewichten
+DEFAULT_CONCENTRATION = 50.0
+DEFAULT_SAMPLES = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = (5, 95)
+DEFAULT_TOP_K = 10
+
+# Auflösung der Score-Histogramme (0.1 Punkte) und maximale Anzahl Rang-Klassen
+SCORE_BINS = 1001
+MAX_RANK_BINS = 1000
+
+
+def score_matrix(results, service_types=None):
+    """
+    Rohe Service-Scores vieler Standorte als Matrix
+
+    :param results: Iterable von Analyse-Ergebnissen (z.B.
+        CheckpointStore.iter_results oder analyze_custom_location)
+    :param service_types: Spalten; Standard: alle gewichteten Service-Typen
+        aus SERVICE_CATEGORIES
+    :return: (Standort-Namen, Service-Typen, Scores (Standorte x Services),
+        Maske der analysierten Services)
+    """
+    service_types = list(service_types or SERVICE_CATEGORIES)
+    column = {service_type: index for index, service_type in enumerate(service_types)}
+
+    names, rows, masks = [], [], []
+    for result in results:
+        raw = np.zeros(len(service_types))
+        analyzed = np.zeros(len(service_types), dtype=bool)
+        for service_type, data in result['score']['service_scores'].items():
+            if service_type in column:
+                raw[column[service_type]] = data['raw_score']
+                analyzed[column[service_type]] = True
+        if not analyzed.any():
+            continue
+        names.append(result['location_name'])
+        rows.append(raw)
+        masks.append(analyzed)
+
+    return (names, service_types,
+            np.asarray(rows, dtype=float).reshape(-1, len(service_types)),
+            np.asarray(masks, dtype=bool).reshape(-1, len(service_types)))
+
+
+def _ranks(scores):
+    """Rang (0 = bester) jeder Zeile pro Spalte; Gleichstand nach Reihenfolge"""
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[0])[:, None], axis=0)
+    return ranks
+
+
+def _histogram_percentiles(histograms, percentiles, bin_values):
+    """Perzentile aus Histogrammen (eine Zeile pro Standort)"""
+    cumulative = np.cumsum(histograms, axis=1)
+    targets = np.asarray(percentiles, dtype=float)[None, :] / 100.0 * cumulative[:, -1:]
+    positions = np.array([np.searchsorted(row, target) for row, target in zip(cumulative, targets)])
+    return bin_values[np.minimum(positions, len(bin_values) - 1)]
+
+
+class WeightSensitivityAnalysis:
+    """
+    Wie robust ist die Rangfolge der Standorte gegenüber den Gewichten?
+
+    Gewichtsvektoren werden aus einer Dirichlet-Verteilung um die
+    konfigurierten Gewichte gezogen. Der Gesamt-Score aller Standorte für
+    einen ganzen Block von Stichproben ist ein Matrixprodukt (Standorte x
+    Services) @ (Services x Stichproben), normiert mit der Summe der
+    Gewichte der jeweils analysierten Services. Pro Block werden nur
+    Histogramme und Summen fortgeschrieben, sodass der Speicherbedarf
+    unabhängig von der Anzahl der Stichproben ist.
+    """
+
+    def __init__(self, names, service_types, raw_scores, analyzed=None, weights=None,
+                 concentration=DEFAULT_CONCENTRATION):
+        """
+        :param names, service_types, raw_scores, analyzed: aus score_matrix
+        :param weights: Gewichte pro Service-Typ; Standard: SERVICE_CATEGORIES
+        :param concentration: Summe der Dirichlet-Parameter
+        """
+        self.names = list(names)
+        self.service_types = list(service_types)
+        self.raw_scores = np.asarray(raw_scores, dtype=float)
+        self.analyzed = (np.ones(self.raw_scores.shape, dtype=bool) if analyzed is None
+                         else np.asarray(analyzed, dtype=bool))
+
+        if weights is None:
+            weights = [SERVICE_CATEGORIES[service_type]['weight'] for service_type in self.service_types]
+        weights = np.asarray(weights, dtype=float)
+        if len(self.names) < 2:
+            raise ValueError("Mindestens zwei Standorte erforderlich")
+        if (weights <= 0).any():
+            raise ValueError("Alle Gewichte müssen positiv sein")
+
+        self.weights = weights / weights.sum()
+        self.alpha = self.weights * concentration
+
+    def scores(self, weight_samples):
+        """
+        Gesamt-Scores für mehrere Gewichtsvektoren
+
+        :param weight_samples: Array (Stichproben x Services)
+        :return: Array (Standorte x Stichproben)
+        """
+        weight_samples = np.atleast_2d(weight_samples).T
+        numerator = (self.raw_scores * self.analyzed) @ weight_samples
+        denominator = self.analyzed.astype(float) @ weight_samples
+        return numerator / denominator
+
+    def run(self, samples=DEFAULT_SAMPLES, batch_size=DEFAULT_BATCH_SIZE, interval=DEFAULT_INTERVAL,
+            top_k=DEFAULT_TOP_K, seed=None):
+        """
+        :param samples: Anzahl Gewichtsvektoren
+        :param batch_size: Stichproben pro Matrixprodukt
+        :param interval: Perzentile des Konfidenzintervalls
+        :param top_k: Für den Anteil der Stichproben, in denen ein Standort
+            unter den besten k liegt
+        :param seed: Startwert des Zufallsgenerators
+        :return: Dict mit 'locations' (eine Zeile pro Standort), 'drivers'
+            (Einfluss pro Service-Typ) und 'rank_stability'
+        """
+        rng = np.random.default_rng(seed)
+        n_locations, n_services = self.raw_scores.shape
+        rank_bin_width = -(-n_locations // MAX_RANK_BINS)
+        n_rank_bins = -(-n_locations // rank_bin_width)
+        location_offsets = np.arange(n_locations)[:, None]
+
+        base_scores = self.scores(self.weights)[:, 0]
+        base_ranks = _ranks(base_scores[:, None])[:, 0]
+
+        score_histograms = np.zeros(n_locations * SCORE_BINS, dtype=np.int64)
+        rank_histograms = np.zeros(n_locations * n_rank_bins, dtype=np.int64)
+        score_sum = np.zeros(n_locations)
+        top_k_count = np.zeros(n_locations, dtype=np.int64)
+
+        # Summen für die Korrelation zwischen Gewicht und Rang
+        weight_sum = np.zeros(n_services)
+        weight_square_sum = np.zeros(n_services)
+        rank_sum = np.zeros(n_locations)
+        rank_square_sum = np.zeros(n_locations)
+        cross_sum = np.zeros((n_services, n_locations))
+        spearman = []
+
+        done = 0
+        while done < samples:
+            size = min(batch_size, samples - done)
+            weight_samples = rng.dirichlet(self.alpha, size=size)
+
+            scores = self.scores(weight_samples)
+            ranks = _ranks(scores)
+
+            score_bins = np.clip(np.rint(scores * 10).astype(np.intp), 0, SCORE_BINS - 1)
+            score_histograms += np.bincount((location_offsets * SCORE_BINS + score_bins).ravel(),
+                                            minlength=len(score_histograms))
+            rank_histograms += np.bincount((location_offsets * n_rank_bins + ranks // rank_bin_width).ravel(),
+                                           minlength=len(rank_histograms))
+            score_sum += scores.sum(axis=1)
+            top_k_count += (ranks < top_k).sum(axis=1)
+
+            weight_sum += weight_samples.sum(axis=0)
+            weight_square_sum += (weight_samples ** 2).sum(axis=0)
+            rank_sum += ranks.sum(axis=1)
+            rank_square_sum += (ranks.astype(float) ** 2).sum(axis=1)
+            cross_sum += weight_samples.T @ ranks.T
+
+            rank_shift = (ranks - base_ranks[:, None]).astype(float)
+            spearman.append(1.0 - 6.0 * (rank_shift ** 2).sum(axis=0) / (n_locations * (n_locations ** 2 - 1)))
+            done += size
+
+        spearman = np.concatenate(spearman)
+
+        # Korrelation zwischen Gewicht jedes Service-Typs und Rang jedes Standorts
+        weight_var = weight_square_sum / samples - (weight_sum / samples) ** 2
+        rank_var = rank_square_sum / samples - (rank_sum / samples) ** 2
+        covariance = cross_sum / samples - np.outer(weight_sum / samples, rank_sum / samples)
+        # Konstanter Rang: Varianz nur Rundungsrest, keine Korrelation
+        rank_var[rank_var < 1e-9] = 0.0
+        denominator = np.sqrt(np.outer(np.maximum(weight_var, 0.0), rank_var))
+        correlation = np.divide(covariance, denominator, out=np.zeros_like(covariance), where=denominator > 0)
+
+        score_values = np.arange(SCORE_BINS) / 10.0
+        rank_values = np.arange(n_rank_bins) * rank_bin_width + 1
+        score_bounds = _histogram_percentiles(score_histograms.reshape(n_locations, SCORE_BINS),
+                                              interval, score_values)
+        rank_bounds = _histogram_percentiles(rank_histograms.reshape(n_locations, n_rank_bins),
+                                             (interval[0], 50, interval[1]), rank_values)
+
+        locations = []
+        for index, name in enumerate(self.names):
+            dominant = int(np.argmax(np.abs(correlation[:, index])))
+            locations.append({
+                'location_name': name,
+                'base_score': round(float(base_scores[index]), 2),
+                'base_rank': int(base_ranks[index]) + 1,
+                'mean_score': round(float(score_sum[index] / samples), 2),
+                'score_low': float(score_bounds[index, 0]),
+                'score_high': float(score_bounds[index, 1]),
+                'rank_median': int(rank_bounds[index, 1]),
+                'rank_low': int(rank_bounds[index, 0]),
+                'rank_high': int(rank_bounds[index, 2]),
+                f"top_{top_k}_share": round(float(top_k_count[index] / samples), 4),
+                'dominant_weight': self.service_types[dominant] if correlation[dominant, index] else None
+            })
+
+        drivers = sorted(({
+            'service_type': service_type,
+            'weight': round(float(self.weights[index]), 4),
+            'mean_abs_rank_correlation': round(float(np.abs(correlation[index]).mean()), 4)
+        } for index, service_type in enumerate(self.service_types)),
+            key=lambda row: row['mean_abs_rank_correlation'], reverse=True)
+
+        rank_stability = {
+            'spearman_mean': round(float(spearman.mean()), 4),
+            f"spearman_p{interval[0]}": round(float(np.percentile(spearman, interval[0])), 4),
+            'spearman_min': round(float(spearman.min()), 4)
+        }
+
+        QgsMessageLog.logMessage(
+            f"Weight sensitivity: {samples} samples, {n_locations} locations, "
+            f"Spearman mean {rank_stability['spearman_mean']:.3f}, "
+            f"strongest driver {drivers[0]['service_type']}",
+            level=Qgis.Info)
+
+        return {
+            'samples': samples,
+            'locations': locations,
+            'drivers': drivers,
+            'rank_stability': rank_stability
+        }
+
+
+def write_sensitivity_csv(path, sensitivity):
+    """Ergebnis pro Standort als CSV schreiben"""
+    rows = sensitivity['locations']
+    if not rows:
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='weight_sensitivity', description='Monte-Carlo-Sensitivität der Service-Gewichte')
+    parser.add_argument('checkpoint', help='Checkpoint-Datenbank eines Batch-Laufs (walkability_cli --checkpoint)')
+    parser.add_argument('output', help='Ergebnis pro Standort (CSV)')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                        help=f'Anzahl Gewichtsvektoren (Standard: {DEFAULT_SAMPLES})')
+    parser.add_argument('--concentration', type=float, default=DEFAULT_CONCENTRATION,
+                        help=f'Summe der Dirichlet-Parameter (Standard: {DEFAULT_CONCENTRATION:g})')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f'Anteil der Stichproben unter den besten k (Standard: {DEFAULT_TOP_K})')
+    parser.add_argument('--seed', type=int, help='Startwert des Zufallsgenerators')
+    args = parser.parse_args(argv)
+
+    from .checkpoint_store import CheckpointStore
+
+    if not os.path.exists(args.checkpoint):
+        sys.stderr.write(f"Checkpoint nicht gefunden: {args.checkpoint}\n")
+        return 2
+
+    store = CheckpointStore(args.checkpoint)
+    try:
+        matrix = score_matrix(store.iter_results())
+    finally:
+        store.close()
+
+    try:
+        analysis = WeightSensitivityAnalysis(*matrix, concentration=args.concentration)
+    except ValueError as e:
+        sys.stderr.write(f"{str(e)}\n")
+        return 2
+
+    sensitivity = analysis.run(samples=args.samples, top_k=args.top_k, seed=args.seed)
+    write_sensitivity_csv(args.output, sensitivity)
+
+    stability = sensitivity['rank_stability']
+    sys.stderr.write(f"{len(sensitivity['locations'])} Standorte, Spearman im Mittel "
+                     f"{stability['spearman_mean']}, Minimum {stability['spearman_min']}\n")
+    for driver in sensitivity['drivers'][:3]:
+        sys.stderr.write(f"  {driver['service_type']}: Gewicht {driver['weight']}, "
+                         f"Rang-Korrelation {driver['mean_abs_rank_correlation']}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
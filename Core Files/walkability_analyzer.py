@@ -28,6 +28,9 @@ class WalkabilityAnalyzer:
         self.menu = '&Walkability Analyzer'
         self.dlg = None
         self.dependencies_checked = False
+        # (alle_vorhanden, fehlende_pakete) aus Cache bzw. Hintergrund-Prüfung
+        self.dependency_result = None
+        self.dependency_task = None
         
         # Check if plugin was started the first time in current QGIS session
         # Must be set in initGui() to survive plugin reloads
@@ -126,6 +129,9 @@ class WalkabilityAnalyzer:
 
         # will be set False in run()
         self.first_start = True
+        
+        # Abhängigkeiten vorab prüfen, damit der erste Aufruf nicht wartet
+        self.start_dependency_check()
 
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
@@ -139,10 +145,36 @@ class WalkabilityAnalyzer:
         if self.dlg:
             self.dlg.close()
             self.dlg = None
+        
+        if self.dependency_task:
+            try:
+                self.dependency_task.checkFinished.disconnect(self.on_dependency_check_finished)
+            except (RuntimeError, TypeError):
+                # Task bereits vom Task-Manager gelöscht
+                pass
+            self.dependency_task = None
+
+    def start_dependency_check(self):
+        """Gespeichertes Prüfergebnis übernehmen oder Prüfung im Hintergrund starten"""
+        try:
+            from .dependency_checker import start_dependency_check
+            self.dependency_task = start_dependency_check(self.on_dependency_check_finished)
+        except Exception as e:
+            QgsMessageLog.logMessage(f"Background dependency check error: {str(e)}", level=Qgis.Warning)
+
+    def on_dependency_check_finished(self, dependencies_ok, missing):
+        self.dependency_result = (dependencies_ok, missing)
+        self.dependency_task = None
 
     def check_dependencies(self):
         """Prüfe Plugin-Abhängigkeiten"""
         try:
+            # Ergebnis liegt meist schon vor; fehlende Pakete werden erneut
+            # geprüft und der Installationsdialog angezeigt
+            if self.dependency_result and self.dependency_result[0]:
+                QgsMessageLog.logMessage("All dependencies satisfied", level=Qgis.Info)
+                return True
+            
             from .dependency_checker import check_plugin_dependencies
             dependencies_ok, missing = check_plugin_dependencies()
             
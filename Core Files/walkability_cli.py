@@ -0,0 +1,391 @@
+# walkability_cli.py - Batch-Analyse ohne QGIS-Oberfläche
+#
+# Aufruf aus dem Verzeichnis oberhalb des Plugin-Ordners:
+#   python -m walkability_analyzer.walkability_cli origins.csv --csv results.csv --gpkg results.gpkg
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+from .config import SERVICE_CATEGORIES
+from .qgis_compat import QGIS_AVAILABLE
+from .pdf_batch import REPORT_KEYS
+
+# Standard-Auswahl wie im Dialog
+DEFAULT_SERVICES = ["Supermarkt", "Apotheke", "Arzt", "Schule"]
+DEFAULT_TIME_LIMIT = 15
+
+# Fortschritt ohne Terminal nur alle N Standorte ausgeben
+LOG_PROGRESS_EVERY = 25
+
+
+def parse_services(value, default):
+    """Service-Liste aus 'Supermarkt;Apotheke' oder 'Supermarkt,Apotheke'"""
+    if not value:
+        return list(default)
+
+    services = [service.strip() for service in value.replace(',', ';').split(';') if service.strip()]
+    unknown = [service for service in services if service not in SERVICE_CATEGORIES]
+    if unknown:
+        raise ValueError(f"Unbekannte Service-Typen: {', '.join(unknown)}")
+    return services
+
+
+def read_origins(path, time_limit, services):
+    """
+    Lese Standorte aus CSV oder GeoJSON
+
+    CSV-Spalten: name, lat, lon und optional time_limit, services.
+    GeoJSON: Point-Features mit optionalen Properties name, time_limit, services.
+
+    :return: Liste von Origin-Dicts für PipelineExecutor
+    """
+    origins = []
+
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        for index, feature in enumerate(data.get('features', [])):
+            if not feature.get('geometry') or feature['geometry']['type'] != 'Point':
+                continue
+            properties = feature.get('properties') or {}
+            lon, lat = feature['geometry']['coordinates'][:2]
+            origins.append(_make_origin(properties, lat, lon, index, time_limit, services))
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for index, row in enumerate(csv.DictReader(f)):
+                origins.append(_make_origin(row, float(row['lat']), float(row['lon']), index, time_limit, services))
+
+    return origins
+
+
+def _make_origin(properties, lat, lon, index, time_limit, services):
+    return {
+        'index': index,
+        'location_name': properties.get('name') or f"Standort {index + 1}",
+        'coordinates': [float(lon), float(lat)],
+        'time_limit': int(properties.get('time_limit') or time_limit),
+        'service_types': parse_services(properties.get('services'), services)
+    }
+
+
+def address_key(row):
+    """Schlüssel einer Adresszeile im Checkpoint (normalisierte Adresse)"""
+    from .bulk_geocoding import row_address
+    from .geocoding import normalize_address
+    return normalize_address(row_address(row))
+
+
+def checkpoint_address_origins(checkpoint, rows, time_limit, services):
+    """
+    Origins für Adressen, die ein früherer Lauf bereits geokodiert hat
+
+    Zeilen mit unbekannter Adresse oder ungültigen Angaben werden nicht
+    übernommen, sondern wie gewohnt geokodiert bzw. verworfen.
+
+    :param checkpoint: CheckpointStore
+    :param rows: Zeilen aus bulk_geocoding.read_address_rows
+    :return: (Origins, Indizes der noch zu geokodierenden Zeilen)
+    """
+    from .bulk_geocoding import row_address
+
+    known = checkpoint.resolved_addresses()
+    origins, remaining = [], []
+    for index, row in enumerate(rows):
+        coordinates = known.get(address_key(row))
+        if coordinates is None:
+            remaining.append(index)
+            continue
+        properties = dict(row, name=row.get('name') or row_address(row))
+        try:
+            origins.append(_make_origin(properties, coordinates[1], coordinates[0], index, time_limit, services))
+        except ValueError:
+            remaining.append(index)
+    return origins, remaining
+
+
+def geocode_origins(rows, time_limit, services, reject_path, on_reject=None, row_indexes=None):
+    """
+    Geokodiere eine Adressliste und liefere Origins, sobald sie aufgelöst sind
+
+    Zeilen mit ungültiger Gehzeit oder unbekannten Services werden wie nicht
+    auflösbare Adressen in die Reject-CSV geschrieben.
+
+    :param rows: Zeilen aus bulk_geocoding.read_address_rows
+    :param on_reject: Optionale Funktion (Zeile, Begründung) je verworfener Zeile
+    :param row_indexes: Optionale Indizes der Zeilen in der Eingabedatei (Standard: Position in rows)
+    :return: Generator von Origin-Dicts für PipelineExecutor
+    """
+    from .bulk_geocoding import BulkGeocoder, row_address
+
+    geocoder = BulkGeocoder(reject_path=reject_path, on_reject=on_reject)
+    for index, row, result in geocoder.resolve(rows):
+        if row_indexes is not None:
+            index = row_indexes[index]
+        properties = dict(row, name=row.get('name') or row_address(row))
+        try:
+            origin = _make_origin(properties, result['lat'], result['lon'], index, time_limit, services)
+        except ValueError as e:
+            geocoder.reject(row, str(e))
+            continue
+        yield origin
+
+
+def remember_address_keys(origins, rows, row_indexes, address_keys):
+    """
+    Reiche geokodierte Origins durch und merke die normalisierte Adresse
+
+    Die Origins werden im Eingabe-Thread der Pipeline gelesen; die Adresse
+    wird erst mit dem Ergebnis auf dem Haupt-Thread in den Checkpoint
+    geschrieben, dem die SQLite-Verbindung gehört.
+    """
+    positions = {index: position for position, index in enumerate(row_indexes)}
+    for origin in origins:
+        address_keys[origin['index']] = address_key(rows[positions[origin['index']]])
+        yield origin
+
+
+class ProgressReporter:
+    """Fortschritt und Durchsatz auf stderr (bzw. im Log ohne Terminal)"""
+
+    def __init__(self, total, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.interactive = stream.isatty()
+        self.started = time.perf_counter()
+        self.failed = 0
+
+    def update(self, done, item):
+        if item.get('error'):
+            self.failed += 1
+
+        elapsed = time.perf_counter() - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - done) / rate if rate > 0 else 0.0
+        line = (f"[{done:>{len(str(self.total))}}/{self.total}] {100.0 * done / max(self.total, 1):5.1f}%  "
+                f"{rate:.2f} Standorte/s  {self.failed} Fehler  Rest ~{remaining / 60:.1f} min")
+
+        if self.interactive:
+            self.stream.write('\r' + line)
+            self.stream.flush()
+        elif done % LOG_PROGRESS_EVERY == 0 or done == self.total:
+            logging.getLogger('walkability_analyzer').info(line)
+
+    def skip(self):
+        """Standort ohne Analyse (z.B. verworfene Adresse) aus der Gesamtzahl nehmen"""
+        self.total -= 1
+
+    def finish(self):
+        if self.interactive:
+            self.stream.write('\n')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='walkability_cli',
+        description='Walkability-Analyse für viele Standorte ohne QGIS-Oberfläche')
+    parser.add_argument('origins', help='CSV (name, lat, lon[, time_limit, services]) oder GeoJSON mit Punkten')
+    parser.add_argument('--addresses', action='store_true',
+                        help='Eingabe ist eine Adressliste (address oder street, housenumber, postcode, city)')
+    parser.add_argument('--rejects', help='CSV für nicht geokodierbare Adressen (Standard: <Eingabe>_rejects.csv)')
+    parser.add_argument('--time-limit', type=int, default=DEFAULT_TIME_LIMIT,
+                        help=f'Gehzeit in Minuten, falls nicht pro Standort angegeben (Standard: {DEFAULT_TIME_LIMIT})')
+    parser.add_argument('--services', default=';'.join(DEFAULT_SERVICES),
+                        help='Service-Typen, getrennt durch ";" oder ","')
+    parser.add_argument('--csv', dest='csv_path', help='Ergebnis-CSV')
+    parser.add_argument('--gpkg', dest='gpkg_path', help='Ergebnis-GeoPackage (Standorte, Isochronen, POIs)')
+    parser.add_argument('--geojsonseq', dest='geojsonseq_path', help='Zeilenweises GeoJSON (ein Feature pro Zeile)')
+    parser.add_argument('--parquet', dest='parquet_path', help='GeoParquet (benötigt pyarrow)')
+    parser.add_argument('--pois', action='store_true',
+                        help='POIs zusätzlich in <Datei>_pois.<Endung> (CSV, GeoJSONSeq, GeoParquet)')
+    parser.add_argument('--pdf-dir', help='Verzeichnis für einen PDF-Bericht pro Standort')
+    parser.add_argument('--atlas', action='store_true', help='Zusätzlich alle Berichte in einer PDF (mit --pdf-dir)')
+    parser.add_argument('--at', type=datetime.fromisoformat, metavar='ZEITPUNKT',
+                        help='Nur zu diesem Zeitpunkt geöffnete Services zählen, z.B. 2024-06-02T10:00')
+    parser.add_argument('--weekly', dest='weekly_path',
+                        help='Score für jede Stunde der Woche nach Öffnungszeiten (CSV, eine Zeile pro Standort und Stunde)')
+    parser.add_argument('--checkpoint', help='SQLite-Protokoll; ein erneuter Aufruf überspringt fertige Standorte')
+    parser.add_argument('--queue-size', type=int, default=2, help='Maximale Queue-Länge zwischen den Schritten')
+    parser.add_argument('--no-cache', action='store_true', help='Ergebnis-Cache nicht verwenden')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Ausführliches Logging')
+    return parser
+
+
+def main(argv=None):
+    """Einstiegspunkt der Kommandozeile"""
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s %(levelname)s %(message)s')
+    logger = logging.getLogger('walkability_analyzer')
+    logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if not any((args.csv_path, args.gpkg_path, args.geojsonseq_path, args.parquet_path, args.weekly_path,
+                args.pdf_dir)):
+        logger.error("Mindestens --csv, --gpkg, --geojsonseq, --parquet, --weekly oder --pdf-dir angeben")
+        return 2
+
+    if args.atlas and not args.pdf_dir:
+        logger.error("--atlas benötigt --pdf-dir")
+        return 2
+
+    try:
+        services = parse_services(args.services, DEFAULT_SERVICES)
+        if args.addresses:
+            from .bulk_geocoding import read_address_rows
+            rows = read_address_rows(args.origins)
+            origins = []
+            total = len(rows)
+        else:
+            origins = read_origins(args.origins, args.time_limit, services)
+            total = len(origins)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Standorte konnten nicht gelesen werden: {str(e)}")
+        return 2
+
+    if total == 0:
+        logger.error("Keine Standorte gefunden")
+        return 2
+
+    from .walkability_engine import WalkabilityAnalyzer
+    from .pipeline_executor import PipelineExecutor
+    from .result_exporter import (
+        CsvResultWriter, GeoJsonSeqResultWriter, GeoParquetResultWriter, GeoPackageResultWriter, WeeklyScoreWriter,
+        PYARROW_AVAILABLE
+    )
+
+    if args.parquet_path and not PYARROW_AVAILABLE:
+        logger.error("--parquet benötigt pyarrow (pip install pyarrow)")
+        return 2
+    from .checkpoint_store import CheckpointStore
+
+    writers = []
+    if args.csv_path:
+        writers.append(CsvResultWriter(args.csv_path, pois=args.pois))
+    if args.geojsonseq_path:
+        writers.append(GeoJsonSeqResultWriter(args.geojsonseq_path, pois=args.pois))
+    if args.parquet_path:
+        writers.append(GeoParquetResultWriter(args.parquet_path, pois=args.pois))
+    if args.gpkg_path:
+        writers.append(GeoPackageResultWriter(args.gpkg_path))
+    if args.weekly_path:
+        writers.append(WeeklyScoreWriter(args.weekly_path))
+
+    # Nur die für Berichte nötigen Felder behalten, PDFs erst nach der Pipeline
+    pdf_reports = []
+
+    def add_report(item):
+        if args.pdf_dir and item.get('result'):
+            pdf_reports.append({key: item['result'][key] for key in REPORT_KEYS if key in item['result']})
+
+    def export_reports():
+        if not pdf_reports:
+            return 0
+        from .pdf_batch import BatchPdfExporter
+        try:
+            outcomes = BatchPdfExporter(args.pdf_dir, atlas=args.atlas).export(pdf_reports)
+        except ImportError as e:
+            logger.error(str(e))
+            return 2
+        written = sum(1 for outcome in outcomes if outcome['path'])
+        sys.stderr.write(f"{written} von {len(outcomes)} PDF-Dokumenten in {args.pdf_dir}\n")
+        return 0
+
+    # Fertige Standorte aus dem Protokoll übernehmen
+    checkpoint = None
+    row_indexes = None
+    if args.checkpoint:
+        checkpoint = CheckpointStore(args.checkpoint, at_time=args.at)
+        if args.addresses:
+            # Bereits geokodierte Adressen ohne erneute Geokodierung einplanen
+            origins, row_indexes = checkpoint_address_origins(checkpoint, rows, args.time_limit, services)
+            rows = [rows[index] for index in row_indexes]
+        origins, reused, summary = checkpoint.plan(origins)
+        # Fortschritt nur über die noch zu berechnenden Standorte (und offenen Adressen)
+        total = len(origins) + (len(rows) if args.addresses else 0)
+
+        for origin in reused:
+            item = checkpoint.load_item(origin)
+            for writer in writers:
+                writer.write(item)
+            add_report(item)
+
+        sys.stderr.write(
+            f"Checkpoint: {summary['reused']} übernommen, {summary['retried']} erneut versucht, "
+            f"{summary['new']} neu\n")
+
+    progress = ProgressReporter(total)
+    nothing_left = not origins and not (args.addresses and rows)
+
+    # Index der Eingabezeile -> normalisierte Adresse, bis das Ergebnis im Checkpoint steht
+    address_keys = {}
+
+    if args.addresses:
+        # Aufgelöste Adressen gehen direkt in die Pipeline, während der Rest noch geokodiert wird;
+        # verworfene Zeilen zählen nicht zur Gesamtzahl
+        reject_path = args.rejects or f"{os.path.splitext(args.origins)[0]}_rejects.csv"
+        geocoded = geocode_origins(rows, args.time_limit, services, reject_path,
+                                   on_reject=lambda row, reason: progress.skip(), row_indexes=row_indexes)
+        if checkpoint:
+            geocoded = remember_address_keys(geocoded, rows, row_indexes, address_keys)
+        origins = itertools.chain(origins, geocoded)
+
+    def on_result(done, item):
+        if checkpoint:
+            checkpoint.record(item)
+            key = address_keys.pop(item.get('index'), None)
+            if key:
+                checkpoint.record_address(key, item['coordinates'])
+        for writer in writers:
+            writer.write(item)
+        add_report(item)
+        progress.update(done, item)
+
+    if checkpoint and nothing_left:
+        for writer in writers:
+            writer.close()
+        checkpoint.close()
+        sys.stderr.write("Alle Standorte bereits berechnet\n")
+        return export_reports()
+
+    executor = PipelineExecutor(
+        WalkabilityAnalyzer(),
+        queue_size=args.queue_size,
+        use_cache=not args.no_cache,
+        create_layers=False,
+        at_time=args.at)
+
+    try:
+        executor.run(origins, progress_callback=on_result, collect_results=False)
+    finally:
+        progress.finish()
+        for writer in writers:
+            writer.close()
+        if checkpoint:
+            checkpoint.close()
+
+    if export_reports():
+        return 2
+
+    stats = executor.stats
+    sys.stderr.write(
+        f"{stats['origins']} Standorte berechnet in {stats['elapsed_seconds']:.1f}s "
+        f"({stats['throughput']:.2f}/s), {stats['failed']} fehlgeschlagen"
+        f"{'' if QGIS_AVAILABLE else ' (ohne QGIS)'}\n")
+    for name, stage_stats in stats['stages'].items():
+        sys.stderr.write(f"  {name:<10} {stage_stats['throughput']:.2f}/s, "
+                         f"Queue max {stage_stats['max_queue_depth']}\n")
+
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# gpkg_writer.py - GeoPackage-Ausgabe ohne GDAL/QGIS (sqlite3)
+
+import sqlite3
+import struct
+
+# GeoPackage 1.2
+APPLICATION_ID = 0x47504B47
+USER_VERSION = 10200
+
+RTREE_EXTENSION = 'http://www.geopackage.org/spec120/#extension_rtree'
+
+SRS_ROWS = [
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', 'undefined cartesian coordinate reference system'),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', 'undefined geographic coordinate reference system'),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326,
+     'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,'
+     'AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,'
+     'AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],'
+     'AUTHORITY["EPSG","4326"]]',
+     'longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid')
+]
+
+
+def _ring_wkb(ring):
+    return struct.pack('<I', len(ring)) + b''.join(struct.pack('<dd', x, y) for x, y, *_ in ring)
+
+
+def _polygon_wkb(rings):
+    return struct.pack('<BII', 1, 3, len(rings)) + b''.join(_ring_wkb(ring) for ring in rings)
+
+
+def encode_geometry(geometry, srs_id=4326):
+    """
+    Kodiere eine GeoJSON-Geometrie als GeoPackage-Binary
+
+    :param geometry: GeoJSON-Geometrie (Point, Polygon oder MultiPolygon)
+    :param srs_id: SRS-ID für den Header
+    :return: bytes
+    """
+    geometry_type = geometry['type']
+    coordinates = geometry['coordinates']
+
+    if geometry_type == 'Point':
+        xs, ys = [coordinates[0]], [coordinates[1]]
+        wkb = struct.pack('<BIdd', 1, 1, coordinates[0], coordinates[1])
+    elif geometry_type == 'Polygon':
+        xs = [point[0] for point in coordinates[0]]
+        ys = [point[1] for point in coordinates[0]]
+        wkb = _polygon_wkb(coordinates)
+    elif geometry_type == 'MultiPolygon':
+        xs = [point[0] for polygon in coordinates for point in polygon[0]]
+        ys = [point[1] for polygon in coordinates for point in polygon[0]]
+        wkb = struct.pack('<BII', 1, 6, len(coordinates)) + b''.join(_polygon_wkb(polygon) for polygon in coordinates)
+    else:
+        raise ValueError(f"Geometrie-Typ nicht unterstützt: {geometry_type}")
+
+    # Header: Magic, Version 0, Flags (Envelope minx/maxx/miny/maxy, little endian)
+    header = b'GP' + struct.pack('<BBi', 0, 0b00000011, srs_id)
+    envelope = struct.pack('<dddd', min(xs), max(xs), min(ys), max(ys))
+    return header + envelope + wkb
+
+
+def _envelope(blob):
+    """Envelope (minx, maxx, miny, maxy) aus einem GeoPackage-Binary"""
+    if blob is None or (blob[3] >> 1) & 0b111 == 0:
+        return None
+    return struct.unpack('<dddd', blob[8:40])
+
+
+def _envelope_value(index):
+    def value(blob):
+        envelope = _envelope(blob)
+        return envelope[index] if envelope else None
+    return value
+
+
+class GeoPackageWriter:
+    """Schreibt Feature-Tabellen mit R-Tree-Index in eine GeoPackage-Datei"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self._register_functions()
+        self._init_metadata()
+
+    def _register_functions(self):
+        # Von den R-Tree-Triggern benötigt (GDAL stellt sie selbst bereit)
+        self.connection.create_function('ST_MinX', 1, _envelope_value(0), deterministic=True)
+        self.connection.create_function('ST_MaxX', 1, _envelope_value(1), deterministic=True)
+        self.connection.create_function('ST_MinY', 1, _envelope_value(2), deterministic=True)
+        self.connection.create_function('ST_MaxY', 1, _envelope_value(3), deterministic=True)
+        self.connection.create_function('ST_IsEmpty', 1, lambda blob: 1 if _envelope(blob) is None else 0,
+                                        deterministic=True)
+
+    def _init_metadata(self):
+        cursor = self.connection.cursor()
+        cursor.execute(f"PRAGMA application_id = {APPLICATION_ID}")
+        cursor.execute(f"PRAGMA user_version = {USER_VERSION}")
+        cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+                srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY,
+                organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL,
+                definition TEXT NOT NULL, description TEXT);
+            CREATE TABLE IF NOT EXISTS gpkg_contents (
+                table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+                identifier TEXT UNIQUE, description TEXT DEFAULT '',
+                last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+                min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+                srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id));
+            CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+                table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+                geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+                z TINYINT NOT NULL, m TINYINT NOT NULL,
+                CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name));
+            CREATE TABLE IF NOT EXISTS gpkg_extensions (
+                table_name TEXT, column_name TEXT, extension_name TEXT NOT NULL,
+                definition TEXT NOT NULL, scope TEXT NOT NULL,
+                CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name));
+        """)
+        cursor.executemany("INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", SRS_ROWS)
+        self.connection.commit()
+
+    def has_table(self, table):
+        """Prüfe ob eine Feature-Tabelle bereits existiert"""
+        row = self.connection.execute(
+            "SELECT 1 FROM gpkg_contents WHERE table_name = ?", (table,)).fetchone()
+        return row is not None
+
+    def create_table(self, table, geometry_type, fields, srs_id=4326, spatial_index=True):
+        """
+        Lege eine Feature-Tabelle an (falls noch nicht vorhanden)
+
+        :param table: Tabellenname
+        :param geometry_type: 'POINT', 'POLYGON' oder 'MULTIPOLYGON'
+        :param fields: Liste von (Name, SQL-Typ), z.B. ('score', 'REAL')
+        :param srs_id: SRS-ID der Geometrien
+        :param spatial_index: R-Tree-Index anlegen
+        """
+        if self.has_table(table):
+            return
+
+        columns = ', '.join(f'"{name}" {sql_type}' for name, sql_type in fields)
+        cursor = self.connection.cursor()
+        cursor.execute(f'CREATE TABLE "{table}" (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom {geometry_type}, {columns})')
+        cursor.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+                       (table, table, srs_id))
+        cursor.execute("INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', ?, ?, 0, 0)",
+                       (table, geometry_type, srs_id))
+
+        if spatial_index:
+            self._create_rtree(cursor, table)
+
+        self.connection.commit()
+
+    def add_missing_fields(self, table, fields):
+        """
+        Ergänze Spalten einer bestehenden Tabelle (ältere Dateien)
+
+        :param fields: Liste von (Name, SQL-Typ)
+        """
+        existing = {row[1] for row in self.connection.execute(f'PRAGMA table_info("{table}")')}
+        for name, sql_type in fields:
+            if name not in existing:
+                self.connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {sql_type}')
+        self.connection.commit()
+
+    def _create_rtree(self, cursor, table):
+        rtree = f"rtree_{table}_geom"
+        cursor.execute(f'CREATE VIRTUAL TABLE "{rtree}" USING rtree(id, minx, maxx, miny, maxy)')
+        cursor.execute("INSERT INTO gpkg_extensions VALUES (?, 'geom', 'gpkg_rtree_index', ?, 'write-only')",
+                       (table, RTREE_EXTENSION))
+
+        bounds = "ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)"
+        cursor.executescript(f"""
+            CREATE TRIGGER "{rtree}_insert" AFTER INSERT ON "{table}"
+            WHEN (NEW.geom NOT NULL AND NOT ST_IsEmpty(NEW.geom))
+            BEGIN
+                INSERT OR REPLACE INTO "{rtree}" VALUES (NEW.fid, {bounds});
+            END;
+            CREATE TRIGGER "{rtree}_update1" AFTER UPDATE OF geom ON "{table}"
+            WHEN OLD.fid = NEW.fid AND (NEW.geom NOT NULL AND NOT ST_IsEmpty(NEW.geom))
+            BEGIN
+                INSERT OR REPLACE INTO "{rtree}" VALUES (NEW.fid, {bounds});
+            END;
+            CREATE TRIGGER "{rtree}_update2" AFTER UPDATE OF geom ON "{table}"
+            WHEN OLD.fid = NEW.fid AND (NEW.geom IS NULL OR ST_IsEmpty(NEW.geom))
+            BEGIN
+                DELETE FROM "{rtree}" WHERE id = OLD.fid;
+            END;
+            CREATE TRIGGER "{rtree}_delete" AFTER DELETE ON "{table}"
+            WHEN OLD.geom NOT NULL
+            BEGIN
+                DELETE FROM "{rtree}" WHERE id = OLD.fid;
+            END;
+        """)
+
+    def insert(self, table, rows, srs_id=4326):
+        """
+        Füge Features hinzu
+
+        :param table: Tabellenname
+        :param rows: Iterable von (GeoJSON-Geometrie, Attribut-Dict)
+        :return: Anzahl eingefügter Features
+        """
+        count = 0
+        cursor = self.connection.cursor()
+        statement = None
+        names = None
+
+        for geometry, attributes in rows:
+            if statement is None:
+                names = list(attributes.keys())
+                columns = ', '.join(['geom'] + [f'"{name}"' for name in names])
+                placeholders = ', '.join(['?'] * (len(names) + 1))
+                statement = f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})'
+
+            blob = encode_geometry(geometry, srs_id) if geometry else None
+            cursor.execute(statement, [blob] + [attributes.get(name) for name in names])
+            count += 1
+
+        return count
+
+    def commit(self):
+        """Änderungen schreiben und Ausdehnung in gpkg_contents aktualisieren"""
+        cursor = self.connection.cursor()
+        tables = cursor.execute(
+            "SELECT table_name FROM gpkg_extensions WHERE extension_name = 'gpkg_rtree_index'").fetchall()
+
+        for (table,) in tables:
+            extent = cursor.execute(
+                f'SELECT MIN(minx), MIN(miny), MAX(maxx), MAX(maxy) FROM "rtree_{table}_geom"').fetchone()
+            if extent[0] is not None:
+                cursor.execute(
+                    "UPDATE gpkg_contents SET min_x = ?, min_y = ?, max_x = ?, max_y = ?, "
+                    "last_change = strftime('%Y-%m-%dT%H:%M:%fZ','now') WHERE table_name = ?",
+                    (*extent, table))
+
+        self.connection.commit()
+
+    def close(self):
+        """Schreiben abschließen"""
+        self.commit()
+        self.connection.close()
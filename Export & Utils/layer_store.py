@@ -0,0 +1,261 @@
+# layer_store.py - Analyse-Layer dauerhaft in einem GeoPackage speichern
+
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+try:
+    from qgis.core import QgsApplication, QgsProject, QgsVectorLayer
+except ImportError:
+    # Headless-Betrieb ohne QGIS: nur Lesen und Schreiben mit explizitem Pfad
+    pass
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .gpkg_writer import GeoPackageWriter
+
+STORE_FILENAME = 'walkability_runs.gpkg'
+
+ISOCHRONES_TABLE = 'run_isochrones'
+CENTERS_TABLE = 'run_centers'
+POIS_TABLE = 'run_pois'
+
+# Custom Property, über die die Store-Layer im Projekt wiedergefunden werden
+TABLE_PROPERTY = 'walkability_analyzer/store_table'
+
+LAYER_NAMES = {
+    'isochrone': "Walkability_Isochrone",
+    'center': "Walkability_Center",
+    'pois': "Walkability_POIs"
+}
+
+CENTER_FIELDS = [
+    ('run_id', 'TEXT'), ('location', 'TEXT'), ('created_at', 'TEXT'),
+    ('lon', 'REAL'), ('lat', 'REAL'), ('time_limit', 'INTEGER'), ('services', 'TEXT'),
+    ('total_score', 'REAL'), ('total_services', 'INTEGER'), ('service_scores', 'TEXT')
+]
+
+POI_FIELDS = [
+    ('run_id', 'TEXT'), ('location', 'TEXT'), ('name', 'TEXT'),
+    ('service_type', 'TEXT'), ('osm_type', 'TEXT'), ('osm_id', 'TEXT'), ('element_type', 'TEXT')
+]
+
+# Maximale Anzahl Parameter pro IN-Abfrage
+QUERY_CHUNK_SIZE = 500
+
+LAYER_TABLES = {
+    'isochrone': ISOCHRONES_TABLE,
+    'center': CENTERS_TABLE,
+    'pois': POIS_TABLE
+}
+
+
+def default_store_path():
+    """GeoPackage neben der Projektdatei, sonst im QGIS-Profil"""
+    directory = QgsProject.instance().homePath()
+    if not directory:
+        directory = os.path.join(QgsApplication.qgisSettingsDirPath(), 'walkability_analyzer')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, STORE_FILENAME)
+
+
+def new_run_id():
+    """Sortierbare, eindeutige Lauf-ID"""
+    return f"{datetime.now():%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}"
+
+
+class AnalysisLayerStore:
+    """
+    Alle Analysen in drei gemeinsamen GeoPackage-Tabellen
+
+    Jeder Lauf wird mit einer run_id an Isochronen, Zentren und POIs
+    angehängt. Im Projekt gibt es nur einen Layer pro Tabelle, der per
+    Filter den zuletzt hinzugefügten Lauf zeigt. Die Tabellen haben einen
+    R-Tree-Index und einen Index auf run_id, sodass Darstellung und
+    Abfragen auch bei vielen gespeicherten Läufen schnell bleiben.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        self._create_tables()
+
+    def _create_tables(self):
+        gpkg = GeoPackageWriter(self.path)
+        try:
+            gpkg.create_table(ISOCHRONES_TABLE, 'MULTIPOLYGON', [
+                ('run_id', 'TEXT'), ('location', 'TEXT'), ('time_minutes', 'INTEGER'), ('value', 'REAL')
+            ])
+            gpkg.create_table(CENTERS_TABLE, 'POINT', CENTER_FIELDS)
+            gpkg.create_table(POIS_TABLE, 'POINT', POI_FIELDS)
+            # Stores älterer Versionen ohne Service-Scores und OSM-Elementtyp
+            gpkg.add_missing_fields(CENTERS_TABLE, CENTER_FIELDS)
+            gpkg.add_missing_fields(POIS_TABLE, POI_FIELDS)
+            for table in LAYER_TABLES.values():
+                gpkg.connection.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_run_id" ON "{table}" (run_id)')
+        finally:
+            gpkg.close()
+
+    def append_run(self, result, run_id=None):
+        """
+        Hänge ein Analyse-Ergebnis an die Tabellen an
+
+        :param result: Ergebnis aus analyze_custom_location / analyze_time_curve
+        :param run_id: Optional vorgegebene Lauf-ID
+        :return: run_id
+        """
+        run_id = run_id or new_run_id()
+        location = result['location_name']
+        lon, lat = result['coordinates']
+        isochrone_data = result.get('isochrone_rings') or result['isochrone']
+
+        gpkg = GeoPackageWriter(self.path)
+        try:
+            gpkg.insert(ISOCHRONES_TABLE, (
+                (as_multipolygon(feature['geometry']), {
+                    'run_id': run_id,
+                    'location': location,
+                    'time_minutes': feature['properties'].get('time_minutes', result['time_limit']),
+                    'value': feature['properties'].get('value')
+                })
+                for feature in isochrone_data.get('features', []) if feature.get('geometry')
+            ))
+
+            gpkg.insert(CENTERS_TABLE, [({'type': 'Point', 'coordinates': [lon, lat]}, {
+                'run_id': run_id,
+                'location': location,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'lon': lon,
+                'lat': lat,
+                'time_limit': result['time_limit'],
+                'services': ';'.join(result['service_types']),
+                'total_score': round(result['score']['total_score'], 2),
+                'total_services': result['score']['total_services'],
+                'service_scores': json.dumps({
+                    service_type: data['raw_score']
+                    for service_type, data in result['score'].get('service_scores', {}).items()
+                })
+            })])
+
+            gpkg.insert(POIS_TABLE, (
+                ({'type': 'Point', 'coordinates': [poi['lon'], poi['lat']]}, {
+                    'run_id': run_id,
+                    'location': location,
+                    'name': poi['name'],
+                    'service_type': service_type,
+                    'osm_type': poi['osm_type'],
+                    'osm_id': str(poi['id']),
+                    'element_type': poi.get('type')
+                })
+                for service_type, pois in result['services'].items()
+                for poi in pois
+            ))
+        finally:
+            gpkg.close()
+
+        QgsMessageLog.logMessage(f"Stored run {run_id} ({location}) in {self.path}", level=Qgis.Info)
+        return run_id
+
+    def list_runs(self):
+        """
+        Alle gespeicherten Läufe, neueste zuerst
+
+        :return: Liste von Dicts (run_id, location, created_at, total_score)
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            rows = connection.execute(
+                f'SELECT run_id, location, created_at, total_score FROM "{CENTERS_TABLE}" ORDER BY run_id DESC')
+            return [dict(zip(('run_id', 'location', 'created_at', 'total_score'), row)) for row in rows]
+        finally:
+            connection.close()
+
+    def run_centers(self, run_ids):
+        """
+        Standorte mehrerer Läufe
+
+        :return: Liste von Dicts (run_id, location, lon, lat, total_score,
+            service_scores als Dict Service-Typ -> roher Score)
+        """
+        rows = self._query_runs(
+            CENTERS_TABLE, 'run_id, location, lon, lat, total_score, service_scores', run_ids)
+        return [{
+            'run_id': run_id, 'location': location, 'lon': lon, 'lat': lat, 'total_score': total_score,
+            'service_scores': json.loads(service_scores) if service_scores else {}
+        } for run_id, location, lon, lat, total_score, service_scores in rows]
+
+    def run_pois(self, run_ids):
+        """
+        POIs mehrerer Läufe
+
+        :return: Liste von Tupeln (element_type, osm_id, service_type, name,
+            osm_type, location, lon, lat); element_type ist None bei Läufen
+            älterer Versionen
+        """
+        return self._query_runs(
+            POIS_TABLE, 'element_type, osm_id, service_type, name, osm_type, location, ST_MinX(geom), ST_MinY(geom)',
+            run_ids)
+
+    def _query_runs(self, table, columns, run_ids):
+        gpkg = GeoPackageWriter(self.path)
+        try:
+            rows = []
+            run_ids = list(run_ids)
+            for start in range(0, len(run_ids), QUERY_CHUNK_SIZE):
+                chunk = run_ids[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ', '.join(['?'] * len(chunk))
+                rows.extend(gpkg.connection.execute(
+                    f'SELECT {columns} FROM "{table}" WHERE run_id IN ({placeholders})', chunk))
+            return rows
+        finally:
+            gpkg.connection.close()
+
+    def project_layers(self, run_id, location_name, style_callback=None):
+        """
+        Store-Layer im Projekt finden oder anlegen und auf einen Lauf filtern
+
+        :param run_id: Anzuzeigender Lauf
+        :param location_name: Standortname für den Layernamen
+        :param style_callback: Funktion(key, layer) zum Stylen neu angelegter Layer
+        :return: Dictionary mit Layern ('isochrone', 'center', 'pois')
+        """
+        layers = {}
+        existing = self._existing_layers()
+
+        for key, table in LAYER_TABLES.items():
+            layer = existing.get(table)
+            if layer is None:
+                layer = QgsVectorLayer(f"{self.path}|layername={table}", LAYER_NAMES[key], "ogr")
+                if not layer.isValid():
+                    QgsMessageLog.logMessage(f"Store layer {table} is invalid", level=Qgis.Critical)
+                    continue
+                layer.setCustomProperty(TABLE_PROPERTY, table)
+                if style_callback:
+                    style_callback(key, layer)
+
+            # Neuer Filter lädt auch die gerade angehängten Features
+            layer.setSubsetString(f"run_id = '{run_id}'")
+            layer.setName(f"{LAYER_NAMES[key]}_{location_name}")
+            layer.updateExtents()
+            layers[key] = layer
+
+        return layers
+
+    def _existing_layers(self):
+        layers = {}
+        source = os.path.normcase(os.path.abspath(self.path))
+        for layer in QgsProject.instance().mapLayers().values():
+            table = layer.customProperty(TABLE_PROPERTY)
+            if not table:
+                continue
+            layer_path = layer.source().split('|')[0]
+            if os.path.normcase(os.path.abspath(layer_path)) == source:
+                layers[table] = layer
+        return layers
+
+
+def as_multipolygon(geometry):
+    """Polygon als MultiPolygon für die MULTIPOLYGON-Tabelle"""
+    if geometry['type'] == 'Polygon':
+        return {'type': 'MultiPolygon', 'coordinates': [geometry['coordinates']]}
+    return geometry
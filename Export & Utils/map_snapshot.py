@@ -0,0 +1,295 @@
+# map_snapshot.py - Kartenbilder der Analyse-Ergebnisse für den PDF-Bericht
+
+import hashlib
+import json
+import os
+import threading
+
+from qgis.core import (
+    QgsTask, QgsMapSettings, QgsMapRendererParallelJob, QgsRasterLayer, QgsRectangle,
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject, QgsMessageLog, Qgis
+)
+from qgis.PyQt.QtCore import QSize, pyqtSignal
+from qgis.PyQt.QtGui import QColor
+
+from .geocoding import plugin_data_directory
+
+SNAPSHOT_DIRNAME = 'map_snapshots'
+
+# Bildgröße in Pixeln und Auflösung (16 cm breit im Bericht)
+SNAPSHOT_SIZE = (1600, 1000)
+SNAPSHOT_DPI = 150
+SNAPSHOT_CRS = 'EPSG:3857'
+
+# Rand um Isochrone und POIs (Anteil der Ausdehnung)
+EXTENT_MARGIN = 0.08
+# Mindestausdehnung in Metern, z.B. für Ergebnisse ohne Isochrone
+MIN_EXTENT_METERS = 500
+
+BASEMAP_NAME = 'OpenStreetMap'
+BASEMAP_URI = 'type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png&zmin=0&zmax=19'
+
+# Layer-Reihenfolge von oben nach unten, die Grundkarte liegt darunter
+LAYER_ORDER = ('pois', 'center', 'isochrone')
+
+
+def _positions(coordinates):
+    """Alle Positionen einer verschachtelten GeoJSON-Koordinatenliste"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates
+        return
+    for part in coordinates:
+        yield from _positions(part)
+
+
+def result_bounds(result):
+    """Umgebendes Rechteck (WGS84) von Standort, Isochrone und POIs"""
+    lons, lats = [result['coordinates'][0]], [result['coordinates'][1]]
+
+    isochrone = result.get('isochrone_rings') or result.get('isochrone') or {}
+    for feature in isochrone.get('features', []):
+        for position in _positions(feature['geometry']['coordinates']):
+            lons.append(position[0])
+            lats.append(position[1])
+
+    for pois in result.get('services', {}).values():
+        for poi in pois:
+            lons.append(poi['lon'])
+            lats.append(poi['lat'])
+
+    return QgsRectangle(min(lons), min(lats), max(lons), max(lats))
+
+
+def snapshot_extent(result):
+    """Kartenausschnitt in SNAPSHOT_CRS mit Rand"""
+    transform = QgsCoordinateTransform(
+        QgsCoordinateReferenceSystem('EPSG:4326'), QgsCoordinateReferenceSystem(SNAPSHOT_CRS),
+        QgsProject.instance())
+    extent = transform.transformBoundingBox(result_bounds(result))
+
+    center = extent.center()
+    half_width = max(extent.width() * (0.5 + EXTENT_MARGIN), MIN_EXTENT_METERS / 2)
+    half_height = max(extent.height() * (0.5 + EXTENT_MARGIN), MIN_EXTENT_METERS / 2)
+    return QgsRectangle(center.x() - half_width, center.y() - half_height,
+                        center.x() + half_width, center.y() + half_height)
+
+
+def result_fingerprint(result):
+    """Inhalts-Hash für Ergebnisse ohne run_id (Memory-Layer)"""
+    content = {
+        'location_name': result.get('location_name'),
+        'coordinates': list(result['coordinates']),
+        'time_limit': result.get('time_limit'),
+        'at_time': result.get('at_time'),
+        'pois': {service_type: sorted(str(poi['id']) for poi in pois)
+                 for service_type, pois in result.get('services', {}).items()}
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def snapshot_key(result, extent, size=SNAPSHOT_SIZE):
+    """
+    Cache-Schlüssel eines Kartenbildes
+
+    Gespeicherte Läufe (Layer-Store) werden über ihre run_id erkannt, alle
+    anderen über den Inhalt; dazu kommen Ausschnitt und Bildgröße.
+    """
+    identity = result.get('run_id') or result_fingerprint(result)
+    bounds = ','.join(f"{value:.1f}" for value in (
+        extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()))
+    text = f"{identity}|{bounds}|{size[0]}x{size[1]}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class MapSnapshotCache:
+    """Gerenderte Kartenbilder als PNG im Plugin-Datenverzeichnis"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(plugin_data_directory(), SNAPSHOT_DIRNAME)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def lookup(self, key):
+        """Pfad des Bildes oder None, wenn es noch nicht gerendert wurde"""
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def save(self, key, image):
+        """QImage speichern; erst nach vollständigem Schreiben sichtbar"""
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        if not image.save(temp_path, 'PNG'):
+            raise OSError(f"Kartenbild konnte nicht gespeichert werden: {path}")
+        os.replace(temp_path, path)
+        return path
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_snapshot_cache():
+    """Gemeinsamer Bild-Cache der QGIS-Sitzung"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = MapSnapshotCache()
+        return _shared_cache
+
+
+def create_basemap_layer():
+    """
+    Grundkarte (XYZ-Kacheln) für einen Render-Vorgang oder None
+
+    Jeder Render-Thread erhält einen eigenen Layer; die Kacheln selbst
+    landen im Netzwerk-Cache von QGIS und werden bei weiteren Bildern
+    desselben Gebiets nicht erneut geladen.
+    """
+    layer = QgsRasterLayer(BASEMAP_URI, BASEMAP_NAME, 'wms')
+    if layer.isValid():
+        return layer
+    QgsMessageLog.logMessage("Basemap not available - map snapshots without basemap", level=Qgis.Warning)
+    return None
+
+
+def snapshot_layers(result, analyzer=None):
+    """
+    Layer eines Kartenbildes in Zeichenreihenfolge plus Grundkarte ([] ohne Inhalt)
+
+    Die Layer werden aus dem GeoJSON des Ergebnisses im aufrufenden Thread
+    neu erstellt, auch für Ergebnisse ohne Layer (Batch, Checkpoint).
+
+    :param analyzer: WalkabilityAnalyzer für die Layer-Erstellung (Standard: neu)
+    """
+    if analyzer is None:
+        from .walkability_engine import WalkabilityAnalyzer
+        analyzer = WalkabilityAnalyzer()
+
+    layers = analyzer.create_result_layers(result)
+    ordered = [layers[key] for key in LAYER_ORDER if layers.get(key) is not None]
+    if not ordered:
+        return []
+    basemap = create_basemap_layer()
+    return ordered + ([basemap] if basemap is not None else [])
+
+
+def render_snapshot(layers, extent, size=SNAPSHOT_SIZE):
+    """
+    Kartenbild rendern und auf das Ergebnis warten
+
+    Einstellungen, Render-Job und Layer gehören dem aufrufenden Thread
+    (z.B. QgsTask.run()); die Layer werden parallel auf den Render-Threads
+    von QGIS gezeichnet, offscreen in einem QImage.
+
+    :return: QImage
+    """
+    settings = QgsMapSettings()
+    settings.setDestinationCrs(QgsCoordinateReferenceSystem(SNAPSHOT_CRS))
+    settings.setTransformContext(QgsProject.instance().transformContext())
+    settings.setLayers(layers)
+    settings.setExtent(extent)
+    settings.setOutputSize(QSize(*size))
+    settings.setOutputDpi(SNAPSHOT_DPI)
+    settings.setBackgroundColor(QColor(255, 255, 255))
+    settings.setFlag(QgsMapSettings.Antialiasing, True)
+
+    job = QgsMapRendererParallelJob(settings)
+    job.start()
+    job.waitForFinished()
+    return job.renderedImage()
+
+
+def map_snapshot(result, cache=None, size=SNAPSHOT_SIZE):
+    """
+    Pfad des Kartenbildes eines Ergebnisses, bei Bedarf gerendert
+
+    Blockiert, bis das Bild vorliegt: nur im Hintergrund aufrufen.
+
+    :return: Pfad oder None, wenn es nichts zu zeichnen gibt
+    """
+    cache = cache or get_snapshot_cache()
+    extent = snapshot_extent(result)
+    key = snapshot_key(result, extent, size)
+    path = cache.lookup(key)
+    if path is not None:
+        return path
+    layers = snapshot_layers(result)
+    if not layers:
+        return None
+    return cache.save(key, render_snapshot(layers, extent, size))
+
+
+class MapSnapshotTask(QgsTask):
+    """
+    Kartenbild eines Ergebnisses als Hintergrund-Task
+
+    Der Konstruktor (Haupt-Thread) prüft nur den Cache; run() erstellt
+    Layer und Render-Job im Hintergrund-Thread und speichert das Bild.
+    Liegt das Bild bereits vor, wird nichts gerendert.
+    """
+
+    snapshotFinished = pyqtSignal(str)
+
+    def __init__(self, result, cache=None, size=SNAPSHOT_SIZE):
+        super().__init__(f"Kartenbild: {result.get('location_name', '')}", QgsTask.CanCancel)
+        self.result = result
+        self.cache = cache or get_snapshot_cache()
+        self.size = size
+        self.error = None
+        self.path = self.cache.lookup(snapshot_key(result, snapshot_extent(result), size))
+
+    def run(self):
+        """Rendern und speichern (Hintergrund-Thread)"""
+        if self.path is not None:
+            return True
+        try:
+            self.path = map_snapshot(self.result, self.cache, self.size)
+            return self.path is not None and not self.isCanceled()
+        except Exception as e:
+            self.error = str(e)
+            return False
+
+    def finished(self, result):
+        """Pfad des Bildes melden ('' ohne Bild)"""
+        if self.error:
+            QgsMessageLog.logMessage(f"Map snapshot error: {self.error}", level=Qgis.Warning)
+        self.snapshotFinished.emit(self.path if result and self.path else '')
+
+
+def attach_map_snapshots(results, cache=None, size=SNAPSHOT_SIZE, is_canceled=None):
+    """
+    Kartenbilder für viele Ergebnisse (Stapel-Export, Hintergrund-Thread)
+
+    Vorhandene Bilder werden aus dem Cache übernommen, nur fehlende
+    gerendert. Der Pfad steht danach in result['map_image'].
+
+    :param is_canceled: Optionale Funktion; True bricht vor dem nächsten Bild ab
+    :return: Anzahl neu gerenderter Bilder
+    """
+    from .walkability_engine import WalkabilityAnalyzer
+
+    cache = cache or get_snapshot_cache()
+    analyzer = WalkabilityAnalyzer()
+    cached = rendered = 0
+    for result in results:
+        if is_canceled and is_canceled():
+            break
+        extent = snapshot_extent(result)
+        key = snapshot_key(result, extent, size)
+        path = cache.lookup(key)
+        if path is not None:
+            result['map_image'] = path
+            cached += 1
+            continue
+        try:
+            layers = snapshot_layers(result, analyzer)
+            if layers:
+                result['map_image'] = cache.save(key, render_snapshot(layers, extent, size))
+                rendered += 1
+        except Exception as e:
+            QgsMessageLog.logMessage(f"Map snapshot error: {str(e)}", level=Qgis.Warning)
+
+    QgsMessageLog.logMessage(f"Map snapshots: {cached} cached, {rendered} rendered", level=Qgis.Info)
+    return rendered
@@ -0,0 +1,158 @@
+# pdf_batch.py - PDF-Berichte für viele Analysen parallel erstellen
+
+import importlib.util
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .qgis_compat import QgsMessageLog, Qgis
+
+# Felder eines Analyse-Ergebnisses, die für den Bericht gebraucht werden
+# (Layer sind QGIS-Objekte und lassen sich nicht an Worker übergeben)
+REPORT_KEYS = ('location_name', 'district', 'coordinates', 'time_limit', 'service_types',
+               'score', 'services', 'time_curve', 'at_time', 'map_image')
+
+ATLAS_FILENAME = 'walkability_atlas.pdf'
+
+
+def report_filename(location_name, index):
+    """Dateiname eines Berichts aus dem Standortnamen"""
+    slug = re.sub(r'[^\w-]+', '_', location_name or '').strip('_')
+    return f"{index + 1:03d}_{slug or 'standort'}.pdf"
+
+
+def python_executable():
+    """
+    Python-Interpreter für Worker-Prozesse
+
+    In QGIS ist sys.executable die QGIS-Anwendung selbst; neue Prozesse
+    müssen mit dem Interpreter der QGIS-Python-Umgebung gestartet werden.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    candidates = [os.path.join(sys.exec_prefix, 'python.exe'),
+                  os.path.join(sys.exec_prefix, 'python3.exe'),
+                  os.path.join(sys.exec_prefix, 'bin', f"python{sys.version_info.major}.{sys.version_info.minor}"),
+                  os.path.join(sys.exec_prefix, 'bin', 'python3')]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which('python3') or shutil.which('python') or sys.executable
+
+
+def _init_worker():
+    # Styles einmal pro Worker aufbauen, nicht pro Bericht
+    from .pdf_exporter import get_report_styles
+    get_report_styles()
+
+
+def _render_report(analysis_data, output_path):
+    from .pdf_exporter import export_walkability_pdf
+    export_walkability_pdf(analysis_data, output_path)
+    return output_path
+
+
+def _render_atlas(results, output_path):
+    from .pdf_exporter import export_atlas_pdf
+    export_atlas_pdf(results, output_path)
+    return output_path
+
+
+class BatchPdfExporter:
+    """
+    Ein PDF-Bericht pro Analyse, optional zusätzlich ein Gesamt-Atlas
+
+    Die Berichte werden in einem Prozess-Pool erstellt (spawn, damit keine
+    Qt-Objekte der QGIS-Sitzung in die Worker kopiert werden). Jeder Worker
+    baut die ReportLab-Styles einmal auf. Der Atlas ist ein eigener Auftrag
+    im selben Pool und entsteht parallel zu den Einzelberichten.
+    """
+
+    def __init__(self, output_dir, max_workers=None, atlas=False, map_snapshots=False):
+        """
+        :param output_dir: Zielverzeichnis
+        :param max_workers: Anzahl Worker-Prozesse (Standard: CPU-Kerne)
+        :param atlas: Zusätzlich alle Berichte in einer PDF zusammenfassen
+        :param map_snapshots: Kartenbilder einbetten (nur in QGIS, export()
+            dann im Hintergrund-Thread aufrufen, z.B. BatchPdfTask)
+        """
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.atlas = atlas
+        self.map_snapshots = map_snapshots
+
+    def export(self, results, progress_callback=None, is_canceled=None):
+        """
+        :param results: Liste von Analyse-Ergebnissen; mit map_snapshots
+            erhalten sie ein Kartenbild (result['map_image']) aus dem Cache
+            bzw. aus ihrem Isochronen- und POI-GeoJSON gerendert
+        :param progress_callback: Optionale Funktion (fertig, gesamt)
+        :param is_canceled: Optionale Funktion; True überspringt weitere Kartenbilder
+        :return: Liste von Dicts (location_name, path, error) in
+            Eingabereihenfolge; der Atlas folgt als letzter Eintrag
+        """
+        # Nur prüfen, geladen wird ReportLab in den Worker-Prozessen
+        if importlib.util.find_spec('reportlab') is None:
+            raise ImportError("ReportLab ist nicht installiert. Bitte installieren Sie es mit: pip install reportlab")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.map_snapshots:
+            # Karten im QGIS-Prozess rendern (bzw. aus dem Cache), Worker betten nur die Bilder ein
+            from .map_snapshot import attach_map_snapshots
+            attach_map_snapshots(results, is_canceled=is_canceled)
+        reports = [{key: result[key] for key in REPORT_KEYS if key in result} for result in results]
+
+        outcomes = [{'location_name': report.get('location_name'), 'path': None, 'error': None}
+                    for report in reports]
+        tasks = [(_render_report, (report, os.path.join(self.output_dir,
+                                                        report_filename(report.get('location_name'), index))))
+                 for index, report in enumerate(reports)]
+        if self.atlas:
+            outcomes.append({'location_name': None, 'path': None, 'error': None})
+            tasks.append((_render_atlas, (reports, os.path.join(self.output_dir, ATLAS_FILENAME))))
+        total = len(outcomes)
+        workers = min(self.max_workers, total)
+
+        if workers <= 1:
+            # Ein Worker-Prozess brächte nur Startkosten
+            for done, (outcome, (function, args)) in enumerate(zip(outcomes, tasks), start=1):
+                try:
+                    outcome['path'] = function(*args)
+                except Exception as e:
+                    self._record_error(outcome, e)
+                if progress_callback:
+                    progress_callback(done, total)
+        else:
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(python_executable())
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+                # Atlas zuerst einreihen, er ist der längste Auftrag
+                order = [total - 1] + list(range(total - 1)) if self.atlas else range(total)
+                futures = {pool.submit(tasks[index][0], *tasks[index][1]): index for index in order}
+
+                for done, future in enumerate(as_completed(futures), start=1):
+                    outcome = outcomes[futures[future]]
+                    try:
+                        outcome['path'] = future.result()
+                    except Exception as e:
+                        self._record_error(outcome, e)
+                    if progress_callback:
+                        progress_callback(done, total)
+
+        failed = sum(1 for outcome in outcomes if outcome['error'])
+        QgsMessageLog.logMessage(
+            f"Batch PDF: {total - failed} of {total} documents written to {self.output_dir}",
+            level=Qgis.Info)
+        return outcomes
+
+    @staticmethod
+    def _record_error(outcome, error):
+        outcome['error'] = str(error)
+        QgsMessageLog.logMessage(
+            f"Batch PDF error for {outcome['location_name'] or 'atlas'}: {str(error)}",
+            level=Qgis.Warning)
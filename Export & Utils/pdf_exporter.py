@@ -2,85 +2,134 @@
 
 import os
 from datetime import datetime
-from qgis.core import QgsMessageLog, Qgis
+from .qgis_compat import QgsMessageLog, Qgis
 
 try:
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import cm
     from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
     from reportlab.platypus.flowables import HRFlowable
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.lineplots import LinePlot
     REPORTLAB_AVAILABLE = True
 except ImportError:
     QgsMessageLog.logMessage("ReportLab not available - PDF export disabled", level=Qgis.Warning)
     REPORTLAB_AVAILABLE = False
 
-def export_walkability_pdf(analysis_data, output_path):
+_report_styles = None
+
+
+def get_report_styles():
     """
-    Exportiere Walkability-Analyse als PDF
-    
-    :param analysis_data: Analyse-Ergebnisse
-    :param output_path: Pfad für die PDF-Datei
+    Stylesheet für alle Berichte, einmal pro Prozess erstellt
+
+    getSampleStyleSheet() und die eigenen ParagraphStyles werden nur beim
+    ersten Bericht aufgebaut; Berichte verändern die Styles nicht.
     """
-    
-    if not REPORTLAB_AVAILABLE:
-        raise ImportError("ReportLab ist nicht installiert. Bitte installieren Sie es mit: pip install reportlab")
-    
-    try:
-        # PDF-Dokument erstellen
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        # Styles definieren
+    global _report_styles
+    if _report_styles is None:
         styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
+        styles.add(ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=20,
             spaceAfter=30,
             alignment=TA_CENTER,
             textColor=colors.darkblue
-        )
-        
-        heading_style = ParagraphStyle(
+        ))
+        styles.add(ParagraphStyle(
             'CustomHeading',
             parent=styles['Heading2'],
             fontSize=14,
             spaceAfter=12,
             textColor=colors.darkblue
-        )
-        
-        # Story (Inhalt) zusammenstellen
-        story = []
-        
-        # Header
-        story.extend(create_header(analysis_data, title_style, styles))
-        
-        # Zusammenfassung
-        story.extend(create_summary(analysis_data, heading_style, styles))
-        
-        # Detaillierte Ergebnisse
-        story.extend(create_detailed_results(analysis_data, heading_style, styles))
-        
-        # Service-Details
-        story.extend(create_service_details(analysis_data, heading_style, styles))
-        
-        # Empfehlungen
-        story.extend(create_recommendations(analysis_data, heading_style, styles))
-        
-        # Footer
-        story.extend(create_footer(analysis_data, styles))
+        ))
+        styles.add(ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            alignment=TA_CENTER,
+            textColor=colors.grey
+        ))
+        _report_styles = styles
+    return _report_styles
+
+
+def create_document(output_path):
+    """A4-Dokument mit den Rändern aller Berichte"""
+    return SimpleDocTemplate(
+        output_path,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm
+    )
+
+
+def build_report_story(analysis_data, styles):
+    """
+    Inhalt eines Berichts für einen Standort
+    
+    :param analysis_data: Analyse-Ergebnisse
+    :param styles: Stylesheet aus get_report_styles
+    :return: Liste von Flowables
+    """
+    title_style = styles['CustomTitle']
+    heading_style = styles['CustomHeading']
+    
+    # Story (Inhalt) zusammenstellen
+    story = []
+    
+    # Header
+    story.extend(create_header(analysis_data, title_style, styles))
+    
+    # Zusammenfassung
+    story.extend(create_summary(analysis_data, heading_style, styles))
+    
+    # Karte (Isochrone und POIs), falls ein Kartenbild vorliegt
+    if analysis_data.get('map_image') and os.path.exists(analysis_data['map_image']):
+        story.extend(create_map(analysis_data, heading_style, styles))
+    
+    # Detaillierte Ergebnisse
+    story.extend(create_detailed_results(analysis_data, heading_style, styles))
+    
+    # Score-Verlauf über die Gehzeit
+    if 'time_curve' in analysis_data:
+        story.extend(create_time_curve(analysis_data, heading_style, styles))
+    
+    # Service-Details
+    story.extend(create_service_details(analysis_data, heading_style, styles))
+    
+    # Empfehlungen
+    story.extend(create_recommendations(analysis_data, heading_style, styles))
+    
+    # Footer
+    story.extend(create_footer(analysis_data, styles))
+    
+    return story
+
+
+def export_walkability_pdf(analysis_data, output_path):
+    """
+    Exportiere Walkability-Analyse als PDF
+    
+    :param analysis_data: Analyse-Ergebnisse
+    :param output_path: Pfad für die PDF-Datei
+    """
+    
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab ist nicht installiert. Bitte installieren Sie es mit: pip install reportlab")
+    
+    try:
+        # PDF-Dokument erstellen
+        doc = create_document(output_path)
         
         # PDF generieren
-        doc.build(story)
+        doc.build(build_report_story(analysis_data, get_report_styles()))
         
         QgsMessageLog.logMessage(f"PDF successfully created: {output_path}", level=Qgis.Info)
         
@@ -88,6 +137,50 @@ def export_walkability_pdf(analysis_data, output_path):
         QgsMessageLog.logMessage(f"PDF export error: {str(e)}", level=Qgis.Critical)
         raise
 
+def export_atlas_pdf(results, output_path):
+    """
+    Exportiere mehrere Analysen als ein Dokument
+
+    Übersicht aller Standorte nach Score, danach je Standort der
+    vollständige Bericht auf neuer Seite.
+
+    :param results: Liste von Analyse-Ergebnissen
+    :param output_path: Pfad für die PDF-Datei
+    """
+
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab ist nicht installiert. Bitte installieren Sie es mit: pip install reportlab")
+
+    styles = get_report_styles()
+    story = [Paragraph("Walkability-Atlas Münster", styles['CustomTitle'])]
+
+    overview_data = [["Standort", "Score", "Services", "Gehzeit"]]
+    for analysis_data in sorted(results, key=lambda data: data['score']['total_score'], reverse=True):
+        overview_data.append([
+            analysis_data.get('location_name', analysis_data.get('district', 'Unbekannt')),
+            f"{analysis_data['score']['total_score']:.1f}",
+            str(analysis_data['score']['total_services']),
+            f"{analysis_data['time_limit']} min"
+        ])
+
+    overview_table = Table(overview_data, colWidths=[8*cm, 2.5*cm, 2.5*cm, 2.5*cm], repeatRows=1)
+    overview_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ]))
+    story.append(overview_table)
+
+    for analysis_data in results:
+        story.append(PageBreak())
+        story.extend(build_report_story(analysis_data, styles))
+
+    create_document(output_path).build(story)
+    QgsMessageLog.logMessage(f"PDF atlas with {len(results)} reports created: {output_path}", level=Qgis.Info)
+
 def create_header(analysis_data, title_style, styles):
     """Erstelle PDF-Header"""
     
@@ -177,6 +270,23 @@ def create_summary(analysis_data, heading_style, styles):
     
     return story
 
+def create_map(analysis_data, heading_style, styles):
+    """Erstelle Kartenausschnitt (Bild aus map_snapshot)"""
+    
+    story = []
+    story.append(Paragraph("🗺️ Karte", heading_style))
+    
+    # Seitenverhältnis des Bildes beibehalten
+    image = Image(analysis_data['map_image'])
+    width = 16*cm
+    image.drawHeight = image.imageHeight * width / image.imageWidth
+    image.drawWidth = width
+    
+    story.append(image)
+    story.append(Spacer(1, 20))
+    
+    return story
+
 def create_detailed_results(analysis_data, heading_style, styles):
     """Erstelle detaillierte Ergebnisse"""
     
@@ -227,6 +337,69 @@ def create_detailed_results(analysis_data, heading_style, styles):
     
     return story
 
+def create_time_curve(analysis_data, heading_style, styles):
+    """Erstelle Score-Verlauf über die Gehzeit"""
+    
+    story = []
+    time_curve = analysis_data['time_curve']
+    minutes = time_curve['minutes']
+    
+    # Überschrift
+    story.append(Paragraph("📈 Score-Verlauf über die Gehzeit", heading_style))
+    
+    # Diagramm
+    drawing = Drawing(16*cm, 6*cm)
+    plot = LinePlot()
+    plot.x = 1*cm
+    plot.y = 1*cm
+    plot.width = 14*cm
+    plot.height = 4.5*cm
+    plot.data = [[(0, 0)] + list(zip(minutes, time_curve['total_scores']))]
+    plot.lines[0].strokeColor = colors.darkblue
+    plot.lines[0].strokeWidth = 2
+    plot.xValueAxis.valueMin = 0
+    plot.xValueAxis.valueMax = max(minutes)
+    plot.xValueAxis.valueSteps = [0] + list(minutes)
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.valueMax = 100
+    plot.yValueAxis.valueStep = 20
+    drawing.add(plot)
+    
+    story.append(drawing)
+    story.append(Spacer(1, 12))
+    
+    # Minimale Gehzeit für volle Punktzahl
+    curve_data = [["Service-Typ", "Volle Punktzahl nach"]]
+    for service_type, full_minutes in time_curve['full_score_minutes'].items():
+        curve_data.append([
+            service_type,
+            f"{full_minutes} Minuten" if full_minutes is not None else "nicht erreicht"
+        ])
+    
+    total_minutes = time_curve['total_full_score_minutes']
+    curve_data.append([
+        "Gesamtscore",
+        f"{total_minutes} Minuten" if total_minutes is not None else "nicht erreicht"
+    ])
+    
+    curve_table = Table(curve_data, colWidths=[6*cm, 6*cm])
+    curve_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ]))
+    
+    story.append(curve_table)
+    story.append(Spacer(1, 20))
+    
+    return story
+
 def create_service_details(analysis_data, heading_style, styles):
     """Erstelle Service-Details"""
     
@@ -323,14 +496,6 @@ def create_footer(analysis_data, styles):
     <i>Generiert am {datetime.now().strftime('%d.%m.%Y um %H:%M Uhr')}</i>
     """
     
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
-    
-    story.append(Paragraph(footer_text, footer_style))
+    story.append(Paragraph(footer_text, styles['Footer']))
     
     return story
\ No newline at end of file
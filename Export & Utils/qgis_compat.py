@@ -0,0 +1,27 @@
+# qgis_compat.py - Logging mit und ohne QGIS
+
+import logging
+
+try:
+    from qgis.core import QgsMessageLog, Qgis
+    QGIS_AVAILABLE = True
+
+except ImportError:
+    # Headless-Betrieb (walkability_cli): Standard-Logging statt Log-Panel
+    QGIS_AVAILABLE = False
+
+    LOGGER = logging.getLogger('walkability_analyzer')
+
+    class Qgis:
+        """Ersatz für die Log-Level von qgis.core.Qgis"""
+        Info = logging.INFO
+        Warning = logging.WARNING
+        Critical = logging.ERROR
+        Success = logging.INFO
+
+    class QgsMessageLog:
+        """Ersatz für qgis.core.QgsMessageLog"""
+
+        @staticmethod
+        def logMessage(message, tag='', level=Qgis.Warning, notifyUser=True):
+            LOGGER.log(level, message)
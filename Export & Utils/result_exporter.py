@@ -0,0 +1,470 @@
+# result_exporter.py - Tabellarische Ausgabe von Batch-Ergebnissen (CSV, GeoJSON, GeoParquet, GeoPackage)
+#
+# Gespeicherte Ergebnisse eines Checkpoint-Protokolls exportieren:
+#   python -m walkability_analyzer.result_exporter lauf.sqlite --parquet ergebnisse.parquet --pois
+
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import struct
+import sys
+from datetime import datetime
+
+from .config import SERVICE_CATEGORIES
+from .gpkg_writer import GeoPackageWriter
+from .layer_store import as_multipolygon
+from .opening_hours import MINUTES_PER_DAY, WEEKDAYS
+
+# Nur prüfen, geladen wird pyarrow erst vom GeoParquet-Export
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+RESULTS_TABLE = 'walkability_results'
+ISOCHRONES_TABLE = 'walkability_isochrones'
+POIS_TABLE = 'walkability_pois'
+
+POI_FIELDS = [
+    ('origin_index', 'INTEGER'), ('location', 'TEXT'), ('name', 'TEXT'),
+    ('service_type', 'TEXT'), ('osm_type', 'TEXT'), ('osm_id', 'TEXT')
+]
+
+# Zeilen pro Parquet-Row-Group (begrenzt den Speicher beim Schreiben)
+PARQUET_BATCH_SIZE = 10000
+
+
+def result_fields():
+    """Spalten von result_row mit SQL-Typ"""
+    score_fields = [(f"{service_type}_{suffix}", sql_type)
+                    for service_type in SERVICE_CATEGORIES
+                    for suffix, sql_type in (('count', 'INTEGER'), ('score', 'REAL'))]
+    return [
+        ('origin_index', 'INTEGER'), ('name', 'TEXT'), ('lat', 'REAL'), ('lon', 'REAL'),
+        ('time_limit', 'INTEGER'), ('services', 'TEXT'), ('at_time', 'TEXT'),
+        ('total_score', 'REAL'), ('total_services', 'INTEGER')
+    ] + score_fields + [('error', 'TEXT')]
+
+
+def result_item(result):
+    """Gespeichertes Ergebnis (CheckpointStore.iter_results) als Item für die Writer"""
+    return {
+        'index': result.get('index'),
+        'location_name': result['location_name'],
+        'coordinates': result['coordinates'],
+        'time_limit': result['time_limit'],
+        'service_types': result['service_types'],
+        'result': result,
+        'error': None
+    }
+
+
+def result_row(item):
+    """
+    Flache Zeile für ein Standort-Ergebnis der PipelineExecutor
+
+    :param item: Dict mit 'location_name', 'coordinates', 'result', 'error'
+    :return: Dict Spaltenname -> Wert
+    """
+    lon, lat = item['coordinates']
+    row = {
+        'origin_index': item.get('index'),
+        'name': item['location_name'],
+        'lat': lat,
+        'lon': lon,
+        'time_limit': item['time_limit'],
+        'services': ';'.join(item['service_types']),
+        'at_time': item['result'].get('at_time') if item.get('result') else None,
+        'total_score': None,
+        'total_services': None
+    }
+
+    score = item['result']['score'] if item.get('result') else None
+    for service_type in SERVICE_CATEGORIES:
+        service_score = score['service_scores'].get(service_type) if score else None
+        row[f"{service_type}_count"] = service_score['count'] if service_score else None
+        row[f"{service_type}_score"] = round(service_score['raw_score'], 2) if service_score else None
+
+    if score:
+        row['total_score'] = round(score['total_score'], 2)
+        row['total_services'] = score['total_services']
+
+    row['error'] = item.get('error') or ''
+    return row
+
+
+def poi_rows(item, origin_index=None):
+    """
+    Zeilen der gefundenen POIs eines Standort-Ergebnisses
+
+    :return: Generator von (lon, lat, Dict Spaltenname -> Wert)
+    """
+    result = item.get('result')
+    if not result:
+        return
+    for service_type, pois in result['services'].items():
+        for poi in pois:
+            yield poi['lon'], poi['lat'], {
+                'origin_index': origin_index if origin_index is not None else item.get('index'),
+                'location': item['location_name'],
+                'name': poi['name'],
+                'service_type': service_type,
+                'osm_type': poi['osm_type'],
+                'osm_id': str(poi['id'])
+            }
+
+
+def pois_path(path):
+    """Zieldatei der POIs neben der Ergebnisdatei (ergebnisse.csv -> ergebnisse_pois.csv)"""
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_pois{extension}"
+
+
+class CsvResultWriter:
+    """Schreibt ein Standort-Ergebnis pro Zeile, sobald es vorliegt"""
+
+    def __init__(self, path, pois=False):
+        """
+        :param path: Ziel-CSV
+        :param pois: POIs zusätzlich in <Name>_pois.csv (mit lat/lon)
+        """
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+        self.count = 0
+
+        self.poi_file = None
+        self.poi_writer = None
+        if pois:
+            self.poi_file = open(pois_path(path), 'w', newline='', encoding='utf-8')
+            self.poi_writer = csv.DictWriter(
+                self.poi_file, fieldnames=[name for name, _ in POI_FIELDS] + ['lat', 'lon'])
+            self.poi_writer.writeheader()
+
+    def write(self, item):
+        row = result_row(item)
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row.keys()))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+        if self.poi_writer is not None:
+            for lon, lat, poi_row in poi_rows(item, row['origin_index']):
+                poi_row['lat'], poi_row['lon'] = lat, lon
+                self.poi_writer.writerow(poi_row)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        if self.poi_file is not None:
+            self.poi_file.close()
+
+
+class WeeklyScoreWriter:
+    """
+    Score im Wochenverlauf: eine Zeile pro Standort und Zeitpunkt
+
+    Wertet die Öffnungszeiten der gefundenen POIs mit
+    WalkabilityAnalyzer.calculate_weekly_scores aus (Standard: jede Stunde,
+    168 Zeilen pro Standort); fehlgeschlagene Standorte fehlen.
+    """
+
+    def __init__(self, path, step_minutes=60):
+        from .walkability_engine import WalkabilityAnalyzer
+
+        self.analyzer = WalkabilityAnalyzer()
+        self.step_minutes = step_minutes
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=[
+            'origin_index', 'name', 'weekday', 'time', 'week_minute', 'total_score'
+        ] + [f"{service_type}_open" for service_type in SERVICE_CATEGORIES])
+        self.writer.writeheader()
+        self.count = 0
+
+    def write(self, item):
+        result = item.get('result')
+        if not result:
+            return
+        weekly = self.analyzer.calculate_weekly_scores(result['services'], item['service_types'], self.step_minutes)
+        for slot, (minute, total_score) in enumerate(zip(weekly['week_minutes'], weekly['total_scores'])):
+            day, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+            row = {
+                'origin_index': item.get('index'),
+                'name': item['location_name'],
+                'weekday': WEEKDAYS[day],
+                'time': f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}",
+                'week_minute': minute,
+                'total_score': round(total_score, 2)
+            }
+            for service_type in SERVICE_CATEGORIES:
+                counts = weekly['open_counts'].get(service_type)
+                row[f"{service_type}_open"] = counts[slot] if counts else None
+            self.writer.writerow(row)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class GeoJsonSeqResultWriter:
+    """
+    Zeilenweises GeoJSON (ein Feature pro Zeile, GeoJSONSeq/NDJSON)
+
+    Jedes Feature wird sofort geschrieben; die Datei lässt sich ebenso
+    zeilenweise lesen (z.B. GDAL-Treiber GeoJSONSeq, Data-Warehouse-Loader).
+    """
+
+    def __init__(self, path, pois=False):
+        """
+        :param path: Zieldatei (.geojsonl / .geojsons)
+        :param pois: POIs zusätzlich in <Name>_pois.<Endung>
+        """
+        self.file = open(path, 'w', encoding='utf-8')
+        self.poi_file = open(pois_path(path), 'w', encoding='utf-8') if pois else None
+        self.count = 0
+
+    @staticmethod
+    def _write_feature(file, lon, lat, properties):
+        file.write(json.dumps({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': properties
+        }, ensure_ascii=False, separators=(',', ':')))
+        file.write('\n')
+
+    def write(self, item):
+        row = result_row(item)
+        self._write_feature(self.file, row['lon'], row['lat'], row)
+
+        if self.poi_file is not None:
+            for lon, lat, poi_row in poi_rows(item, row['origin_index']):
+                self._write_feature(self.poi_file, lon, lat, poi_row)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        if self.poi_file is not None:
+            self.poi_file.close()
+
+
+def _point_wkb(lon, lat):
+    """Punkt als WKB (Little Endian)"""
+    return struct.pack('<BIdd', 1, 1, lon, lat)
+
+
+class _ParquetTable:
+    """Eine GeoParquet-Datei, die in Row-Groups von batch_size Zeilen geschrieben wird"""
+
+    ARROW_TYPES = {'INTEGER': 'int64', 'REAL': 'float64', 'TEXT': 'string'}
+
+    def __init__(self, path, fields, batch_size):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.fields = fields
+        self.batch_size = batch_size
+        self.columns = {name: [] for name, _ in fields}
+        self.geometries = []
+
+        schema = pyarrow.schema(
+            [(name, getattr(pyarrow, self.ARROW_TYPES[sql_type])()) for name, sql_type in fields]
+            + [('geometry', pyarrow.binary())])
+        # GeoParquet 1.0: Geometrie als WKB, ohne Angabe des CRS gilt OGC:CRS84 (lon/lat)
+        geo = {
+            'version': '1.0.0',
+            'primary_column': 'geometry',
+            'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': ['Point']}}
+        }
+        self.schema = schema.with_metadata({b'geo': json.dumps(geo).encode('utf-8')})
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def append(self, lon, lat, row):
+        for name, values in self.columns.items():
+            values.append(row.get(name))
+        self.geometries.append(_point_wkb(lon, lat))
+        if len(self.geometries) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.geometries:
+            return
+        pyarrow = self.pyarrow
+        arrays = [pyarrow.array(self.columns[name], type=self.schema.field(name).type) for name, _ in self.fields]
+        arrays.append(pyarrow.array(self.geometries, type=pyarrow.binary()))
+        self.writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema))
+        for values in self.columns.values():
+            values.clear()
+        self.geometries.clear()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class GeoParquetResultWriter:
+    """
+    Standorte (und optional POIs) als GeoParquet (benötigt pyarrow)
+
+    Zeilen werden spaltenweise gepuffert und je PARQUET_BATCH_SIZE Zeilen
+    als Row-Group geschrieben; der Speicherbedarf hängt nicht von der
+    Anzahl der Standorte ab.
+    """
+
+    def __init__(self, path, pois=False, batch_size=PARQUET_BATCH_SIZE):
+        """
+        :param path: Zieldatei (.parquet)
+        :param pois: POIs zusätzlich in <Name>_pois.parquet
+        :param batch_size: Zeilen pro Row-Group
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow ist nicht installiert. Bitte installieren Sie es mit: pip install pyarrow")
+
+        self.results = _ParquetTable(path, result_fields(), batch_size)
+        self.pois = _ParquetTable(pois_path(path), POI_FIELDS, batch_size) if pois else None
+        self.count = 0
+
+    def write(self, item):
+        row = result_row(item)
+        self.results.append(row['lon'], row['lat'], row)
+
+        if self.pois is not None:
+            for lon, lat, poi_row in poi_rows(item, row['origin_index']):
+                self.pois.append(lon, lat, poi_row)
+        self.count += 1
+
+    def close(self):
+        self.results.close()
+        if self.pois is not None:
+            self.pois.close()
+
+
+class GeoPackageResultWriter:
+    """Schreibt Standorte, Isochronen und POIs in drei GeoPackage-Tabellen"""
+
+    # Zwischenspeichern in Blöcken statt nach jedem Standort
+    COMMIT_INTERVAL = 50
+
+    def __init__(self, path):
+        self.gpkg = GeoPackageWriter(path)
+        self.count = 0
+        self._create_tables()
+
+    def _create_tables(self):
+        self.gpkg.create_table(RESULTS_TABLE, 'POINT', result_fields())
+
+        self.gpkg.create_table(ISOCHRONES_TABLE, 'MULTIPOLYGON', [
+            ('origin_index', 'INTEGER'), ('name', 'TEXT'), ('time_limit', 'INTEGER')
+        ])
+
+        self.gpkg.create_table(POIS_TABLE, 'POINT', POI_FIELDS)
+
+    def write(self, item):
+        row = result_row(item)
+        self.gpkg.insert(RESULTS_TABLE, [({'type': 'Point', 'coordinates': item['coordinates']}, row)])
+
+        result = item.get('result')
+        if result:
+            self.gpkg.insert(ISOCHRONES_TABLE, (
+                (as_multipolygon(feature['geometry']), {
+                    'origin_index': row['origin_index'],
+                    'name': row['name'],
+                    'time_limit': feature['properties'].get('time_minutes', row['time_limit'])
+                })
+                for feature in result['isochrone'].get('features', [])
+            ))
+
+            self.gpkg.insert(POIS_TABLE, (
+                ({'type': 'Point', 'coordinates': [lon, lat]}, poi_row)
+                for lon, lat, poi_row in poi_rows(item, row['origin_index'])
+            ))
+
+        self.count += 1
+        if self.count % self.COMMIT_INTERVAL == 0:
+            self.gpkg.commit()
+
+    def close(self):
+        self.gpkg.close()
+
+
+def export_results(results, writers):
+    """
+    Ergebnisse nacheinander an alle Writer geben und diese schließen
+
+    :param results: Iterable von Ergebnis-Dicts, z.B. CheckpointStore.iter_results()
+        (wird nicht gesammelt, der Speicherbedarf bleibt konstant)
+    :param writers: Liste von Writern (write(item), close())
+    :return: Anzahl exportierter Ergebnisse
+    """
+    count = 0
+    try:
+        for index, result in enumerate(results):
+            item = result_item(result)
+            if item['index'] is None:
+                item['index'] = index
+            for writer in writers:
+                writer.write(item)
+            count += 1
+    finally:
+        for writer in writers:
+            writer.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='result_exporter', description='Gespeicherte Ergebnisse eines Checkpoint-Protokolls exportieren')
+    parser.add_argument('checkpoint', help='SQLite-Protokoll (walkability_cli --checkpoint)')
+    parser.add_argument('--csv', dest='csv_path', help='Ergebnis-CSV')
+    parser.add_argument('--geojsonseq', dest='geojsonseq_path', help='Zeilenweises GeoJSON (ein Feature pro Zeile)')
+    parser.add_argument('--parquet', dest='parquet_path', help='GeoParquet (benötigt pyarrow)')
+    parser.add_argument('--gpkg', dest='gpkg_path', help='GeoPackage (Standorte, Isochronen, POIs)')
+    parser.add_argument('--pois', action='store_true', help='POIs zusätzlich in <Datei>_pois.<Endung>')
+    parser.add_argument('--weekly', dest='weekly_path', help='Score für jede Stunde der Woche (CSV)')
+    parser.add_argument('--at', type=datetime.fromisoformat, metavar='ZEITPUNKT',
+                        help='Nur Ergebnisse des Laufs mit diesem Zeitpunkt (walkability_cli --at), '
+                             'sonst alle mit Zeitpunkt in der Spalte at_time')
+    args = parser.parse_args(argv)
+
+    from .checkpoint_store import CheckpointStore
+
+    if not os.path.exists(args.checkpoint):
+        sys.stderr.write(f"Protokoll nicht gefunden: {args.checkpoint}\n")
+        return 2
+
+    writers = []
+    try:
+        if args.csv_path:
+            writers.append(CsvResultWriter(args.csv_path, pois=args.pois))
+        if args.geojsonseq_path:
+            writers.append(GeoJsonSeqResultWriter(args.geojsonseq_path, pois=args.pois))
+        if args.parquet_path:
+            writers.append(GeoParquetResultWriter(args.parquet_path, pois=args.pois))
+        if args.gpkg_path:
+            writers.append(GeoPackageResultWriter(args.gpkg_path))
+        if args.weekly_path:
+            writers.append(WeeklyScoreWriter(args.weekly_path))
+    except (OSError, ImportError) as e:
+        for writer in writers:
+            writer.close()
+        sys.stderr.write(f"Export nicht möglich: {str(e)}\n")
+        return 2
+
+    if not writers:
+        sys.stderr.write("Mindestens --csv, --geojsonseq, --parquet, --gpkg oder --weekly angeben\n")
+        return 2
+
+    checkpoint = CheckpointStore(args.checkpoint)
+    try:
+        results = checkpoint.iter_results()
+        if args.at:
+            at_time = args.at.isoformat(timespec='minutes')
+            results = (result for result in results if result.get('at_time') == at_time)
+        count = export_results(results, writers)
+    finally:
+        checkpoint.close()
+
+    sys.stderr.write(f"{count} Ergebnisse exportiert\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
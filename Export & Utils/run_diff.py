@@ -0,0 +1,282 @@
+# run_diff.py - Vergleich zweier gespeicherter Analyse-Läufe
+
+import argparse
+import csv
+import math
+import os
+import sys
+from collections import Counter
+
+from .qgis_compat import QgsMessageLog, Qgis
+from .gpkg_writer import GeoPackageWriter
+
+# POIs, die sich weiter bewegt haben, gelten als geändert
+DEFAULT_MOVE_TOLERANCE_M = 25.0
+
+EARTH_RADIUS_M = 6371000.0
+
+TOTAL_SERVICE = 'Gesamt'
+
+POI_DIFF_FIELDS = [
+    ('change', 'TEXT'), ('element_type', 'TEXT'), ('osm_id', 'TEXT'), ('service_type', 'TEXT'),
+    ('name', 'TEXT'), ('name_before', 'TEXT'), ('location', 'TEXT'), ('moved_m', 'REAL')
+]
+
+DELTA_FIELDS = [
+    ('location', 'TEXT'), ('service_type', 'TEXT'),
+    ('count_before', 'INTEGER'), ('count_after', 'INTEGER'), ('count_delta', 'INTEGER'),
+    ('score_before', 'REAL'), ('score_after', 'REAL'), ('score_delta', 'REAL')
+]
+
+DIFF_CHANGES = ('added', 'removed', 'changed')
+
+
+def _distance_m(lon1, lat1, lon2, lat2):
+    """Näherungsweise Entfernung in Metern (für kurze Strecken ausreichend)"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_M * math.hypot(x, y)
+
+
+def _index_pois(rows, with_element_type):
+    """
+    Hash-Index der POIs eines Laufs
+
+    Schlüssel ist (OSM-Elementtyp, OSM-ID, Service-Typ). Ein POI, der in
+    mehreren Standorten eines Laufs liegt, wird nur einmal gezählt.
+    """
+    index = {}
+    for element_type, osm_id, service_type, name, osm_type, location, lon, lat in rows:
+        key = (element_type if with_element_type else None, osm_id, service_type)
+        if key not in index:
+            index[key] = {'element_type': element_type, 'osm_id': osm_id, 'service_type': service_type,
+                          'name': name or '', 'location': location, 'lon': lon, 'lat': lat}
+    return index
+
+
+def diff_runs(store, before_run_ids, after_run_ids, move_tolerance_m=DEFAULT_MOVE_TOLERANCE_M):
+    """
+    Unterschiede zwischen zwei Analyse-Ständen
+
+    POIs werden über Hash-Indizes nach OSM-Typ und -ID verknüpft, sodass
+    der Vergleich linear mit der Anzahl der POIs wächst (auch bei
+    stadtweiten Ständen mit zehntausenden POIs). Standorte werden über ihren
+    Namen verknüpft; jeder Standort darf pro Stand nur in einem Lauf vorkommen.
+
+    :param store: AnalysisLayerStore
+    :param before_run_ids: Lauf-ID oder Liste von Lauf-IDs (alter Stand)
+    :param after_run_ids: Lauf-ID oder Liste von Lauf-IDs (neuer Stand)
+    :param move_tolerance_m: Mindestverschiebung für 'changed'
+    :return: Dict mit 'added', 'removed', 'changed' (POI-Dicts) und
+        'deltas' (eine Zeile pro Standort und Service-Typ, DELTA_FIELDS)
+    :raises ValueError: wenn ein Standort in mehreren Läufen eines Stands vorkommt
+    """
+    if isinstance(before_run_ids, str):
+        before_run_ids = [before_run_ids]
+    if isinstance(after_run_ids, str):
+        after_run_ids = [after_run_ids]
+
+    before_centers = _centers_by_location(store.run_centers(before_run_ids))
+    after_centers = _centers_by_location(store.run_centers(after_run_ids))
+
+    before_rows = store.run_pois(before_run_ids)
+    after_rows = store.run_pois(after_run_ids)
+
+    # Läufe älterer Versionen enthalten keinen Elementtyp; dann nur über die ID verknüpfen
+    with_element_type = all(row[0] for row in before_rows) and all(row[0] for row in after_rows)
+    before = _index_pois(before_rows, with_element_type)
+    after = _index_pois(after_rows, with_element_type)
+
+    added = [poi for key, poi in after.items() if key not in before]
+    removed = [poi for key, poi in before.items() if key not in after]
+
+    changed = []
+    for key in after.keys() & before.keys():
+        old, new = before[key], after[key]
+        moved = _distance_m(old['lon'], old['lat'], new['lon'], new['lat'])
+        if old['name'] != new['name'] or moved > move_tolerance_m:
+            changed.append(dict(new, name_before=old['name'], moved_m=round(moved, 1)))
+
+    for change, pois in (('added', added), ('removed', removed), ('changed', changed)):
+        for poi in pois:
+            poi['change'] = change
+
+    deltas = _score_deltas(before_centers, after_centers, before_rows, after_rows)
+
+    QgsMessageLog.logMessage(
+        f"Run diff: {len(before)} -> {len(after)} POIs, {len(added)} added, {len(removed)} removed, "
+        f"{len(changed)} changed, {len(deltas)} delta rows",
+        level=Qgis.Info)
+
+    return {'added': added, 'removed': removed, 'changed': changed, 'deltas': deltas}
+
+
+def _centers_by_location(centers):
+    """
+    Standorte eines Stands nach Namen
+
+    Wiederholte Läufe desselben Standorts würden Anzahlen und Scores
+    vermischen und werden deshalb abgelehnt.
+    """
+    by_location = {}
+    for center in centers:
+        other = by_location.setdefault(center['location'], center)
+        if other is not center:
+            raise ValueError(f"Standort {center['location']} kommt in mehreren Läufen vor "
+                             f"({other['run_id']}, {center['run_id']}); bitte nur einen Lauf pro Standort angeben")
+    return by_location
+
+
+def _score_deltas(before_by_location, after_by_location, before_rows, after_rows):
+    """Anzahl und Score pro Standort und Service-Typ vorher/nachher"""
+    before_counts = Counter((row[5], row[2]) for row in before_rows)
+    after_counts = Counter((row[5], row[2]) for row in after_rows)
+
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+
+    def delta(old, new):
+        return rounded(new - old) if old is not None and new is not None else None
+
+    rows = []
+    for location in sorted(before_by_location.keys() | after_by_location.keys()):
+        old = before_by_location.get(location)
+        new = after_by_location.get(location)
+        center = new or old
+        old_scores = old['service_scores'] if old else {}
+        new_scores = new['service_scores'] if new else {}
+
+        for service_type in sorted(old_scores.keys() | new_scores.keys()):
+            count_before = before_counts[(location, service_type)] if old else None
+            count_after = after_counts[(location, service_type)] if new else None
+            rows.append({
+                'location': location, 'service_type': service_type,
+                'count_before': count_before, 'count_after': count_after,
+                'count_delta': count_after - count_before if old and new else None,
+                'score_before': rounded(old_scores.get(service_type)),
+                'score_after': rounded(new_scores.get(service_type)),
+                'score_delta': delta(old_scores.get(service_type), new_scores.get(service_type)),
+                'lon': center['lon'], 'lat': center['lat']
+            })
+
+        score_before = old['total_score'] if old else None
+        score_after = new['total_score'] if new else None
+        rows.append({
+            'location': location, 'service_type': TOTAL_SERVICE,
+            'count_before': None, 'count_after': None, 'count_delta': None,
+            'score_before': rounded(score_before), 'score_after': rounded(score_after),
+            'score_delta': delta(score_before, score_after),
+            'lon': center['lon'], 'lat': center['lat']
+        })
+
+    return rows
+
+
+def write_diff_geopackage(path, diff):
+    """
+    Vergleich in ein GeoPackage schreiben
+
+    Tabellen diff_added, diff_removed, diff_changed (POIs) und diff_deltas
+    (Punkte an den Standorten).
+    """
+    gpkg = GeoPackageWriter(path)
+    try:
+        for change in DIFF_CHANGES:
+            table = f"diff_{change}"
+            gpkg.create_table(table, 'POINT', POI_DIFF_FIELDS)
+            gpkg.insert(table, (({'type': 'Point', 'coordinates': [poi['lon'], poi['lat']]},
+                                 {name: poi.get(name) for name, _ in POI_DIFF_FIELDS})
+                                for poi in diff[change]))
+
+        gpkg.create_table('diff_deltas', 'POINT', DELTA_FIELDS)
+        gpkg.insert('diff_deltas', (({'type': 'Point', 'coordinates': [row['lon'], row['lat']]},
+                                     {name: row[name] for name, _ in DELTA_FIELDS})
+                                    for row in diff['deltas']))
+    finally:
+        gpkg.close()
+
+
+def write_delta_csv(path, diff):
+    """Delta-Tabelle als CSV schreiben"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in DELTA_FIELDS], extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(diff['deltas'])
+
+
+def resolve_run_ids(runs, selectors):
+    """
+    Lauf-IDs zu Angaben auf der Kommandozeile
+
+    Eine Angabe ist eine vollständige Lauf-ID oder ein Präfix, z.B. 202406
+    für alle Läufe im Juni 2024 (Lauf-IDs beginnen mit dem Zeitstempel).
+    """
+    run_ids = []
+    for selector in selectors:
+        matches = [run['run_id'] for run in runs if run['run_id'].startswith(selector)]
+        if not matches:
+            raise ValueError(f"Kein gespeicherter Lauf zu {selector}")
+        run_ids.extend(run_id for run_id in matches if run_id not in run_ids)
+    return run_ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='run_diff', description='Vergleich zweier gespeicherter Analyse-Stände')
+    parser.add_argument('store', help='GeoPackage mit gespeicherten Läufen (walkability_runs.gpkg)')
+    parser.add_argument('--list', action='store_true', help='Gespeicherte Läufe auflisten')
+    parser.add_argument('--before', nargs='+', metavar='LAUF', help='Alter Stand: Lauf-IDs oder ID-Präfixe')
+    parser.add_argument('--after', nargs='+', metavar='LAUF', help='Neuer Stand: Lauf-IDs oder ID-Präfixe')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_MOVE_TOLERANCE_M,
+                        help=f'Mindestverschiebung in Metern für geänderte POIs (Standard: {DEFAULT_MOVE_TOLERANCE_M:g})')
+    parser.add_argument('--csv', dest='csv_path', help='Delta-Tabelle als CSV')
+    parser.add_argument('--gpkg', dest='gpkg_path', help='POI-Änderungen und Delta-Tabelle als GeoPackage')
+    args = parser.parse_args(argv)
+
+    from .layer_store import AnalysisLayerStore
+
+    if not os.path.exists(args.store):
+        sys.stderr.write(f"Store nicht gefunden: {args.store}\n")
+        return 2
+
+    store = AnalysisLayerStore(args.store)
+    runs = store.list_runs()
+
+    if args.list:
+        for run in runs:
+            score = '' if run['total_score'] is None else f"{run['total_score']:.1f}"
+            print(f"{run['run_id']}\t{run['created_at']}\t{run['location']}\t{score}")
+        return 0
+
+    if not (args.before and args.after):
+        sys.stderr.write("--before und --after angeben (oder --list)\n")
+        return 2
+    if not (args.csv_path or args.gpkg_path):
+        sys.stderr.write("Mindestens --csv oder --gpkg angeben\n")
+        return 2
+
+    try:
+        before_run_ids = resolve_run_ids(runs, args.before)
+        after_run_ids = resolve_run_ids(runs, args.after)
+    except ValueError as e:
+        sys.stderr.write(f"{str(e)}\n")
+        return 2
+
+    try:
+        diff = diff_runs(store, before_run_ids, after_run_ids, args.tolerance)
+    except ValueError as e:
+        sys.stderr.write(f"{str(e)}\n")
+        return 2
+
+    if args.csv_path:
+        write_delta_csv(args.csv_path, diff)
+    if args.gpkg_path:
+        write_diff_geopackage(args.gpkg_path, diff)
+
+    sys.stderr.write(f"{len(diff['added'])} neue, {len(diff['removed'])} entfernte, "
+                     f"{len(diff['changed'])} geänderte POIs\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,22 @@
 # walkability_analyzer_dialog.py - Erweiterte GUI-Logik
 
 from qgis.PyQt import uic
-from qgis.PyQt.QtWidgets import QDialog, QMessageBox, QFileDialog
-from qgis.PyQt.QtCore import pyqtSlot, QThread, pyqtSignal
+from qgis.PyQt.QtWidgets import QDialog, QMessageBox, QFileDialog, QCompleter
+from qgis.PyQt.QtCore import pyqtSlot, QThread, pyqtSignal, QUrl, QPointF, QTimer, QStringListModel, Qt, QDateTime
+from qgis.PyQt.QtGui import QImage, QPainter, QPen, QColor, QPolygonF, QTextDocument
 from qgis.core import QgsMessageLog, Qgis
 import os
 import re
-import requests
 from datetime import datetime
-from .config import MUENSTER_DISTRICTS, SERVICE_CATEGORIES, is_valid_coordinate, is_in_muenster_area, NOMINATIM_URL
+from .config import MUENSTER_DISTRICTS, SERVICE_CATEGORIES, is_valid_coordinate, is_in_muenster_area
+from .geocoding import get_geocoder
+from .gazetteer import get_gazetteer
 
-# UI-Datei laden
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'walkability_analyzer_dialog_base.ui'))
+# UI-Datei, erst beim Erstellen des Dialogs geladen
+UI_PATH = os.path.join(os.path.dirname(__file__), 'walkability_analyzer_dialog_base.ui')
+
+# Wartezeit nach der letzten Eingabe, bevor Adressvorschläge aktualisiert werden
+AUTOCOMPLETE_DELAY_MS = 150
 
 class GeocodeWorker(QThread):
     """Background worker for geocoding addresses"""
@@ -35,48 +39,25 @@ class GeocodeWorker(QThread):
             self.finished.emit(False, {})
     
     def geocode_address(self, address):
-        """Geocode address using Nominatim"""
+        """Geocode address using Nominatim (cached, rate-limited)"""
         try:
-            # Add Münster to improve results if not present
-            if 'münster' not in address.lower() and '48' not in address:
-                address += ', Münster, Germany'
-            
-            params = {
-                'q': address,
-                'format': 'json',
-                'limit': 1,
-                'countrycodes': 'de',
-                'addressdetails': 1
-            }
-            
-            response = requests.get(NOMINATIM_URL, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    result = data[0]
-                    return {
-                        'lat': float(result['lat']),
-                        'lon': float(result['lon']),
-                        'display_name': result['display_name']
-                    }
-            
-            return None
-            
+            return get_geocoder().geocode(address)
         except Exception as e:
             QgsMessageLog.logMessage(f"Geocoding request error: {str(e)}", level=Qgis.Warning)
             return None
 
-class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
+class WalkabilityAnalyzerDialog(QDialog):
     def __init__(self, parent=None):
         super(WalkabilityAnalyzerDialog, self).__init__(parent)
-        self.setupUi(self)
+        uic.loadUi(UI_PATH, self)
         
         # Variablen für Ergebnisse
         self.current_analysis = None
         self.current_layers = []
         self.current_coordinates = None
         self.geocode_worker = None
+        self.analysis_tasks = []
+        self.snapshot_tasks = []
         
         # GUI initialisieren
         self.init_gui()
@@ -106,6 +87,17 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
         self.checkBox_restaurant.setChecked(False)
         self.checkBox_bank.setChecked(False)
         
+        # Score-Verlauf standardmäßig aus
+        self.checkBox_time_curve.setChecked(False)
+        
+        # Ergebnis-Layer standardmäßig als Memory-Layer
+        self.checkBox_store_layers.setChecked(False)
+        
+        # Öffnungszeiten standardmäßig ignorieren, Zeitpunkt: jetzt
+        self.checkBox_at_time.setChecked(False)
+        self.dateTimeEdit_at.setDateTime(QDateTime.currentDateTime())
+        self.dateTimeEdit_at.setEnabled(False)
+        
         # Tab standardmäßig auf Stadtteil setzen
         self.tabWidget_location.setCurrentIndex(0)
         
@@ -124,18 +116,37 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
         # Address validation
         self.lineEdit_address.textChanged.connect(self.validate_address)
         
+        # Adressvorschläge aus dem lokalen Adressverzeichnis
+        self.address_model = QStringListModel(self)
+        completer = QCompleter(self.address_model, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.activated[str].connect(self.on_address_suggestion_activated)
+        self.lineEdit_address.setCompleter(completer)
+        
+        self.autocomplete_timer = QTimer(self)
+        self.autocomplete_timer.setSingleShot(True)
+        self.autocomplete_timer.setInterval(AUTOCOMPLETE_DELAY_MS)
+        self.autocomplete_timer.timeout.connect(self.update_address_suggestions)
+        self.lineEdit_address.textEdited.connect(lambda _: self.autocomplete_timer.start())
+        
     def connect_signals(self):
         """Event-Handler verbinden"""
         
         # Slider-Änderung
         self.slider_time.valueChanged.connect(self.update_time_label)
         
+        # Zeitpunkt nur mit aktivierter Checkbox
+        self.checkBox_at_time.toggled.connect(self.dateTimeEdit_at.setEnabled)
+        
         # Tab-Wechsel
         self.tabWidget_location.currentChanged.connect(self.on_location_tab_changed)
         
         # Button-Klicks
         self.pushButton_analyze.clicked.connect(self.analyze_walkability)
         self.pushButton_export.clicked.connect(self.export_pdf)
+        self.pushButton_batch.clicked.connect(self.analyze_batch)
+        self.pushButton_catchments.clicked.connect(self.analyze_catchments)
         self.pushButton_reset.clicked.connect(self.reset_analysis)
         self.pushButton_close.clicked.connect(self.close)
         self.pushButton_geocode.clicked.connect(self.geocode_address)
@@ -210,6 +221,28 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
             self.pushButton_geocode.setEnabled(False)
             self.current_coordinates = None
     
+    def update_address_suggestions(self):
+        """Vorschläge für die aktuelle Eingabe (nach kurzer Tipp-Pause)"""
+        gazetteer = get_gazetteer()
+        if gazetteer is None:
+            return
+        
+        suggestions = gazetteer.complete(self.lineEdit_address.text())
+        self.address_model.setStringList(suggestions)
+        if suggestions:
+            self.lineEdit_address.completer().complete()
+    
+    def on_address_suggestion_activated(self, text):
+        """
+        Gewählten Vorschlag übernehmen und geocodieren
+        
+        activated kommt vor dem Übernehmen des Textes durch den Completer,
+        daher wird der Vorschlag selbst gesetzt statt die Eingabe zu lesen.
+        """
+        self.autocomplete_timer.stop()
+        self.lineEdit_address.setText(text)
+        self.geocode_address()
+    
     def geocode_address(self):
         """Geocodiere eingegebene Adresse"""
         address = self.lineEdit_address.text().strip()
@@ -218,6 +251,13 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
             QMessageBox.warning(self, "Fehler", "Bitte geben Sie eine Adresse ein!")
             return
         
+        # Lokales Adressverzeichnis zuerst, Nominatim nur für unbekannte Adressen
+        gazetteer = get_gazetteer()
+        result = gazetteer.lookup(address) if gazetteer is not None else None
+        if result is not None:
+            self.on_geocode_finished(True, result)
+            return
+        
         # UI während Geocoding deaktivieren
         self.pushButton_geocode.setEnabled(False)
         self.pushButton_geocode.setText("🔄 Suche...")
@@ -286,6 +326,12 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
         
         return None, None
     
+    def get_analysis_time(self):
+        """Gewählter Zeitpunkt für Öffnungszeiten (datetime) oder None"""
+        if not self.checkBox_at_time.isChecked():
+            return None
+        return self.dateTimeEdit_at.dateTime().toPyDateTime().replace(second=0, microsecond=0)
+    
     def get_selected_services(self):
         """Ausgewählte Services zurückgeben"""
         services = []
@@ -331,6 +377,9 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
             self.textBrowser_results.append(f"📍 Koordinaten: {coordinates[1]:.6f}, {coordinates[0]:.6f}")
             self.textBrowser_results.append(f"⏱️ Maximale Gehzeit: {time_limit} Minuten")
             self.textBrowser_results.append(f"🏪 Services: {', '.join(services)}")
+            at_time = self.get_analysis_time()
+            if at_time:
+                self.textBrowser_results.append(f"🕐 Nur geöffnete Services am {at_time.strftime('%d.%m.%Y %H:%M')}")
             self.textBrowser_results.append("─" * 50)
             
             # Hier kommt die echte Analyse-Logik
@@ -342,41 +391,202 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
                                    level=Qgis.Critical)
     
     def perform_analysis(self, location_name, coordinates, time_limit, services):
-        """Echte Walkability-Analyse durchführen"""
+        """Walkability-Analyse als abbrechbaren Hintergrund-Task starten"""
         
         try:
-            # Analyzer importieren
-            from .walkability_engine import get_walkability_analyzer
-            analyzer = get_walkability_analyzer()
+            from .analysis_task import WalkabilityAnalysisTask, submit_analysis_task
             
-            # Analyse durchführen
-            self.textBrowser_results.append("🔄 Starte Analyse...")
+            layer_store = None
+            if self.checkBox_store_layers.isChecked():
+                from .layer_store import AnalysisLayerStore
+                layer_store = AnalysisLayerStore()
+            
+            task = WalkabilityAnalysisTask(
+                location_name, coordinates, time_limit, services,
+                time_curve=self.checkBox_time_curve.isChecked(),
+                layer_store=layer_store,
+                at_time=self.get_analysis_time())
+            
+            task.stageChanged.connect(self.textBrowser_results.append)
+            task.analysisFinished.connect(lambda result, task=task: self.on_analysis_finished(task, result))
+            task.analysisFailed.connect(lambda message, task=task: self.on_analysis_failed(task, message))
+            
+            # Referenz halten, bis der Task beendet ist
+            self.analysis_tasks.append(task)
+            submit_analysis_task(task)
+            
+            if len(self.analysis_tasks) > 1:
+                self.textBrowser_results.append(
+                    f"⏳ Analyse eingereiht ({len(self.analysis_tasks)} laufende Analysen)")
+            else:
+                self.textBrowser_results.append("🔄 Starte Analyse im Hintergrund...")
+            
+        except Exception as e:
+            self.textBrowser_results.append(f"❌ Fehler bei der Analyse: {str(e)}")
+            QgsMessageLog.logMessage(f"Analysis Error: {str(e)}", level=Qgis.Critical)
+    
+    def analyze_batch(self):
+        """Standorte aus CSV/GeoJSON analysieren, Ergebnisse schrittweise als Layer"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Standorte für Batch-Analyse", "",
+            "Standorte (*.csv *.geojson *.json);;CSV-Dateien (*.csv);;GeoJSON (*.geojson *.json)")
+        if not file_path:
+            return
+        
+        services = self.get_selected_services()
+        if not services:
+            QMessageBox.warning(self, "Fehler", "Bitte wählen Sie mindestens einen Service aus!")
+            return
+        
+        try:
+            from .walkability_cli import read_origins
+            from .layer_stream import LayerStreamSink
+            from .analysis_task import BatchAnalysisTask, submit_analysis_task
             
-            # API-Verbindung testen
-            if not analyzer.ors_client.test_connection():
-                self.textBrowser_results.append("❌ Keine Verbindung zur OpenRouteService API!")
-                self.textBrowser_results.append("Bitte prüfen Sie Ihre Internetverbindung und den API-Key.")
+            origins = read_origins(file_path, self.slider_time.value(), services)
+            if not origins:
+                QMessageBox.warning(self, "Fehler", "Keine Standorte in der Datei gefunden!")
                 return
             
-            # Hauptanalyse mit benutzerdefinierten Parametern
-            result = analyzer.analyze_custom_location(location_name, coordinates, time_limit, services)
+            # Optional: nach der Analyse ein PDF-Bericht pro Standort
+            pdf_dir = None
+            if QMessageBox.question(
+                    self, "PDF-Berichte",
+                    "Nach der Analyse einen PDF-Bericht pro Standort erstellen?") == QMessageBox.Yes:
+                pdf_dir = QFileDialog.getExistingDirectory(self, "Verzeichnis für PDF-Berichte") or None
+            
+            # Senke auf dem Haupt-Thread erstellen, Layer kommen sofort ins Projekt
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            sink = LayerStreamSink(name=f"Walkability_Batch_{name}", parent=self)
+            task = BatchAnalysisTask(origins, sink, at_time=self.get_analysis_time(),
+                                     collect_reports=pdf_dir is not None)
+            task.pdf_dir = pdf_dir
+            task.batchFinished.connect(lambda stats, task=task: self.on_batch_finished(task, stats))
+            task.batchFailed.connect(lambda message, task=task: self.on_batch_failed(task, message))
             
-            # Ergebnisse anzeigen
-            self.display_results(result)
+            self.analysis_tasks.append(task)
+            submit_analysis_task(task)
             
-            # Layer zu QGIS hinzufügen
-            if 'layers' in result:
-                analyzer.add_layers_to_project(result['layers'])
+            self.textBrowser_results.append(
+                f"🔄 Batch-Analyse: {len(origins)} Standorte aus {os.path.basename(file_path)} "
+                f"(Ergebnisse erscheinen schrittweise auf der Karte)")
+            
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Fehler", f"Standorte konnten nicht gelesen werden: {str(e)}")
+        except Exception as e:
+            self.textBrowser_results.append(f"❌ Fehler bei der Batch-Analyse: {str(e)}")
+            QgsMessageLog.logMessage(f"Batch Analysis Error: {str(e)}", level=Qgis.Critical)
+    
+    def on_batch_finished(self, task, stats):
+        """Abschluss einer Batch-Analyse melden (Layer sind bereits im Projekt)"""
+        self.forget_analysis_task(task)
+        self.textBrowser_results.append(
+            f"✅ Batch-Analyse abgeschlossen: {stats['origins']} Standorte in {stats['elapsed_seconds']:.0f}s, "
+            f"{stats['failed']} fehlgeschlagen")
+        
+        if task.pdf_dir and task.reports:
+            self.export_batch_pdfs(task.reports, task.pdf_dir)
+    
+    def export_batch_pdfs(self, reports, output_dir):
+        """PDF-Berichte mit Kartenbildern im Hintergrund erstellen"""
+        try:
+            from .analysis_task import BatchPdfTask, submit_analysis_task
             
-            # Ergebnisse für Export speichern
-            self.current_analysis = result
-            self.pushButton_export.setEnabled(True)
+            task = BatchPdfTask(reports, output_dir, atlas=True)
+            task.exportFinished.connect(lambda outcomes, task=task: self.on_batch_pdfs_finished(task, outcomes))
+            task.exportFailed.connect(lambda message, task=task: self.on_batch_failed(task, message))
+            self.analysis_tasks.append(task)
+            submit_analysis_task(task)
             
-            self.textBrowser_results.append("✅ Analyse abgeschlossen!")
+            self.textBrowser_results.append(f"📄 Erstelle {len(reports)} PDF-Berichte in {output_dir}...")
             
         except Exception as e:
-            self.textBrowser_results.append(f"❌ Fehler bei der Analyse: {str(e)}")
-            QgsMessageLog.logMessage(f"Analysis Error: {str(e)}", level=Qgis.Critical)
+            self.textBrowser_results.append(f"❌ Fehler beim PDF-Export: {str(e)}")
+            QgsMessageLog.logMessage(f"Batch PDF Error: {str(e)}", level=Qgis.Critical)
+    
+    def on_batch_pdfs_finished(self, task, outcomes):
+        """Abschluss des PDF-Stapelexports melden"""
+        self.forget_analysis_task(task)
+        written = sum(1 for outcome in outcomes if outcome['path'])
+        self.textBrowser_results.append(
+            f"✅ {written} von {len(outcomes)} PDF-Dokumenten in {task.output_dir} erstellt")
+    
+    def on_batch_failed(self, task, message):
+        """Fehler oder Abbruch einer Batch-Analyse melden"""
+        self.forget_analysis_task(task)
+        self.textBrowser_results.append(f"❌ Batch-Analyse: {message}")
+    
+    def analyze_catchments(self):
+        """Einzugsgebiete aller POIs der gewählten Services als Layer"""
+        services = self.get_selected_services()
+        if not services:
+            QMessageBox.warning(self, "Fehler", "Bitte wählen Sie mindestens einen Service aus!")
+            return
+        
+        boundary_path, _ = QFileDialog.getOpenFileName(
+            self, "Stadt- oder Stadtteilgrenze", "", "GeoJSON (*.geojson *.json)")
+        if not boundary_path:
+            return
+        population_path, _ = QFileDialog.getOpenFileName(
+            self, "Einwohnerdaten", "", "Einwohner (*.csv *.geojson *.json)")
+        if not population_path:
+            return
+        
+        try:
+            from .analysis_task import CatchmentTask, submit_analysis_task
+            
+            task = CatchmentTask(boundary_path, population_path, self.slider_time.value(), services)
+            task.catchmentsFinished.connect(lambda stats, task=task: self.on_catchments_finished(task, stats))
+            task.catchmentsFailed.connect(lambda message, task=task: self.on_catchments_failed(task, message))
+            
+            self.analysis_tasks.append(task)
+            submit_analysis_task(task)
+            
+            self.textBrowser_results.append(
+                f"🔄 Einzugsgebiete: {', '.join(services)} in {os.path.basename(boundary_path)} "
+                f"({self.slider_time.value()} Min)")
+            
+        except Exception as e:
+            self.textBrowser_results.append(f"❌ Fehler bei den Einzugsgebieten: {str(e)}")
+            QgsMessageLog.logMessage(f"Catchment Analysis Error: {str(e)}", level=Qgis.Critical)
+    
+    def on_catchments_finished(self, task, stats):
+        """Abschluss der Einzugsgebiete melden (Layer ist bereits im Projekt)"""
+        self.forget_analysis_task(task)
+        self.textBrowser_results.append(f"✅ {stats['catchments']} Einzugsgebiete berechnet")
+        if stats['missing_isochrones']:
+            self.textBrowser_results.append(
+                f"⚠️ {stats['missing_isochrones']} POIs ohne Isochrone, exklusive Einwohner der Nachbarn überschätzt")
+    
+    def on_catchments_failed(self, task, message):
+        """Fehler oder Abbruch der Einzugsgebiete melden"""
+        self.forget_analysis_task(task)
+        self.textBrowser_results.append(f"❌ Einzugsgebiete: {message}")
+    
+    def on_analysis_finished(self, task, result):
+        """Ergebnis eines Analyse-Tasks anzeigen (Layer sind bereits im Projekt)"""
+        self.forget_analysis_task(task)
+        
+        self.display_results(result)
+        
+        if 'time_curve' in result:
+            self.display_time_curve(result['time_curve'])
+        
+        # Ergebnisse für Export speichern
+        self.current_analysis = result
+        self.current_layers = list(result.get('layers', {}).values())
+        self.pushButton_export.setEnabled(True)
+        
+        self.textBrowser_results.append("✅ Analyse abgeschlossen!")
+    
+    def on_analysis_failed(self, task, message):
+        """Fehler oder Abbruch eines Analyse-Tasks melden"""
+        self.forget_analysis_task(task)
+        self.textBrowser_results.append(f"❌ {task.location_name}: {message}")
+    
+    def forget_analysis_task(self, task):
+        if task in self.analysis_tasks:
+            self.analysis_tasks.remove(task)
     
     def display_results(self, result):
         """Analyse-Ergebnisse anzeigen"""
@@ -450,6 +660,63 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
         self.textBrowser_results.append("")
         self.textBrowser_results.append("🗺️ Karten-Layer wurden zu QGIS hinzugefügt.")
     
+    def display_time_curve(self, time_curve):
+        """Score-Verlauf über die Gehzeit anzeigen"""
+        
+        self.textBrowser_results.append("")
+        self.textBrowser_results.append("📈 SCORE-VERLAUF:")
+        self.textBrowser_results.append("=" * 50)
+        
+        # Diagramm als Bild-Ressource des Ergebnis-Dokuments
+        image = self.plot_time_curve(time_curve)
+        self.textBrowser_results.document().addResource(
+            QTextDocument.ImageResource, QUrl("walkability://time_curve"), image)
+        self.textBrowser_results.append('<img src="walkability://time_curve"/>')
+        
+        for minutes, total_score in zip(time_curve['minutes'], time_curve['total_scores']):
+            self.textBrowser_results.append(f"⏱️ {minutes:>2} Min: {total_score:.1f}/100")
+        
+        self.textBrowser_results.append("")
+        self.textBrowser_results.append("🎯 Volle Punktzahl erreicht nach:")
+        for service_type, minutes in time_curve['full_score_minutes'].items():
+            if minutes is None:
+                self.textBrowser_results.append(f"❌ {service_type}: nicht innerhalb der Gehzeit")
+            else:
+                self.textBrowser_results.append(f"✅ {service_type}: {minutes} Minuten")
+    
+    def plot_time_curve(self, time_curve, width=420, height=200):
+        """Zeichne Score-Verlauf als QImage"""
+        
+        image = QImage(width, height, QImage.Format_ARGB32)
+        image.fill(QColor('white'))
+        
+        margin = 30
+        minutes = time_curve['minutes']
+        max_minutes = max(minutes)
+        
+        def to_point(minute, score):
+            x = margin + (width - 2 * margin) * minute / max_minutes
+            y = height - margin - (height - 2 * margin) * score / 100.0
+            return QPointF(x, y)
+        
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # Achsen
+        painter.setPen(QPen(QColor('black'), 1))
+        painter.drawLine(to_point(0, 0), to_point(max_minutes, 0))
+        painter.drawLine(to_point(0, 0), to_point(0, 100))
+        painter.drawText(QPointF(2, margin), "100")
+        painter.drawText(QPointF(width - margin, height - 8), f"{max_minutes} Min")
+        
+        # Gesamtscore
+        painter.setPen(QPen(QColor(70, 130, 180), 2))
+        points = [to_point(0, 0)] + [to_point(m, score) for m, score in zip(minutes, time_curve['total_scores'])]
+        painter.drawPolyline(QPolygonF(points))
+        
+        painter.end()
+        return image
+    
     def export_pdf(self):
         """PDF-Export"""
         if not self.current_analysis:
@@ -463,25 +730,56 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
             self, "PDF speichern", default_name, "PDF-Dateien (*.pdf)")
         
         if file_path:
+            self.textBrowser_results.append(f"📄 Exportiere PDF: {file_path}")
+            analysis = self.current_analysis
+            
+            # Kartenbild aus dem Cache oder offscreen im Hintergrund rendern
             try:
-                # PDF-Export durchführen
-                from .pdf_exporter import export_walkability_pdf
-                
-                self.textBrowser_results.append(f"📄 Exportiere PDF: {file_path}")
-                
-                # PDF erstellen
-                export_walkability_pdf(self.current_analysis, file_path)
-                
-                self.textBrowser_results.append("✅ PDF erfolgreich erstellt!")
-                
-                # Erfolgs-Dialog
-                QMessageBox.information(self, "Export erfolgreich", 
-                                      f"PDF wurde erfolgreich gespeichert:\n{file_path}")
-                
+                from .map_snapshot import MapSnapshotTask
+                from .analysis_task import submit_analysis_task
+                task = MapSnapshotTask(analysis)
             except Exception as e:
-                error_msg = f"Fehler beim PDF-Export: {str(e)}"
-                self.textBrowser_results.append(f"❌ {error_msg}")
-                QMessageBox.critical(self, "Export-Fehler", error_msg)
+                QgsMessageLog.logMessage(f"Map snapshot error: {str(e)}", level=Qgis.Warning)
+                self.write_pdf(analysis, file_path)
+                return
+            
+            if task.path:
+                self.write_pdf(analysis, file_path, task.path)
+                return
+            
+            self.textBrowser_results.append("🗺️ Rendere Karte im Hintergrund...")
+            task.snapshotFinished.connect(
+                lambda path, task=task: self.on_snapshot_finished(task, analysis, file_path, path))
+            self.snapshot_tasks.append(task)
+            submit_analysis_task(task)
+    
+    def on_snapshot_finished(self, task, analysis, file_path, map_image):
+        """PDF schreiben, sobald das Kartenbild vorliegt"""
+        if task in self.snapshot_tasks:
+            self.snapshot_tasks.remove(task)
+        self.write_pdf(analysis, file_path, map_image)
+    
+    def write_pdf(self, analysis, file_path, map_image=None):
+        """PDF erstellen (mit Karte, falls ein Bild vorliegt)"""
+        try:
+            from .pdf_exporter import export_walkability_pdf
+            
+            if map_image:
+                analysis = dict(analysis, map_image=map_image)
+            
+            # PDF erstellen
+            export_walkability_pdf(analysis, file_path)
+            
+            self.textBrowser_results.append("✅ PDF erfolgreich erstellt!")
+            
+            # Erfolgs-Dialog
+            QMessageBox.information(self, "Export erfolgreich", 
+                                  f"PDF wurde erfolgreich gespeichert:\n{file_path}")
+            
+        except Exception as e:
+            error_msg = f"Fehler beim PDF-Export: {str(e)}"
+            self.textBrowser_results.append(f"❌ {error_msg}")
+            QMessageBox.critical(self, "Export-Fehler", error_msg)
     
     def reset_analysis(self):
         """Analyse zurücksetzen"""
@@ -509,6 +807,12 @@ class WalkabilityAnalyzerDialog(QDialog, FORM_CLASS):
             self.geocode_worker.terminate()
             self.geocode_worker.wait()
         
+        # Laufende Analysen abbrechen
+        for task in list(self.analysis_tasks) + list(self.snapshot_tasks):
+            task.cancel()
+        self.analysis_tasks = []
+        self.snapshot_tasks = []
+        
         # Temporäre Daten aufräumen
         self.current_analysis = None
         self.current_layers = []
@@ -0,0 +1,5 @@
+ORS_API_KEY='x'; ORS_BASE_URL='http://localhost:1'; ORS_ISOCHRONE_URL='http://localhost:1/iso'; NOMINATIM_URL='http://localhost:1/n'
+MUENSTER_DISTRICTS={'Centrum':[51.96,7.62]}
+SERVICE_CATEGORIES={'Supermarkt':{'weight':0.3,'min_count':2},'Apotheke':{'weight':0.2,'min_count':1},'Arzt':{'weight':0.2,'min_count':1},'Schule':{'weight':0.15,'min_count':1},'Restaurant':{'weight':0.1,'min_count':3},'Bank':{'weight':0.05,'min_count':1}}
+def is_valid_coordinate(lat, lon): return -90<=lat<=90 and -180<=lon<=180
+def is_in_muenster_area(lat, lon): return 51.8<lat<52.1 and 7.4<lon<7.8
@@ -1,10 +1,62 @@
 # dependency_checker.py - Prüfung der Python-Abhängigkeiten
 
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import re
+import site
 import sys
-import importlib
+import time
 from qgis.PyQt.QtWidgets import QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QTextEdit
-from qgis.PyQt.QtCore import Qt, QThread, pyqtSignal
-from qgis.core import QgsMessageLog, Qgis
+from qgis.PyQt.QtCore import Qt, QThread, QSettings, pyqtSignal
+from qgis.core import QgsApplication, QgsTask, QgsMessageLog, Qgis
+
+# QSettings-Schlüssel des zuletzt gespeicherten Prüfergebnisses
+DEPENDENCY_CACHE_KEY = 'walkability_analyzer/dependency_check'
+
+
+def site_package_directories():
+    """Verzeichnisse, in die pip Pakete installiert"""
+    directories = set(getattr(site, 'getsitepackages', lambda: [])())
+    if site.ENABLE_USER_SITE:
+        directories.add(site.getusersitepackages())
+    directories.update(path for path in sys.path if path.endswith(('site-packages', 'dist-packages')))
+    return sorted(directories)
+
+
+def environment_fingerprint():
+    """
+    Kennung der Python-Umgebung: Interpreter, Version und Änderungszeiten
+    der site-packages-Verzeichnisse
+    
+    Installieren, Aktualisieren oder Entfernen eines Pakets legt Einträge
+    in site-packages an bzw. löscht sie und ändert damit die Kennung.
+    """
+    mtimes = []
+    for directory in site_package_directories():
+        try:
+            mtimes.append([directory, os.stat(directory).st_mtime_ns])
+        except OSError:
+            continue
+    # Geänderte Mindestversionen (Plugin-Update) erfordern ebenfalls eine neue Prüfung
+    requirements = sorted([info['pip_name'], info.get('min_version')]
+                          for info in DependencyChecker.REQUIRED_PACKAGES.values())
+    text = json.dumps([sys.executable, sys.version, mtimes, requirements])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def version_tuple(version):
+    """Vergleichbare Form einer Versionsnummer: '2.0.1' -> (2, 0, 1), '1.8.5.post1' -> (1, 8, 5)"""
+    numbers = []
+    for part in version.split('.'):
+        match = re.match(r'\d+', part)
+        if match is None:
+            break
+        numbers.append(int(match.group(0)))
+    return tuple(numbers)
+
 
 class DependencyInstaller(QThread):
     """Background thread für Package-Installation"""
@@ -164,49 +216,59 @@ Nach der Installation starten Sie QGIS neu.
 class DependencyChecker:
     """Hauptklasse für Abhängigkeits-Prüfung"""
     
-    # Definiere benötigte Pakete
+    # Definiere benötigte Pakete (Mindestversionen wie in requirements.txt)
     REQUIRED_PACKAGES = {
         'requests': {
             'import_name': 'requests',
             'pip_name': 'requests',
+            'min_version': '2.25.0',
             'description': 'HTTP-Bibliothek für API-Aufrufe'
         },
+        'numpy': {
+            'import_name': 'numpy',
+            'pip_name': 'numpy',
+            'min_version': '1.19.0',
+            'description': 'Vektorisierte Berechnungen'
+        },
         'shapely': {
-            'import_name': 'shapely.geometry',
-            'pip_name': 'shapely', 
+            'import_name': 'shapely',
+            'pip_name': 'shapely',
+            'min_version': '2.0',
             'description': 'Geometrie-Verarbeitung'
         },
         'reportlab': {
-            'import_name': 'reportlab.lib.pagesizes',
+            'import_name': 'reportlab',
             'pip_name': 'reportlab',
+            'min_version': '3.6.0',
             'description': 'PDF-Generierung'
         },
         'pyproj': {
             'import_name': 'pyproj',
             'pip_name': 'pyproj',
+            'min_version': '3.2.0',
             'description': 'Koordinaten-Transformationen'
         }
     }
     
     @classmethod
-    def check_dependencies(cls, show_dialog=True):
+    def check_dependencies(cls, show_dialog=True, use_cache=True):
         """
         Prüfe alle Abhängigkeiten
         
+        Das Ergebnis wird über QGIS-Sitzungen hinweg gespeichert und nur neu
+        ermittelt, wenn sich die Python-Umgebung geändert hat.
+        
         :param show_dialog: Zeige Dialog bei fehlenden Paketen
+        :param use_cache: Gespeichertes Ergebnis verwenden, falls gültig
         :return: (alle_vorhanden, fehlende_pakete)
         """
-        missing_packages = []
-        available_packages = []
-        
-        for pkg_key, pkg_info in cls.REQUIRED_PACKAGES.items():
-            try:
-                importlib.import_module(pkg_info['import_name'])
-                available_packages.append(pkg_key)
-                QgsMessageLog.logMessage(f"✅ {pkg_key} available", level=Qgis.Info)
-            except ImportError:
-                missing_packages.append(pkg_info['pip_name'])
-                QgsMessageLog.logMessage(f"❌ {pkg_key} missing", level=Qgis.Warning)
+        fingerprint = environment_fingerprint()
+        missing_packages = cls.cached_result(fingerprint) if use_cache else None
+        if missing_packages is None:
+            missing_packages = cls.find_missing(log=True)
+            cls.store_result(fingerprint, missing_packages)
+        else:
+            QgsMessageLog.logMessage("Dependency check: cached result for this Python environment", level=Qgis.Info)
         
         all_available = len(missing_packages) == 0
         
@@ -222,6 +284,85 @@ class DependencyChecker:
         
         return all_available, missing_packages
     
+    @classmethod
+    def find_missing(cls, log=False):
+        """
+        pip-Namen der fehlenden Pakete (ohne Cache, auch im Hintergrund-Thread)
+        
+        Zu alte Pakete werden als pip-Anforderung mit Mindestversion
+        aufgeführt (z.B. 'shapely>=2.0'), sodass die Installation sie
+        aktualisiert.
+        
+        :param log: Ergebnis pro Paket im Log-Panel ausgeben
+        """
+        # Verzeichnis-Caches der Import-Maschinerie verwerfen (z.B. nach pip install)
+        importlib.invalidate_caches()
+        missing_packages = []
+        
+        for pkg_key, pkg_info in cls.REQUIRED_PACKAGES.items():
+            if not cls.is_installed(pkg_info['import_name']):
+                missing_packages.append(pkg_info['pip_name'])
+                if log:
+                    QgsMessageLog.logMessage(f"❌ {pkg_key} missing", level=Qgis.Warning)
+                continue
+            
+            version = cls.installed_version(pkg_info['pip_name'])
+            min_version = pkg_info.get('min_version')
+            if version and min_version and version_tuple(version) < version_tuple(min_version):
+                missing_packages.append(f"{pkg_info['pip_name']}>={min_version}")
+                if log:
+                    QgsMessageLog.logMessage(
+                        f"❌ {pkg_key} {version} too old, {min_version} required", level=Qgis.Warning)
+            elif log:
+                QgsMessageLog.logMessage(f"✅ {pkg_key} {version or ''} available", level=Qgis.Info)
+        
+        return missing_packages
+    
+    @staticmethod
+    def cached_result(fingerprint):
+        """Fehlende Pakete aus der letzten Prüfung oder None, wenn sich die Umgebung geändert hat"""
+        try:
+            cached = json.loads(QSettings().value(DEPENDENCY_CACHE_KEY, '') or '{}')
+        except (TypeError, ValueError):
+            return None
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        return cached.get('missing')
+    
+    @staticmethod
+    def store_result(fingerprint, missing_packages):
+        """Prüfergebnis sitzungsübergreifend speichern"""
+        QSettings().setValue(DEPENDENCY_CACHE_KEY, json.dumps({
+            'fingerprint': fingerprint,
+            'missing': missing_packages,
+            'checked_at': time.time()
+        }))
+    
+    @staticmethod
+    def is_installed(import_name):
+        """
+        Paket vorhanden, ohne es zu importieren
+        
+        find_spec sucht nur das Modul im Pfad; die Pakete werden erst
+        geladen, wenn sie gebraucht werden.
+        """
+        try:
+            return importlib.util.find_spec(import_name) is not None
+        except (ImportError, ValueError):
+            return False
+    
+    @staticmethod
+    def installed_version(pip_name):
+        """
+        Installierte Version laut Paket-Metadaten, ohne das Paket zu importieren
+        
+        :return: Versions-String oder None, wenn keine Metadaten vorhanden sind
+        """
+        try:
+            return importlib.metadata.version(pip_name)
+        except (importlib.metadata.PackageNotFoundError, ValueError):
+            return None
+    
     @classmethod
     def show_dependency_dialog(cls, missing_packages):
         """Zeige Abhängigkeits-Dialog"""
@@ -240,11 +381,12 @@ class DependencyChecker:
             return False
         
         pkg_info = cls.REQUIRED_PACKAGES[package_key]
-        try:
-            importlib.import_module(pkg_info['import_name'])
-            return True
-        except ImportError:
+        if not cls.is_installed(pkg_info['import_name']):
             return False
+        
+        version = cls.installed_version(pkg_info['pip_name'])
+        min_version = pkg_info.get('min_version')
+        return not (version and min_version and version_tuple(version) < version_tuple(min_version))
     
     @classmethod
     def get_package_info(cls):
@@ -260,6 +402,47 @@ class DependencyChecker:
             })
         return info
 
+class DependencyCheckTask(QgsTask):
+    """Abhängigkeiten im Task-Manager prüfen, Ergebnis im Haupt-Thread speichern"""
+    
+    checkFinished = pyqtSignal(bool, list)
+    
+    def __init__(self):
+        super().__init__("Walkability Analyzer: Abhängigkeiten prüfen")
+        self.fingerprint = None
+        self.missing_packages = None
+    
+    def run(self):
+        self.fingerprint = environment_fingerprint()
+        self.missing_packages = DependencyChecker.find_missing()
+        return True
+    
+    def finished(self, result):
+        if result:
+            DependencyChecker.store_result(self.fingerprint, self.missing_packages)
+            self.checkFinished.emit(not self.missing_packages, self.missing_packages)
+
+
+def start_dependency_check(callback):
+    """
+    Abhängigkeiten beim Laden des Plugins prüfen, ohne QGIS aufzuhalten
+    
+    Bei gültigem gespeichertem Ergebnis wird callback sofort aufgerufen,
+    sonst nach der Prüfung im Hintergrund.
+    
+    :param callback: Funktion (alle_vorhanden, fehlende_pakete)
+    :return: DependencyCheckTask oder None
+    """
+    missing_packages = DependencyChecker.cached_result(environment_fingerprint())
+    if missing_packages is not None:
+        callback(not missing_packages, missing_packages)
+        return None
+    
+    task = DependencyCheckTask()
+    task.checkFinished.connect(callback)
+    QgsApplication.taskManager().addTask(task)
+    return task
+
 def check_plugin_dependencies():
     """Hauptfunktion für Abhängigkeits-Check"""
     return DependencyChecker.check_dependencies()
\ No newline at end of file
@@ -0,0 +1,194 @@
+# coding=utf-8
+"""Bulk geocoding test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import csv
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utilities import plugin_module
+
+bulk_geocoding = plugin_module('bulk_geocoding')
+
+DOMPLATZ = {'lat': 51.9625, 'lon': 7.6256, 'display_name': 'Domplatz 10, Münster'}
+HAFEN = {'lat': 51.9510, 'lon': 7.6405, 'display_name': 'Hafenweg 26, Münster'}
+BERLIN = {'lat': 52.5200, 'lon': 13.4050, 'display_name': 'Alexanderplatz 1, Berlin'}
+
+
+class FakeCache:
+    """Geokodierungs-Cache im Speicher"""
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+
+    def get(self, address):
+        return (address in self.entries), self.entries.get(address)
+
+    def store(self, address, result):
+        self.entries[address] = result
+
+
+class FakeGeocoder:
+    """Nominatim ohne Netzwerk; zählt die Anfragen"""
+
+    def __init__(self, answers, cache=None, delay=0.0):
+        self.answers = answers
+        self.cache = cache
+        self.delay = delay
+        self.requests = []
+
+    def request(self, address):
+        self.requests.append(address)
+        time.sleep(self.delay)
+        answer = self.answers.get(address)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class FakeGazetteer:
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def lookup(self, address):
+        return self.entries.get(address)
+
+
+class BulkGeocoderTest(unittest.TestCase):
+    """Test geocoding address lists for the batch analysis."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.reject_path = os.path.join(self.directory, 'rejects.csv')
+        patcher = mock.patch.object(bulk_geocoding, 'get_gazetteer', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.directory)
+
+    def resolve(self, geocoder, rows, **kwargs):
+        bulk = bulk_geocoding.BulkGeocoder(geocoder, reject_path=self.reject_path, **kwargs)
+        return bulk, list(bulk.resolve(rows))
+
+    def read_rejects(self):
+        with open(self.reject_path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def test_row_address(self):
+        """Address column first, otherwise street, house number, postcode and city."""
+        self.assertEqual(bulk_geocoding.row_address({'address': ' Domplatz 10 '}), 'Domplatz 10')
+        self.assertEqual(bulk_geocoding.row_address(
+            {'street': 'Domplatz', 'housenumber': '10', 'postcode': '48143', 'city': 'Münster'}),
+            'Domplatz 10, 48143 Münster')
+        self.assertEqual(bulk_geocoding.row_address({'name': 'Ohne'}), '')
+
+    def test_duplicates_requested_once(self):
+        """Addresses equal after normalisation are geocoded once and all rows resolve."""
+        geocoder = FakeGeocoder({'Domplatz 10, Münster': DOMPLATZ})
+        rows = [{'address': 'Domplatz 10, Münster'}, {'address': 'domplatz  10 ,münster'},
+                {'address': 'DOMPLATZ 10, MÜNSTER'}]
+
+        bulk, resolved = self.resolve(geocoder, rows)
+
+        self.assertEqual(geocoder.requests, ['Domplatz 10, Münster'])
+        self.assertEqual(sorted(index for index, _, _ in resolved), [0, 1, 2])
+        self.assertEqual({result['lat'] for _, _, result in resolved}, {DOMPLATZ['lat']})
+        self.assertEqual((bulk.stats['unique'], bulk.stats['requested'], bulk.stats['resolved']), (1, 1, 3))
+
+    def test_gazetteer_and_cache_hits(self):
+        """Offline and cached addresses are not requested; new results go into the cache."""
+        cache = FakeCache({'Hafenweg 26': HAFEN})
+        geocoder = FakeGeocoder({'Domplatz 10': DOMPLATZ}, cache=cache)
+        rows = [{'address': 'Prinzipalmarkt 1'}, {'address': 'Hafenweg 26'}, {'address': 'Domplatz 10'}]
+
+        with mock.patch.object(bulk_geocoding, 'get_gazetteer',
+                               return_value=FakeGazetteer({'Prinzipalmarkt 1': DOMPLATZ})):
+            bulk, resolved = self.resolve(geocoder, rows)
+
+        self.assertEqual(geocoder.requests, ['Domplatz 10'])
+        self.assertEqual(cache.entries['Domplatz 10'], DOMPLATZ)
+        self.assertEqual(len(resolved), 3)
+        # Treffer ohne Anfrage kommen zuerst
+        self.assertEqual([index for index, _, _ in resolved], [0, 1, 2])
+        self.assertEqual((bulk.stats['gazetteer_hits'], bulk.stats['cache_hits']), (1, 1))
+
+    def test_reject_csv(self):
+        """Unresolvable rows keep their columns and get a reason."""
+        geocoder = FakeGeocoder({'Domplatz 10': DOMPLATZ, 'Kaputt 1': RuntimeError('Zeitüberschreitung')})
+        rows = [{'name': 'A', 'address': 'Domplatz 10'}, {'name': 'B', 'address': ''},
+                {'name': 'C', 'address': 'Gibtsnicht 99'}, {'name': 'D', 'address': 'Kaputt 1'}]
+
+        bulk, resolved = self.resolve(geocoder, rows)
+
+        self.assertEqual([row['name'] for _, row, _ in resolved], ['A'])
+        rejects = {row['name']: row for row in self.read_rejects()}
+        self.assertEqual(rejects['B'][bulk_geocoding.REJECT_REASON_FIELD], 'keine Adresse')
+        self.assertEqual(rejects['C'][bulk_geocoding.REJECT_REASON_FIELD], 'nicht gefunden')
+        self.assertEqual(rejects['D'][bulk_geocoding.REJECT_REASON_FIELD], 'Fehler: Zeitüberschreitung')
+        self.assertEqual(rejects['C']['address'], 'Gibtsnicht 99')
+        self.assertEqual(bulk.stats['rejected'], 3)
+
+    def test_no_reject_file_without_rejects(self):
+        """The reject CSV is only created when a row is rejected."""
+        self.resolve(FakeGeocoder({'Domplatz 10': DOMPLATZ}), [{'address': 'Domplatz 10'}])
+        self.assertFalse(os.path.exists(self.reject_path))
+
+    def test_outside_area(self):
+        """Results outside Münster are rejected unless allowed."""
+        rows = [{'name': 'Berlin', 'address': 'Alexanderplatz 1'}]
+
+        _, resolved = self.resolve(FakeGeocoder({'Alexanderplatz 1': BERLIN}), rows)
+        self.assertEqual(resolved, [])
+        reason = self.read_rejects()[0][bulk_geocoding.REJECT_REASON_FIELD]
+        self.assertTrue(reason.startswith('außerhalb Münster'))
+
+        _, resolved = self.resolve(FakeGeocoder({'Alexanderplatz 1': BERLIN}), rows, reject_outside_area=False)
+        self.assertEqual(len(resolved), 1)
+
+    def test_reject_after_resolve(self):
+        """Rows rejected by the caller move from resolved to rejected."""
+        rejected = []
+        bulk = bulk_geocoding.BulkGeocoder(FakeGeocoder({'Domplatz 10': DOMPLATZ}), reject_path=self.reject_path,
+                                           on_reject=lambda row, reason: rejected.append(reason))
+        for _, row, _ in bulk.resolve([{'address': 'Domplatz 10', 'services': 'Kiosk'}]):
+            bulk.reject(row, 'Unbekannte Service-Typen: Kiosk')
+
+        self.assertEqual(rejected, ['Unbekannte Service-Typen: Kiosk'])
+        self.assertEqual((bulk.stats['resolved'], bulk.stats['rejected']), (0, 1))
+
+    def test_early_close_stops_requests(self):
+        """Closing the generator stops the background requests."""
+        addresses = [f"Domplatz {number}" for number in range(1, 9)]
+        geocoder = FakeGeocoder({address: DOMPLATZ for address in addresses}, delay=0.05)
+        bulk = bulk_geocoding.BulkGeocoder(geocoder, reject_path=self.reject_path)
+
+        results = bulk.resolve([{'address': address} for address in addresses])
+        next(results)
+        results.close()
+
+        self.assertLess(len(geocoder.requests), len(addresses))
+        self.assertEqual(bulk.stats['requested'], 1)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(BulkGeocoderTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
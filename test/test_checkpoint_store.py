@@ -0,0 +1,169 @@
+# coding=utf-8
+"""Checkpoint store test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from utilities import plugin_module
+
+checkpoint_store = plugin_module('checkpoint_store')
+
+ORIGIN = {
+    'location_name': 'Prinzipalmarkt',
+    'coordinates': [7.628, 51.962],
+    'time_limit': 15,
+    'service_types': ['Supermarkt', 'Apotheke']
+}
+
+
+def done_item(origin):
+    """Erfolgreiches PipelineExecutor-Item"""
+    return dict(origin, error=None, result={'location_name': origin['location_name'], 'layers': {}})
+
+
+def failed_item(origin, error='Zeitüberschreitung'):
+    """Fehlgeschlagenes PipelineExecutor-Item"""
+    return dict(origin, error=error, result=None)
+
+
+class CheckpointStoreTest(unittest.TestCase):
+    """Test checkpoint store reuses only matching analyses."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'checkpoint.sqlite')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.directory)
+
+    def test_hash_ignores_service_order(self):
+        """Service order does not change the key."""
+        swapped = dict(ORIGIN, service_types=['Apotheke', 'Supermarkt'])
+        self.assertEqual(checkpoint_store.origin_hash(ORIGIN), checkpoint_store.origin_hash(swapped))
+
+    def test_hash_includes_at_time(self):
+        """Analyses at different times have different keys."""
+        morning = datetime(2024, 6, 3, 8, 0)
+        self.assertNotEqual(checkpoint_store.origin_hash(ORIGIN),
+                            checkpoint_store.origin_hash(ORIGIN, morning))
+        self.assertEqual(checkpoint_store.origin_hash(ORIGIN, morning),
+                         checkpoint_store.origin_hash(ORIGIN, morning.isoformat()))
+
+    def test_plan_reuses_done_origins(self):
+        """A resumed run skips finished origins with the same time."""
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record(done_item(ORIGIN))
+        pending, reused, summary = store.plan([ORIGIN])
+        store.close()
+
+        self.assertEqual(pending, [])
+        self.assertEqual(reused, [ORIGIN])
+        self.assertEqual(summary['reused'], 1)
+
+    def test_plan_retries_failed_origins(self):
+        """Failed and unknown origins are pending and counted separately."""
+        other = dict(ORIGIN, location_name='Hafen', coordinates=[7.641, 51.951])
+        new = dict(ORIGIN, location_name='Aasee', coordinates=[7.611, 51.956])
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record(done_item(ORIGIN))
+        store.record(failed_item(other))
+        pending, reused, summary = store.plan([ORIGIN, other, new])
+        store.close()
+
+        self.assertEqual(pending, [other, new])
+        self.assertEqual(reused, [ORIGIN])
+        self.assertEqual(summary, {'total': 3, 'reused': 1, 'retried': 1, 'new': 1})
+
+    def test_latest_entry_wins(self):
+        """A retry that succeeds is reused; a later failure is computed again."""
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record(failed_item(ORIGIN))
+        store.record(done_item(ORIGIN))
+        self.assertEqual(store.plan([ORIGIN])[2]['reused'], 1)
+
+        store.record(failed_item(ORIGIN, error='Überlastet'))
+        pending, _, summary = store.plan([ORIGIN])
+        store.close()
+
+        self.assertEqual(pending, [ORIGIN])
+        self.assertEqual(summary['retried'], 1)
+
+    def test_load_item(self):
+        """Reused origins come back as items with their stored result and no layers."""
+        store = checkpoint_store.CheckpointStore(self.path)
+        item = done_item(ORIGIN)
+        item['result']['layers'] = {'isochrone': object()}
+        item['result']['score'] = {'total_score': 72.5}
+        store.record(item)
+        store.close()
+
+        store = checkpoint_store.CheckpointStore(self.path)
+        loaded = store.load_item(ORIGIN)
+        store.close()
+
+        self.assertEqual(loaded['location_name'], 'Prinzipalmarkt')
+        self.assertIsNone(loaded['error'])
+        self.assertEqual(loaded['result'], {'location_name': 'Prinzipalmarkt', 'score': {'total_score': 72.5},
+                                            'layers': {}})
+
+    def test_iter_results(self):
+        """Only the latest successful result per origin is exported."""
+        other = dict(ORIGIN, location_name='Hafen', coordinates=[7.641, 51.951])
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record(failed_item(ORIGIN))
+        store.record(done_item(ORIGIN))
+        store.record(done_item(ORIGIN))
+        store.record(done_item(other))
+        store.record(failed_item(other))
+
+        names = [result['location_name'] for result in store.iter_results()]
+        store.close()
+
+        self.assertEqual(names, ['Prinzipalmarkt'])
+
+    def test_plan_recomputes_other_at_time(self):
+        """A run at another time does not reuse results."""
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record(done_item(ORIGIN))
+        store.close()
+
+        store = checkpoint_store.CheckpointStore(self.path, at_time=datetime(2024, 6, 2, 10, 0))
+        pending, reused, summary = store.plan([ORIGIN])
+        self.assertIsNone(store.load_item(ORIGIN))
+        store.close()
+
+        self.assertEqual(pending, [ORIGIN])
+        self.assertEqual(summary['new'], 1)
+
+    def test_resolved_addresses(self):
+        """Geocoded addresses survive a restart; the latest coordinates win."""
+        store = checkpoint_store.CheckpointStore(self.path)
+        store.record_address('domplatz 10,münster', [7.6, 51.9])
+        store.record_address('domplatz 10,münster', [7.6256, 51.9625])
+        store.close()
+
+        store = checkpoint_store.CheckpointStore(self.path)
+        self.assertEqual(store.resolved_addresses(), {'domplatz 10,münster': [7.6256, 51.9625]})
+        store.close()
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(CheckpointStoreTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
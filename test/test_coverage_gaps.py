@@ -0,0 +1,140 @@
+# coding=utf-8
+"""Coverage gaps test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+import numpy as np
+from shapely.geometry import box, mapping
+
+from utilities import plugin_module
+
+coverage_gaps = plugin_module('coverage_gaps')
+population_data = plugin_module('population_data')
+
+# Untersuchungsgebiet in Münster, ca. 1,4 x 1,1 km
+BOUNDARY = box(7.60, 51.95, 7.62, 51.96)
+
+
+class FakeOrsClient:
+    """Isochronen aus einer festen Zuordnung Standort -> Fläche"""
+
+    def __init__(self, isochrones):
+        self.isochrones = isochrones
+
+    def get_isochrones_for_locations(self, locations, time_limit):
+        result = []
+        for location in locations:
+            polygon = self.isochrones.get(tuple(location))
+            result.append({'type': 'FeatureCollection', 'features': [
+                {'type': 'Feature', 'properties': {}, 'geometry': mapping(polygon)}]} if polygon else None)
+        return result
+
+
+class FakeCache:
+    """Catchment-Cache ohne Einträge"""
+
+    def get_isochrone(self, location, time_limit):
+        return None
+
+    def store_isochrone(self, location, isochrone):
+        pass
+
+
+def poi(osm_id, lon, lat):
+    return {'id': osm_id, 'name': f"POI {osm_id}", 'lon': lon, 'lat': lat}
+
+
+class CoverageGapTest(unittest.TestCase):
+    """Test gap areas, their population and the POI count."""
+
+    def setUp(self):
+        """Runs before each test."""
+        west = box(7.60, 51.95, 7.61, 51.96)
+        # Lässt am Nordrand nur einen Splitter von ca. 0,5 m Breite frei
+        east = box(7.61, 51.95, 7.62, 51.959995)
+        self.analyzer = coverage_gaps.CoverageGapAnalyzer(
+            ors_client=FakeOrsClient({(7.605, 51.955): west, (7.615, 51.955): east,
+                                      (7.63, 51.955): box(7.625, 51.95, 7.635, 51.96)}),
+            overpass_client=object(), cache=FakeCache())
+        self.population = population_data.PopulationPoints(
+            np.array([7.605, 7.615, 7.618]), np.array([51.955, 51.955, 51.952]), np.array([100.0, 40.0, 2.0]))
+
+    def find_gaps(self, pois_data):
+        return self.analyzer.find_gaps(BOUNDARY, 15, list(pois_data), self.population, pois_data=pois_data)
+
+    def test_gap_with_population(self):
+        """The uncovered half is a gap with its residents."""
+        gaps = self.find_gaps({'Bank': [poi(1, 7.605, 51.955)]})
+
+        self.assertEqual(len(gaps['features']), 1)
+        properties = gaps['features'][0]['properties']
+        self.assertEqual((properties['service_type'], properties['time_limit']), ('Bank', 15))
+        self.assertEqual(properties['population'], 42)
+        # ca. 690 m x 1110 m
+        self.assertAlmostEqual(properties['area_m2'], 765000, delta=20000)
+
+    def test_slivers_dropped(self):
+        """Gaps below MIN_GAP_AREA_M2 are discarded."""
+        gaps = self.find_gaps({'Apotheke': [poi(1, 7.605, 51.955), poi(2, 7.615, 51.955)]})
+        self.assertEqual(gaps['features'], [])
+
+    def test_poi_count_inside_boundary(self):
+        """POIs in the search margin serve the area but are not counted."""
+        gaps = self.find_gaps({'Bank': [poi(1, 7.605, 51.955), poi(3, 7.63, 51.955)]})
+        self.assertEqual(gaps['features'][0]['properties']['poi_count'], 1)
+
+    def test_missing_isochrone(self):
+        """POIs without an isochrone are reported and their surroundings stay a gap."""
+        gaps = self.find_gaps({'Arzt': [poi(4, 7.611, 51.951)]})
+
+        self.assertEqual([entry['osm_id'] for entry in gaps['missing_isochrones']], ['4'])
+        self.assertEqual(len(gaps['features']), 1)
+        self.assertEqual(gaps['features'][0]['properties']['population'], 142)
+
+
+class ServiceAreaTest(unittest.TestCase):
+    """Test the union of overlapping isochrones."""
+
+    def test_union(self):
+        """Overlaps are counted once."""
+        area = coverage_gaps.CoverageGapAnalyzer.service_area([box(0, 0, 2, 2), box(1, 1, 3, 3), box(5, 5, 6, 6)])
+        self.assertAlmostEqual(area.area, 4 + 4 - 1 + 1)
+
+    def test_empty(self):
+        """No isochrones, no service area."""
+        self.assertTrue(coverage_gaps.CoverageGapAnalyzer.service_area([]).is_empty)
+
+
+class PopulationInPolygonsTest(unittest.TestCase):
+    """Test summing residents per polygon."""
+
+    def test_population_per_polygon(self):
+        """Each polygon sums the residents it contains; overlaps count for both."""
+        points = population_data.PopulationPoints(
+            np.array([0.5, 1.5, 5.0]), np.array([0.5, 1.5, 5.0]), np.array([10.0, 20.0, 30.0]))
+        totals = population_data.population_in_polygons([box(0, 0, 2, 2), box(1, 1, 3, 3), box(8, 8, 9, 9)], points)
+        self.assertEqual(totals.tolist(), [30.0, 20.0, 0.0])
+
+    def test_no_points(self):
+        """Without residents every polygon has zero."""
+        points = population_data.PopulationPoints(np.empty(0), np.empty(0), np.empty(0))
+        self.assertEqual(population_data.population_in_polygons([box(0, 0, 1, 1)], points).tolist(), [0.0])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(CoverageGapTest),
+                                unittest.makeSuite(ServiceAreaTest),
+                                unittest.makeSuite(PopulationInPolygonsTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,187 @@
+# coding=utf-8
+"""Gazetteer test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from utilities import plugin_module
+
+gazetteer = plugin_module('gazetteer')
+
+OSM_EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="51.9625" lon="7.6256">
+    <tag k="addr:street" v="Domplatz"/>
+    <tag k="addr:housenumber" v="10"/>
+    <tag k="addr:postcode" v="48143"/>
+  </node>
+  <node id="2" lat="51.9600" lon="7.6200"/>
+  <node id="3" lat="51.9610" lon="7.6220"/>
+  <way id="10">
+    <nd ref="2"/>
+    <nd ref="3"/>
+    <tag k="addr:street" v="Prinzipalmarkt"/>
+    <tag k="addr:housenumber" v="1"/>
+  </way>
+</osm>
+"""
+
+ADDRESS_CSV = "Strasse;Hausnummer;PLZ;lat;lon\nHammer Str.;12;48153;51,9500;7,6300\n"
+
+
+def entry(street, housenumber, lat=51.96, lon=7.62):
+    return (gazetteer.query_key(f"{street} {housenumber}"), lat, lon, f"{street} {housenumber}, Münster")
+
+
+class GazetteerTest(unittest.TestCase):
+    """Test exact and prefix search in the gazetteer."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.gazetteer = gazetteer.Gazetteer([
+            entry('Domplatz', '10', 51.9625, 7.6256),
+            entry('Domplatz', '1'),
+            entry('Domplatz', '11'),
+            entry('Dorfstraße', '2'),
+            entry('Hammer Straße', '12'),
+            entry('Domplatz', '10', 0.0, 0.0)
+        ])
+
+    def test_duplicates_keep_first(self):
+        """Duplicate keys keep the first entry."""
+        self.assertEqual(len(self.gazetteer), 5)
+        self.assertEqual(self.gazetteer.lookup('Domplatz 10')['lat'], 51.9625)
+
+    def test_lookup_normalized(self):
+        """Lookup ignores case, street suffix spelling and the city part."""
+        result = self.gazetteer.lookup('hammer str. 12, 48153 Münster')
+        self.assertEqual(result['display_name'], 'Hammer Straße 12, Münster')
+        self.assertIsNone(self.gazetteer.lookup('Hammer Straße 13'))
+        self.assertIsNone(self.gazetteer.lookup('Domplatz'))
+
+    def test_lookup_other_city(self):
+        """A matching street in another city or postcode is not a hit."""
+        self.assertIsNone(self.gazetteer.lookup('Hammer Straße 12, Berlin'))
+        self.assertIsNone(self.gazetteer.lookup('Hammer Straße 12, 10115 Berlin'))
+        self.assertIsNotNone(self.gazetteer.lookup('Hammer Straße 12, Münster (Westf.)'))
+        self.assertIsNotNone(self.gazetteer.lookup('Hammer Straße 12, 48153'))
+
+    def test_lookup_postcode(self):
+        """A known postcode must match the query."""
+        gazetteer_with_postcode = gazetteer.Gazetteer([
+            (gazetteer.query_key('Domplatz 10'), 51.9625, 7.6256, 'Domplatz 10, 48143 Münster')])
+        self.assertIsNotNone(gazetteer_with_postcode.lookup('Domplatz 10, 48143 Münster'))
+        self.assertIsNone(gazetteer_with_postcode.lookup('Domplatz 10, 48149 Münster'))
+
+    def test_complete_prefix(self):
+        """Suggestions are the sorted addresses starting with the input."""
+        self.assertEqual(self.gazetteer.complete('Domplatz 1'),
+                         ['Domplatz 1, Münster', 'Domplatz 10, Münster', 'Domplatz 11, Münster'])
+        self.assertEqual(self.gazetteer.complete('do'),
+                         ['Domplatz 1, Münster', 'Domplatz 10, Münster', 'Domplatz 11, Münster',
+                          'Dorfstraße 2, Münster'])
+
+    def test_complete_limit_and_empty(self):
+        """The limit caps suggestions; empty or unknown input gives none."""
+        self.assertEqual(len(self.gazetteer.complete('do', limit=2)), 2)
+        self.assertEqual(self.gazetteer.complete(''), [])
+        self.assertEqual(self.gazetteer.complete('Zzz'), [])
+
+    def test_save_and_load(self):
+        """The compressed file restores all entries."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'gazetteer.tsv.gz')
+            self.gazetteer.save(path)
+            loaded = gazetteer.Gazetteer.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(loaded.keys, self.gazetteer.keys)
+        self.assertEqual(loaded.labels, self.gazetteer.labels)
+        self.assertAlmostEqual(loaded.lookup('Domplatz 10')['lon'], 7.6256)
+
+
+class BuildGazetteerTest(unittest.TestCase):
+    """Test building the gazetteer and replacing the session instance."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.default_path = os.path.join(self.directory, 'default.tsv.gz')
+        self.osm_path = os.path.join(self.directory, 'muenster.osm')
+        with open(self.osm_path, 'w', encoding='utf-8') as f:
+            f.write(OSM_EXTRACT)
+
+        self.original_default_path = gazetteer.default_gazetteer_path
+        gazetteer.default_gazetteer_path = lambda: self.default_path
+        gazetteer._shared_gazetteer, gazetteer._shared_loaded = None, False
+
+    def tearDown(self):
+        """Runs after each test."""
+        gazetteer.default_gazetteer_path = self.original_default_path
+        gazetteer._shared_gazetteer, gazetteer._shared_loaded = None, False
+        shutil.rmtree(self.directory)
+
+    def test_osm_nodes_and_ways(self):
+        """Address nodes and building ways (centroid of their nodes) are read."""
+        built = gazetteer.build_gazetteer(self.osm_path, os.path.join(self.directory, 'other.tsv.gz'))
+
+        self.assertEqual(len(built), 2)
+        self.assertEqual(built.lookup('Domplatz 10')['display_name'], 'Domplatz 10, 48143 Münster')
+        way = built.lookup('Prinzipalmarkt 1')
+        self.assertAlmostEqual(way['lat'], 51.9605)
+        self.assertAlmostEqual(way['lon'], 7.6210)
+
+    def test_csv(self):
+        """City address lists with semicolons and decimal commas are read."""
+        csv_path = os.path.join(self.directory, 'adressen.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write(ADDRESS_CSV)
+        built = gazetteer.build_gazetteer(csv_path, os.path.join(self.directory, 'csv.tsv.gz'))
+
+        result = built.lookup('Hammer Straße 12')
+        self.assertEqual(result['display_name'], 'Hammer Str. 12, 48153 Münster')
+        self.assertAlmostEqual(result['lat'], 51.95)
+
+    def test_default_path_replaces_session_gazetteer(self):
+        """Building into the default file replaces the shared instance."""
+        self.assertIsNone(gazetteer.get_gazetteer())
+        built = gazetteer.build_gazetteer(self.osm_path)
+
+        self.assertTrue(os.path.exists(self.default_path))
+        self.assertIs(gazetteer.get_gazetteer(), built)
+
+    def test_other_path_keeps_session_gazetteer(self):
+        """Building into another file leaves the shared instance alone."""
+        shared = gazetteer.build_gazetteer(self.osm_path)
+        gazetteer.build_gazetteer(self.osm_path, os.path.join(self.directory, 'other.tsv.gz'))
+        self.assertIs(gazetteer.get_gazetteer(), shared)
+
+    def test_get_gazetteer_loads_default_file(self):
+        """The shared instance is loaded from the default file once."""
+        gazetteer.build_gazetteer(self.osm_path)
+        gazetteer._shared_gazetteer, gazetteer._shared_loaded = None, False
+
+        loaded = gazetteer.get_gazetteer()
+        self.assertEqual(len(loaded), 2)
+        self.assertIs(gazetteer.get_gazetteer(), loaded)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(GazetteerTest), unittest.makeSuite(BuildGazetteerTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
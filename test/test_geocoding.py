@@ -0,0 +1,191 @@
+# coding=utf-8
+"""Geocoding cache test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utilities import plugin_module
+
+geocoding = plugin_module('geocoding')
+
+DOMPLATZ = {'lat': 51.9625, 'lon': 7.6256, 'display_name': 'Domplatz 10, Münster'}
+
+
+class FakeResponse:
+
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Nominatim-Antworten ohne Netzwerk; zählt die Anfragen"""
+
+    def __init__(self, data):
+        self.headers = {}
+        self.data = data
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(params['q'])
+        return FakeResponse(self.data)
+
+
+class NormalizeAddressTest(unittest.TestCase):
+    """Test the cache key of addresses."""
+
+    def test_case_spaces_and_commas(self):
+        """Case, repeated spaces and spaces around commas do not matter."""
+        self.assertEqual(geocoding.normalize_address('Domplatz  10, Münster'), 'domplatz 10,münster')
+        self.assertEqual(geocoding.normalize_address(' domplatz 10 ,münster '), 'domplatz 10,münster')
+
+    def test_street_suffix(self):
+        """str., strasse and straße give the same key."""
+        expected = geocoding.normalize_address('Hammer Straße 12')
+        for address in ('Hammer Str. 12', 'hammer strasse 12', 'HAMMER STR. 12'):
+            self.assertEqual(geocoding.normalize_address(address), expected)
+        self.assertEqual(geocoding.normalize_address('Hafenstr., Münster'), 'hafenstraße,münster')
+
+    def test_street_suffix_only_at_word_end(self):
+        """Words merely starting with str are unchanged."""
+        self.assertEqual(geocoding.normalize_address('Strandweg 3'), 'strandweg 3')
+
+    def test_punctuation_removed(self):
+        """Punctuation other than commas becomes a single space."""
+        self.assertEqual(geocoding.normalize_address('Aegidiistr. 5a; 48143 Münster!'),
+                         'aegidiistraße 5a 48143 münster')
+
+
+class GeocodeCacheTest(unittest.TestCase):
+    """Test the persistent geocode cache."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.cache = geocoding.GeocodeCache(os.path.join(self.directory, 'geocode.sqlite'),
+                                            ttl_seconds=1000, negative_ttl_seconds=100)
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.connection.close()
+        shutil.rmtree(self.directory)
+
+    def age(self, seconds):
+        """Alle Einträge um seconds älter machen"""
+        self.cache.connection.execute("UPDATE geocode_cache SET created_at = created_at - ?", (seconds,))
+        self.cache.connection.commit()
+
+    def test_hit_by_normalized_address(self):
+        """A differently written address hits the stored entry."""
+        self.cache.store('Domplatz 10, Münster', DOMPLATZ)
+        self.assertEqual(self.cache.get('domplatz  10 ,MÜNSTER'), (True, DOMPLATZ))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_unknown_address(self):
+        """Unknown addresses are misses."""
+        self.assertEqual(self.cache.get('Nirgendwo 1'), (False, None))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_negative_entry(self):
+        """Failed lookups are cached as found without result."""
+        self.cache.store('Domplatz 999', None)
+        self.assertEqual(self.cache.get('Domplatz 999'), (True, None))
+
+    def test_ttl(self):
+        """Hits and failures expire after their own TTL."""
+        self.cache.store('Domplatz 10', DOMPLATZ)
+        self.cache.store('Domplatz 999', None)
+
+        self.age(500)
+        self.assertEqual(self.cache.get('Domplatz 10'), (True, DOMPLATZ))
+        self.assertEqual(self.cache.get('Domplatz 999'), (False, None))
+
+        self.age(600)
+        self.assertEqual(self.cache.get('Domplatz 10'), (False, None))
+
+    def test_purge_expired(self):
+        """Only expired entries are deleted."""
+        self.cache.store('Domplatz 10', DOMPLATZ)
+        self.cache.store('Domplatz 999', None)
+        self.age(500)
+        self.cache.store('Prinzipalmarkt 1', None)
+
+        self.cache.purge_expired()
+        addresses = [row[0] for row in self.cache.connection.execute(
+            "SELECT address FROM geocode_cache ORDER BY address")]
+        self.assertEqual(addresses, ['domplatz 10', 'prinzipalmarkt 1'])
+
+    def test_store_replaces(self):
+        """A new result replaces an earlier failure."""
+        self.cache.store('Domplatz 10', None)
+        self.cache.store('Domplatz 10', DOMPLATZ)
+        self.assertEqual(self.cache.get('Domplatz 10'), (True, DOMPLATZ))
+
+
+class NominatimGeocoderTest(unittest.TestCase):
+    """Test the geocoder uses its cache before requesting."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+        self.cache = geocoding.GeocodeCache(os.path.join(self.directory, 'geocode.sqlite'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.connection.close()
+        shutil.rmtree(self.directory)
+
+    def geocoder(self, data):
+        session = FakeSession(data)
+        return geocoding.NominatimGeocoder(self.cache, session, geocoding.RateLimiter(0)), session
+
+    def test_repeated_address_requested_once(self):
+        """The second lookup is answered from the cache."""
+        geocoder, session = self.geocoder([{'lat': '51.9625', 'lon': '7.6256', 'display_name': 'Domplatz 10'}])
+        first = geocoder.geocode('Domplatz 10')
+        second = geocoder.geocode('domplatz 10')
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['lat'], 51.9625)
+        self.assertEqual(session.requests, ['Domplatz 10, Münster, Germany'])
+
+    def test_not_found_cached(self):
+        """Addresses without result are not requested again."""
+        geocoder, session = self.geocoder([])
+        self.assertIsNone(geocoder.geocode('Domplatz 999'))
+        self.assertIsNone(geocoder.geocode('Domplatz 999'))
+        self.assertEqual(len(session.requests), 1)
+
+    def test_rate_limiter_spacing(self):
+        """Consecutive slots keep the minimum interval."""
+        limiter = geocoding.RateLimiter(0.05)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(NormalizeAddressTest), unittest.makeSuite(GeocodeCacheTest),
+                                unittest.makeSuite(NominatimGeocoderTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,84 @@
+# coding=utf-8
+"""Geometry utilities test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+from utilities import plugin_module
+
+geometry_utils = plugin_module('geometry_utils')
+
+
+def square(size, center=(0.0, 0.0)):
+    """Geschlossener quadratischer Ring um center"""
+    x, y = center
+    return [[x - size, y - size], [x + size, y - size], [x + size, y + size], [x - size, y + size], [x - size, y - size]]
+
+
+def polygon(*rings):
+    return {'type': 'Polygon', 'coordinates': list(rings)}
+
+
+class PointsInPolygonTest(unittest.TestCase):
+    """Test the vectorised point-in-polygon check."""
+
+    def test_polygon(self):
+        """Points inside and outside a simple polygon."""
+        inside = geometry_utils.points_in_polygon([0.0, 0.5, 2.0], [0.0, -0.5, 0.0], polygon(square(1.0)))
+        self.assertEqual(inside.tolist(), [True, True, False])
+
+    def test_hole(self):
+        """Points inside a hole are outside the polygon."""
+        donut = polygon(square(2.0), square(0.5))
+        inside = geometry_utils.points_in_polygon([0.0, 1.0, 3.0], [0.0, 1.0, 0.0], donut)
+        self.assertEqual(inside.tolist(), [False, True, False])
+
+    def test_multipolygon(self):
+        """Every part of a MultiPolygon counts, not only the first one."""
+        parts = {'type': 'MultiPolygon', 'coordinates': [[square(1.0)], [square(1.0, center=(10.0, 0.0))]]}
+        inside = geometry_utils.points_in_polygon([0.0, 10.0, 5.0], [0.0, 0.0, 0.0], parts)
+        self.assertEqual(inside.tolist(), [True, True, False])
+
+    def test_no_points(self):
+        """An empty input gives an empty result."""
+        self.assertEqual(len(geometry_utils.points_in_polygon([], [], polygon(square(1.0)))), 0)
+
+
+class AssignSmallestRingTest(unittest.TestCase):
+    """Test assigning points to nested isochrone rings."""
+
+    def test_nested_rings(self):
+        """Each point gets the smallest ring containing it, -1 outside all rings."""
+        rings = [polygon(square(1.0)), polygon(square(2.0)), polygon(square(3.0))]
+        index = geometry_utils.assign_smallest_ring([0.0, 1.5, 2.5, 4.0], [0.0, 0.0, 0.0, 0.0], rings)
+        self.assertEqual(index.tolist(), [0, 1, 2, -1])
+
+    def test_hole_in_smaller_ring(self):
+        """A point in a hole of the small ring falls through to the larger ring."""
+        rings = [polygon(square(1.0), square(0.2)), polygon(square(2.0))]
+        index = geometry_utils.assign_smallest_ring([0.0, 0.5], [0.0, 0.5], rings)
+        self.assertEqual(index.tolist(), [1, 0])
+
+    def test_multipolygon_ring(self):
+        """Detached parts of a ring are found as well."""
+        rings = [{'type': 'MultiPolygon', 'coordinates': [[square(1.0)], [square(0.5, center=(5.0, 0.0))]]},
+                 polygon(square(6.0))]
+        index = geometry_utils.assign_smallest_ring([5.0, 3.0], [0.0, 0.0], rings)
+        self.assertEqual(index.tolist(), [0, 1])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(PointsInPolygonTest),
+                                unittest.makeSuite(AssignSmallestRingTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,115 @@
+# coding=utf-8
+"""Import time test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import importlib.util
+import subprocess
+import sys
+import unittest
+
+from utilities import plugin_package
+
+# Module, die beim Start von QGIS bzw. beim Öffnen des Dialogs geladen werden
+STARTUP_MODULES = ['walkability_analyzer', 'dependency_checker', 'walkability_analyzer_dialog']
+
+# Erst bei Analyse oder Export laden
+HEAVY_MODULES = {'requests', 'shapely', 'pyproj', 'reportlab', 'numpy'}
+
+# Auch ohne QGIS importierbar (CLI, Export); laden nur die leichteren Abhängigkeiten
+HEADLESS_MODULES = ['walkability_cli', 'coverage_gaps', 'reverse_catchments', 'gazetteer',
+                    'result_exporter', 'checkpoint_store', 'run_diff', 'weight_sensitivity']
+
+# Werden erst beim Umprojizieren bzw. beim GeoParquet-Export geladen
+LAZY_MODULES = {'pyproj', 'pyarrow'}
+
+# Von QGIS ohnehin geladen, zählt nicht zur Importzeit des Plugins
+QGIS_PRELOAD = 'import qgis.core, qgis.gui, qgis.PyQt.QtWidgets, qgis.PyQt.uic'
+
+# Obergrenze für den Import eines Start-Moduls inkl. Plugin-Abhängigkeiten
+IMPORT_BUDGET_MS = 100
+
+
+def import_times(module):
+    """
+    Importzeiten laut ``python -X importtime``
+
+    Im Quellbaum wird das Plugin dafür wie bei ``make deploy`` in ein
+    flaches Paket kopiert (utilities.plugin_package).
+
+    :param module: Modulname im Plugin-Paket
+    :return: Dict Modulname -> kumulierte Importzeit in Mikrosekunden
+    """
+    package, parent = plugin_package()
+    statement = f"{QGIS_PRELOAD}; import {package}.{module}"
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=parent, capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in process.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def loaded_packages(module):
+    """
+    Top-Level-Pakete in sys.modules nach dem Import eines Plugin-Moduls
+
+    :param module: Modulname im Plugin-Paket
+    :return: Set der Paketnamen
+    """
+    package, parent = plugin_package()
+    statement = (f"import sys, {package}.{module}; "
+                 "print(' '.join({name.split('.')[0] for name in sys.modules}))")
+    process = subprocess.run(
+        [sys.executable, '-c', statement], cwd=parent, capture_output=True, text=True, check=True)
+    return set(process.stdout.split())
+
+
+@unittest.skipUnless(importlib.util.find_spec('qgis'), 'QGIS not available')
+class ImportTimeTest(unittest.TestCase):
+    """Test plugin startup does not load heavy modules."""
+
+    def test_no_heavy_imports_at_startup(self):
+        """Heavy packages are loaded on first use only."""
+        for module in STARTUP_MODULES:
+            loaded = {name.split('.')[0] for name in import_times(module)}
+            self.assertFalse(loaded & HEAVY_MODULES, f"{module} imports {sorted(loaded & HEAVY_MODULES)}")
+
+    def test_startup_import_budget(self):
+        """Startup modules import within the time budget."""
+        package, _ = plugin_package()
+        for module in STARTUP_MODULES:
+            cumulative_ms = import_times(module)[f"{package}.{module}"] / 1000
+            self.assertLess(cumulative_ms, IMPORT_BUDGET_MS, f"{module} takes {cumulative_ms:.0f} ms")
+
+
+class HeadlessImportTest(unittest.TestCase):
+    """Test headless modules do not load pyproj or pyarrow at import time."""
+
+    def test_no_lazy_imports_at_module_level(self):
+        """pyproj and pyarrow are imported on first use only."""
+        for module in HEADLESS_MODULES:
+            loaded = loaded_packages(module) & LAZY_MODULES
+            self.assertFalse(loaded, f"{module} imports {sorted(loaded)}")
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ImportTimeTest),
+                                unittest.makeSuite(HeadlessImportTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
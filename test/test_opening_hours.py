@@ -0,0 +1,141 @@
+# coding=utf-8
+"""Opening hours test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+from datetime import datetime
+
+from utilities import plugin_module
+
+opening_hours = plugin_module('opening_hours')
+
+
+def at(day, time):
+    """Wochenminute zu Wochentag ('Mo'..'Su') und Uhrzeit ('HH:MM')"""
+    hour, minute = (int(value) for value in time.split(':'))
+    return opening_hours.WEEKDAYS.index(day) * opening_hours.MINUTES_PER_DAY + hour * 60 + minute
+
+
+class ParseOpeningHoursTest(unittest.TestCase):
+    """Test compiling opening_hours strings into weekly masks."""
+
+    def assertOpen(self, value, day, time):
+        self.assertTrue(opening_hours.parse_opening_hours(value).is_open(at(day, time)),
+                        f"{value!r} should be open {day} {time}")
+
+    def assertClosed(self, value, day, time):
+        self.assertFalse(opening_hours.parse_opening_hours(value).is_open(at(day, time)),
+                         f"{value!r} should be closed {day} {time}")
+
+    def test_weekday_range(self):
+        """Day ranges with a time span; the end minute is exclusive."""
+        value = 'Mo-Fr 08:00-18:00'
+        self.assertOpen(value, 'Mo', '08:00')
+        self.assertOpen(value, 'Fr', '17:59')
+        self.assertClosed(value, 'Mo', '07:59')
+        self.assertClosed(value, 'Mo', '18:00')
+        self.assertClosed(value, 'Sa', '10:00')
+
+    def test_always_open(self):
+        """24/7 is open at every minute."""
+        compiled = opening_hours.parse_opening_hours('24/7')
+        self.assertEqual(compiled.intervals(), [(0, opening_hours.MINUTES_PER_WEEK)])
+
+    def test_multiple_spans(self):
+        """Several spans on one day leave the break closed."""
+        value = 'Mo 08:00-12:00,14:00-18:00'
+        self.assertOpen(value, 'Mo', '09:00')
+        self.assertClosed(value, 'Mo', '13:00')
+        self.assertOpen(value, 'Mo', '15:00')
+        self.assertEqual(opening_hours.parse_opening_hours(value).intervals(),
+                         [(at('Mo', '08:00'), at('Mo', '12:00')), (at('Mo', '14:00'), at('Mo', '18:00'))])
+
+    def test_overnight(self):
+        """Spans past midnight continue on the following day."""
+        value = 'Fr-Sa 22:00-02:00'
+        self.assertOpen(value, 'Fr', '23:00')
+        self.assertOpen(value, 'Sa', '01:00')
+        self.assertOpen(value, 'Su', '01:59')
+        self.assertClosed(value, 'Su', '02:00')
+        self.assertClosed(value, 'Fr', '01:00')
+
+    def test_overnight_wraps_week(self):
+        """Sunday night continues into Monday morning."""
+        value = 'Su 22:00-03:00'
+        self.assertOpen(value, 'Mo', '02:00')
+        self.assertClosed(value, 'Mo', '03:00')
+
+    def test_semicolon_replaces_days(self):
+        """A later ';' rule replaces the times of its days."""
+        value = 'Mo-Sa 08:00-20:00; Sa 10:00-14:00'
+        self.assertOpen(value, 'Mo', '09:00')
+        self.assertClosed(value, 'Sa', '09:00')
+        self.assertOpen(value, 'Sa', '11:00')
+        self.assertClosed(value, 'Sa', '15:00')
+
+    def test_comma_adds_rule(self):
+        """A ', ' rule adds times without replacing earlier ones."""
+        self.assertOpen('Mo-Fr 08:00-12:00, We 14:00-18:00', 'We', '09:00')
+        self.assertOpen('Mo-Fr 08:00-12:00, We 14:00-18:00', 'We', '15:00')
+        self.assertClosed('Mo-Fr 08:00-12:00; We 14:00-18:00', 'We', '09:00')
+        self.assertOpen('Mo-Fr 08:00-12:00; We 14:00-18:00', 'We', '15:00')
+
+    def test_off(self):
+        """off and closed close the listed days."""
+        self.assertClosed('Mo-Su 08:00-20:00; Su off', 'Su', '10:00')
+        self.assertClosed('Mo-Su 08:00-20:00; Sa closed', 'Sa', '10:00')
+        self.assertOpen('Mo-Su 08:00-20:00; Su off', 'Sa', '10:00')
+
+    def test_public_holidays_ignored(self):
+        """PH rules and PH in day lists do not change the week."""
+        reference = opening_hours.parse_opening_hours('Mo-Fr 09:00-17:00').intervals()
+        for value in ('Mo-Fr 09:00-17:00; PH off', 'Mo-Fr,PH 09:00-17:00', 'Mo-Fr 09:00-17:00; PH 10:00-12:00'):
+            self.assertEqual(opening_hours.parse_opening_hours(value).intervals(), reference, value)
+
+    def test_unsupported_returns_none(self):
+        """Months, sun events, comments and empty values are not evaluated."""
+        for value in (None, '', 'Jan-Mar Mo-Fr 08:00-12:00', 'sunrise-sunset',
+                      'Mo-Fr 08:00-12:00 "nach Vereinbarung"', 'Mo-Fr 8-12'):
+            self.assertIsNone(opening_hours.parse_opening_hours(value), value)
+
+
+class OpenPoisTest(unittest.TestCase):
+    """Test open status of many POIs."""
+
+    POIS = [
+        {'name': 'Bäcker', 'tags': {'opening_hours': 'Mo-Sa 06:00-13:00'}},
+        {'name': 'Kiosk', 'tags': {'opening_hours': 'Jan-Mar Mo-Fr 08:00-12:00'}},
+        {'name': 'Ohne', 'tags': {}},
+        {'name': 'Bäcker 2', 'tags': {'opening_hours': 'Mo-Sa 06:00-13:00'}}
+    ]
+
+    def test_open_matrix(self):
+        """Unknown schedules follow unknown_open."""
+        minutes = [at('Mo', '07:00'), at('Mo', '14:00')]
+        matrix = opening_hours.open_matrix(self.POIS, minutes)
+        self.assertEqual(matrix.tolist(), [[True, False], [True, True], [True, True], [True, False]])
+
+        strict = opening_hours.open_matrix(self.POIS, minutes, unknown_open=False)
+        self.assertEqual(strict[:, 0].tolist(), [True, False, False, True])
+
+    def test_filter_open_pois(self):
+        """Only POIs open at the given time remain."""
+        sunday = datetime(2024, 6, 2, 10, 0)
+        result = opening_hours.filter_open_pois({'Supermarkt': self.POIS}, sunday)
+        self.assertEqual([poi['name'] for poi in result['Supermarkt']], ['Kiosk', 'Ohne'])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ParseOpeningHoursTest), unittest.makeSuite(OpenPoisTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
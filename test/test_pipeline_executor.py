@@ -0,0 +1,129 @@
+# coding=utf-8
+"""Pipeline executor test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import threading
+import unittest
+
+from utilities import plugin_module
+
+pipeline_executor = plugin_module('pipeline_executor')
+
+
+class FakeAnalyzer:
+    """Analyzer ohne Netzwerk: Isochrone, POIs und Ergebnis aus den Eingaben"""
+
+    def fetch_isochrone(self, coordinates, time_limit, use_cache):
+        if coordinates[0] < 0:
+            raise ValueError("no isochrone")
+        return {'features': []}
+
+    def fetch_pois(self, coordinates, time_limit, service_types, isochrone, use_cache):
+        return {service_type: [] for service_type in service_types}
+
+    def build_result(self, location_name, coordinates, time_limit, service_types,
+                     isochrone, services, create_layers, at_time):
+        return {'location_name': location_name, 'layers': {}}
+
+
+def origin(index):
+    return {
+        'location_name': f"Standort {index}",
+        'coordinates': [index, 51.96],
+        'time_limit': 15,
+        'service_types': ['Supermarkt']
+    }
+
+
+def failing_origins(count):
+    """Liefert count Standorte und wirft dann einen Fehler"""
+    for index in range(count):
+        yield origin(index)
+    raise OSError("input file truncated")
+
+
+class PipelineExecutorTest(unittest.TestCase):
+    """Test pipeline executor runs all stages and handles failures."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.executor = pipeline_executor.PipelineExecutor(FakeAnalyzer(), create_layers=False)
+
+    def test_results_in_input_order(self):
+        """All origins are returned in input order."""
+        items = self.executor.run([origin(index) for index in range(5)])
+        self.assertEqual([item['index'] for item in items], list(range(5)))
+        self.assertTrue(all(item['error'] is None for item in items))
+        self.assertEqual(self.executor.stats['origins'], 5)
+
+    def test_stage_error_marks_item(self):
+        """A failing stage marks the origin and skips later stages."""
+        items = self.executor.run([origin(-1), origin(1)])
+        self.assertIn('isochrone', items[0]['error'])
+        self.assertNotIn('result', items[0])
+        self.assertIsNone(items[1]['error'])
+
+    def test_input_error_is_raised(self):
+        """An error in the origins iterable is re-raised instead of hanging."""
+        done = []
+        outcome = []
+
+        def run():
+            try:
+                self.executor.run(failing_origins(3), lambda count, item: done.append(item['index']))
+            except OSError as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertFalse(thread.is_alive(), "run() did not return")
+        self.assertEqual(len(outcome), 1)
+        self.assertEqual(sorted(done), [0, 1, 2])
+
+    def test_callback_error_stops_workers(self):
+        """An error in progress_callback stops feeding and ends all pipeline threads."""
+        fed = []
+
+        def origins():
+            for index in range(100):
+                fed.append(index)
+                yield origin(index)
+
+        def callback(count, item):
+            raise RuntimeError("sink closed")
+
+        outcome = []
+
+        def run():
+            try:
+                self.executor.run(origins(), callback)
+            except RuntimeError as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertFalse(thread.is_alive(), "run() did not return")
+        self.assertEqual(len(outcome), 1)
+        self.assertLess(len(fed), 100)
+        workers = [worker.name for worker in threading.enumerate() if worker.name.startswith('walkability-')]
+        self.assertEqual(workers, [])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(PipelineExecutorTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,104 @@
+# coding=utf-8
+"""Population aggregation test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+import numpy as np
+import shapely
+
+from utilities import plugin_module
+
+population_aggregation = plugin_module('population_aggregation')
+population_data = plugin_module('population_data')
+
+# Zwei Stadtteile nebeneinander (lon/lat)
+DISTRICT_NAMES = ['West', 'Ost']
+DISTRICT_POLYGONS = np.asarray([shapely.box(7.60, 51.95, 7.62, 51.97),
+                                shapely.box(7.62, 51.95, 7.64, 51.97)], dtype=object)
+
+
+def population(points):
+    """PopulationPoints aus (lon, lat, Einwohner)"""
+    xs, ys, weights = zip(*points)
+    return population_data.PopulationPoints(np.array(xs), np.array(ys), np.array(weights, dtype=float))
+
+
+class AggregateByDistrictTest(unittest.TestCase):
+    """Test population-weighted statistics per district."""
+
+    def setUp(self):
+        """Runs before each test."""
+        # Bewertete Standorte im Westen, etwa 200 m voneinander entfernt
+        self.score_points = (np.array([7.603, 7.606, 7.609]), np.array([51.96, 51.96, 51.96]),
+                             np.array([10.0, 50.0, 90.0]))
+
+    def aggregate(self, points, **kwargs):
+        return population_aggregation.aggregate_by_district(
+            self.score_points, population(points), DISTRICT_NAMES, DISTRICT_POLYGONS, **kwargs)
+
+    def test_weighted_statistics(self):
+        """Mean, percentiles and shares are weighted by population."""
+        rows = self.aggregate([(7.603, 51.96, 1), (7.606, 51.96, 3), (7.609, 51.96, 1)])
+        west = rows[0]
+
+        self.assertEqual(west['district'], 'West')
+        self.assertEqual(west['population'], 5)
+        self.assertEqual(west['scored_population'], 5)
+        self.assertAlmostEqual(west['mean_score'], 50.0)
+        self.assertEqual([west[f"p{p}"] for p in (10, 25, 50, 75, 90)], [10.0, 50.0, 50.0, 50.0, 90.0])
+        self.assertAlmostEqual(west['share_below_40'], 0.2)
+        self.assertAlmostEqual(west['share_below_60'], 0.8)
+
+    def test_heavy_point_moves_median(self):
+        """A single dense cell dominates the weighted median."""
+        rows = self.aggregate([(7.603, 51.96, 1), (7.606, 51.96, 1), (7.609, 51.96, 10)])
+        self.assertEqual(rows[0]['p50'], 90.0)
+        self.assertEqual(rows[0]['p10'], 50.0)
+
+    def test_unscored_population(self):
+        """Residents beyond max_distance count as population but not in the statistics."""
+        rows = self.aggregate([(7.603, 51.96, 2), (7.635, 51.96, 7)])
+        east = rows[1]
+
+        self.assertEqual(rows[0]['scored_population'], 2)
+        self.assertEqual(east['population'], 7)
+        self.assertEqual(east['scored_population'], 0)
+        self.assertIsNone(east['mean_score'])
+        self.assertIsNone(east['p50'])
+        self.assertIsNone(east['share_below_40'])
+
+    def test_points_outside_districts_ignored(self):
+        """Population outside all districts is not assigned."""
+        rows = self.aggregate([(7.603, 51.96, 4), (7.603, 51.99, 100)])
+        self.assertEqual(rows[0]['population'], 4)
+        self.assertEqual(rows[1]['population'], 0)
+
+    def test_custom_thresholds_and_percentiles(self):
+        """Thresholds and percentiles define the result columns."""
+        rows = self.aggregate([(7.603, 51.96, 1), (7.609, 51.96, 1)], thresholds=(95,), percentiles=(50,))
+        self.assertEqual(rows[0]['share_below_95'], 1.0)
+        self.assertEqual(rows[0]['p50'], 10.0)
+        self.assertNotIn('p90', rows[0])
+
+    def test_requires_scores(self):
+        """Without scored locations there is nothing to join."""
+        self.score_points = (np.array([]), np.array([]), np.array([]))
+        with self.assertRaises(ValueError):
+            self.aggregate([(7.603, 51.96, 1)])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(AggregateByDistrictTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,96 @@
+# coding=utf-8
+"""Result cache test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+from utilities import plugin_module
+
+result_cache = plugin_module('result_cache')
+ResultCache = result_cache.ResultCache
+ring_minutes_for = result_cache.ring_minutes_for
+
+
+def square(size, minutes):
+    """Quadratische Isochrone um (0, 0) als GeoJSON-Feature"""
+    return {
+        'type': 'Feature',
+        'properties': {'value': minutes * 60, 'time_minutes': minutes},
+        'geometry': {
+            'type': 'Polygon',
+            'coordinates': [[[-size, -size], [size, -size], [size, size], [-size, size], [-size, -size]]]
+        }
+    }
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Test result cache reuses supersets."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.cache = ResultCache()
+        self.origin = [0.0, 0.0]
+        self.cache.store_isochrone(self.origin, {
+            'type': 'FeatureCollection',
+            'features': [square(1.0, 10), square(2.0, 15)]
+        })
+        self.cache.store_pois(self.origin, 15, {
+            'Apotheke': [{'lon': 0.5, 'lat': 0.5}, {'lon': 1.5, 'lat': 1.5}],
+            'Bank': [{'lon': 0.1, 'lat': 0.1}]
+        })
+
+    def test_ring_minutes(self):
+        """Test rings include the limit and stay within the ORS maximum."""
+        rings = ring_minutes_for(15)
+        self.assertIn(10, rings)
+        self.assertEqual(rings[-1], 15)
+        self.assertLessEqual(len(rings), 10)
+
+    def test_subset_of_services(self):
+        """Test a subset of services is answered without fetching."""
+        pois, missing = self.cache.get_pois(self.origin, 15, ['Bank'])
+        self.assertEqual(missing, [])
+        self.assertEqual(len(pois['Bank']), 1)
+
+    def test_lower_time_limit(self):
+        """Test cached POIs are filtered to a smaller ring."""
+        pois, missing = self.cache.get_pois(self.origin, 10, ['Apotheke'])
+        self.assertEqual(missing, [])
+        self.assertEqual(len(pois['Apotheke']), 1)
+
+    def test_ring_with_hole(self):
+        """Test POIs inside a hole of the smaller ring are filtered out."""
+        ring = square(1.0, 10)
+        ring['geometry']['coordinates'].append([[-0.2, -0.2], [0.2, -0.2], [0.2, 0.2], [-0.2, 0.2], [-0.2, -0.2]])
+        self.cache.store_isochrone([5.0, 5.0], {'type': 'FeatureCollection', 'features': [ring, square(2.0, 15)]})
+        self.cache.store_pois([5.0, 5.0], 15, {'Bank': [{'lon': 0.1, 'lat': 0.1}, {'lon': 0.5, 'lat': 0.5}]})
+
+        pois, _ = self.cache.get_pois([5.0, 5.0], 10, ['Bank'])
+        self.assertEqual(pois['Bank'], [{'lon': 0.5, 'lat': 0.5}])
+
+    def test_missing_services(self):
+        """Test only uncached services are reported missing."""
+        _, missing = self.cache.get_pois(self.origin, 15, ['Apotheke', 'Arzt'])
+        self.assertEqual(missing, ['Arzt'])
+
+    def test_higher_time_limit(self):
+        """Test a larger time limit than cached is a miss."""
+        self.assertIsNone(self.cache.get_isochrone(self.origin, 20))
+        _, missing = self.cache.get_pois(self.origin, 20, ['Bank'])
+        self.assertEqual(missing, ['Bank'])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ResultCacheTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
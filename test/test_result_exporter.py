@@ -0,0 +1,225 @@
+# coding=utf-8
+"""Result exporter test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import unittest
+
+from utilities import plugin_module
+
+result_exporter = plugin_module('result_exporter')
+checkpoint_store = plugin_module('checkpoint_store')
+
+
+def done_item(index, name, lon, lat):
+    """Erfolgreiches PipelineExecutor-Item mit zwei Apotheken"""
+    pois = [{'id': 100 + number, 'name': f"Apotheke {number}", 'lon': lon + 0.001 * number,
+             'lat': lat, 'osm_type': 'amenity=pharmacy', 'type': 'node'} for number in (1, 2)]
+    return {
+        'index': index,
+        'location_name': name,
+        'coordinates': [lon, lat],
+        'time_limit': 15,
+        'service_types': ['Apotheke'],
+        'error': None,
+        'result': {
+            'score': {'total_score': 87.456, 'total_services': 2,
+                      'service_scores': {'Apotheke': {'count': 2, 'raw_score': 87.456}}},
+            'services': {'Apotheke': pois},
+            'isochrone': {'type': 'FeatureCollection', 'features': [{
+                'type': 'Feature', 'properties': {'time_minutes': 15},
+                'geometry': {'type': 'Polygon', 'coordinates': [[[lon - 0.01, lat - 0.01], [lon + 0.01, lat - 0.01],
+                                                                 [lon + 0.01, lat + 0.01], [lon - 0.01, lat - 0.01]]]}
+            }]},
+            'at_time': None
+        }
+    }
+
+
+def failed_item(index, name, lon, lat):
+    """Fehlgeschlagenes Item ohne Ergebnis"""
+    return {'index': index, 'location_name': name, 'coordinates': [lon, lat], 'time_limit': 15,
+            'service_types': ['Apotheke'], 'error': 'Konnte keine Isochrone berechnen', 'result': None}
+
+
+ITEMS = [done_item(0, 'Domplatz', 7.6256, 51.9625), failed_item(1, 'Hafen', 7.64, 51.95)]
+
+
+class ResultWriterTest(unittest.TestCase):
+    """Test the streaming result writers."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.directory)
+
+    def write(self, writer_class, filename, **kwargs):
+        path = os.path.join(self.directory, filename)
+        writer = writer_class(path, **kwargs)
+        for item in ITEMS:
+            writer.write(item)
+        writer.close()
+        self.assertEqual(writer.count, len(ITEMS))
+        return path
+
+    def test_pois_path(self):
+        """POI files sit next to the result file."""
+        self.assertEqual(result_exporter.pois_path('/tmp/ergebnisse.csv'), '/tmp/ergebnisse_pois.csv')
+
+    def test_csv(self):
+        """One row per location, failures with an error and empty scores."""
+        path = self.write(result_exporter.CsvResultWriter, 'ergebnisse.csv', pois=True)
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([name for name, _ in result_exporter.result_fields()], list(rows[0].keys()))
+        self.assertEqual(rows[0]['name'], 'Domplatz')
+        self.assertEqual(rows[0]['total_score'], '87.46')
+        self.assertEqual(rows[0]['Apotheke_count'], '2')
+        self.assertEqual(rows[0]['error'], '')
+        self.assertEqual(rows[1]['total_score'], '')
+        self.assertEqual(rows[1]['error'], 'Konnte keine Isochrone berechnen')
+
+        with open(result_exporter.pois_path(path), newline='', encoding='utf-8') as f:
+            pois = list(csv.DictReader(f))
+        self.assertEqual([poi['osm_id'] for poi in pois], ['101', '102'])
+        self.assertEqual({poi['origin_index'] for poi in pois}, {'0'})
+        self.assertAlmostEqual(float(pois[1]['lon']), 7.6276)
+
+    def test_csv_without_pois(self):
+        """No POI file unless requested."""
+        path = self.write(result_exporter.CsvResultWriter, 'ergebnisse.csv')
+        self.assertFalse(os.path.exists(result_exporter.pois_path(path)))
+
+    def test_geojsonseq(self):
+        """One point feature per line."""
+        path = self.write(result_exporter.GeoJsonSeqResultWriter, 'ergebnisse.geojsonl', pois=True)
+
+        with open(path, encoding='utf-8') as f:
+            features = [json.loads(line) for line in f]
+        self.assertEqual(len(features), 2)
+        self.assertEqual(features[0]['geometry'], {'type': 'Point', 'coordinates': [7.6256, 51.9625]})
+        self.assertEqual(features[0]['properties']['total_score'], 87.46)
+        self.assertIsNone(features[1]['properties']['total_score'])
+
+        with open(result_exporter.pois_path(path), encoding='utf-8') as f:
+            pois = [json.loads(line) for line in f]
+        self.assertEqual([poi['properties']['name'] for poi in pois], ['Apotheke 1', 'Apotheke 2'])
+
+    @unittest.skipUnless(result_exporter.PYARROW_AVAILABLE, 'pyarrow is not installed')
+    def test_geoparquet(self):
+        """Row groups of batch_size rows with WKB points and geo metadata."""
+        import pyarrow.parquet
+
+        path = self.write(result_exporter.GeoParquetResultWriter, 'ergebnisse.parquet', pois=True, batch_size=1)
+
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        geo = json.loads(parquet_file.schema_arrow.metadata[b'geo'])
+        self.assertEqual(geo['primary_column'], 'geometry')
+        self.assertEqual(geo['columns']['geometry']['encoding'], 'WKB')
+
+        table = parquet_file.read()
+        self.assertEqual(table.column('name').to_pylist(), ['Domplatz', 'Hafen'])
+        self.assertEqual(table.column('total_score').to_pylist(), [87.46, None])
+        byte_order, geometry_type, lon, lat = struct.unpack('<BIdd', table.column('geometry')[0].as_py())
+        self.assertEqual((byte_order, geometry_type, lon, lat), (1, 1, 7.6256, 51.9625))
+
+        pois = pyarrow.parquet.read_table(result_exporter.pois_path(path))
+        self.assertEqual(pois.column('osm_id').to_pylist(), ['101', '102'])
+
+    @unittest.skipIf(result_exporter.PYARROW_AVAILABLE, 'pyarrow is installed')
+    def test_geoparquet_without_pyarrow(self):
+        """Without pyarrow the writer refuses to start."""
+        with self.assertRaises(ImportError):
+            result_exporter.GeoParquetResultWriter(os.path.join(self.directory, 'ergebnisse.parquet'))
+
+    def test_geopackage(self):
+        """Isochrones are stored in a MULTIPOLYGON table."""
+        path = self.write(result_exporter.GeoPackageResultWriter, 'ergebnisse.gpkg')
+
+        connection = sqlite3.connect(path)
+        try:
+            geometry_types = dict(connection.execute(
+                "SELECT table_name, geometry_type_name FROM gpkg_geometry_columns").fetchall())
+            isochrones = connection.execute(
+                f'SELECT name, time_limit FROM "{result_exporter.ISOCHRONES_TABLE}"').fetchall()
+            results = connection.execute(
+                f'SELECT name, at_time FROM "{result_exporter.RESULTS_TABLE}" ORDER BY origin_index').fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(geometry_types[result_exporter.ISOCHRONES_TABLE], 'MULTIPOLYGON')
+        self.assertEqual(isochrones, [('Domplatz', 15)])
+        self.assertEqual(results, [('Domplatz', None), ('Hafen', None)])
+
+    def test_main_filters_at_time(self):
+        """Checkpoint rows of another point in time are left out with --at."""
+        checkpoint_path = os.path.join(self.directory, 'lauf.sqlite')
+        for at_time, score in ((None, 50.0), ('2024-06-02T10:00', 70.0)):
+            item = done_item(0, 'Domplatz', 7.6256, 51.9625)
+            item['result'].update(location_name='Domplatz', coordinates=[7.6256, 51.9625], time_limit=15,
+                                  service_types=['Apotheke'], at_time=at_time)
+            item['result']['score']['total_score'] = score
+            store = checkpoint_store.CheckpointStore(checkpoint_path, at_time=at_time)
+            store.record(item)
+            store.close()
+
+        csv_path = os.path.join(self.directory, 'ergebnisse.csv')
+        self.assertEqual(result_exporter.main([checkpoint_path, '--csv', csv_path, '--at', '2024-06-02T10:00']), 0)
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(row['at_time'], row['total_score']) for row in rows], [('2024-06-02T10:00', '70.0')])
+
+        self.assertEqual(result_exporter.main([checkpoint_path, '--csv', csv_path]), 0)
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            self.assertEqual(sorted(row['at_time'] for row in csv.DictReader(f)), ['', '2024-06-02T10:00'])
+
+    def test_weekly(self):
+        """One row per hour of the week following the opening hours."""
+        item = done_item(0, 'Domplatz', 7.6256, 51.9625)
+        item['result']['services']['Apotheke'][0]['tags'] = {'opening_hours': 'Mo-Fr 08:00-18:00'}
+        item['result']['services']['Apotheke'][1]['tags'] = {'opening_hours': 'Sa 09:00-13:00'}
+
+        path = os.path.join(self.directory, 'wochenverlauf.csv')
+        writer = result_exporter.WeeklyScoreWriter(path)
+        writer.write(item)
+        writer.write(failed_item(1, 'Hafen', 7.64, 51.95))
+        writer.close()
+        self.assertEqual(writer.count, 1)
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = {(row['weekday'], row['time']): row for row in csv.DictReader(f)}
+        self.assertEqual(len(rows), 7 * 24)
+
+        monday = rows[('Mo', '10:00')]
+        self.assertEqual((monday['name'], monday['week_minute'], monday['Apotheke_open']), ('Domplatz', '600', '1'))
+        self.assertEqual(float(monday['total_score']), 100.0)
+        self.assertEqual(rows[('Sa', '10:00')]['Apotheke_open'], '1')
+        self.assertEqual(rows[('Su', '10:00')]['Apotheke_open'], '0')
+        self.assertEqual(float(rows[('Su', '10:00')]['total_score']), 0.0)
+        self.assertEqual(monday['Supermarkt_open'], '')
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ResultWriterTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,133 @@
+# coding=utf-8
+"""Reverse catchments test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+from shapely.geometry import box
+
+from utilities import plugin_module
+
+reverse_catchments = plugin_module('reverse_catchments')
+population_data = plugin_module('population_data')
+
+
+class FakeGapAnalyzer:
+    """Isochronen als Quadrat um jeden POI, None für POIs in `missing`"""
+
+    def __init__(self, size=2.0, missing=()):
+        self.size = size
+        self.missing = set(missing)
+        self.requests = []
+
+    def location_isochrones(self, locations, time_limit):
+        self.requests.append((len(locations), time_limit))
+        return [None if tuple(location) in self.missing else
+                box(location[0] - self.size, location[1] - self.size, location[0] + self.size, location[1] + self.size)
+                for location in locations]
+
+
+def pharmacy(osm_id, lon, lat):
+    return {'id': osm_id, 'name': f"Apotheke {osm_id}", 'lon': lon, 'lat': lat}
+
+
+# Einwohner bei x = 0, 1.5, 3 und 10 (außerhalb aller Einzugsgebiete)
+DEMAND = population_data.PopulationPoints(
+    np.array([0.0, 1.5, 3.0, 10.0]), np.zeros(4), np.array([100.0, 50.0, 20.0, 999.0]))
+
+
+class ReverseCatchmentTest(unittest.TestCase):
+    """Test assigning residents to the catchment of each POI."""
+
+    def analyze(self, pois, missing=()):
+        analyzer = reverse_catchments.ReverseCatchmentAnalyzer(FakeGapAnalyzer(missing=missing))
+        return analyzer.analyze({'Apotheke': pois}, DEMAND, 15)
+
+    def test_population_and_overlap(self):
+        """Residents reached by two POIs count for both but are not exclusive."""
+        catchments = self.analyze([pharmacy(1, 0.0, 0.0), pharmacy(2, 2.5, 0.0)])
+        properties = {feature['properties']['osm_id']: feature['properties'] for feature in catchments['features']}
+
+        first, second = properties['1'], properties['2']
+        self.assertEqual((first['demand_points'], first['population'], first['exclusive_population']), (2, 150.0, 100.0))
+        self.assertEqual((second['demand_points'], second['population'], second['exclusive_population']), (2, 70.0, 20.0))
+        self.assertAlmostEqual(first['shared_share'], 1 / 3, places=4)
+        self.assertEqual(first['time_limit'], 15)
+        self.assertEqual(catchments['missing_isochrones'], [])
+
+    def test_poi_without_isochrone(self):
+        """POIs without an isochrone are listed and their residents stay exclusive elsewhere."""
+        catchments = self.analyze([pharmacy(1, 0.0, 0.0), pharmacy(2, 2.5, 0.0)], missing=[(2.5, 0.0)])
+
+        self.assertEqual([feature['properties']['osm_id'] for feature in catchments['features']], ['1'])
+        self.assertEqual(catchments['features'][0]['properties']['exclusive_population'], 150.0)
+        self.assertEqual(catchments['missing_isochrones'][0]['osm_id'], '2')
+        self.assertEqual(catchments['missing_isochrones'][0]['service_type'], 'Apotheke')
+
+    def test_empty_catchment(self):
+        """A POI without residents has no shared share."""
+        catchments = self.analyze([pharmacy(3, -20.0, 0.0)])
+        properties = catchments['features'][0]['properties']
+        self.assertEqual((properties['demand_points'], properties['population']), (0, 0.0))
+        self.assertIsNone(properties['shared_share'])
+
+    def test_services_without_pois_skipped(self):
+        """No isochrones are requested for services without POIs."""
+        gap_analyzer = FakeGapAnalyzer()
+        analyzer = reverse_catchments.ReverseCatchmentAnalyzer(gap_analyzer)
+        catchments = analyzer.analyze({'Apotheke': [], 'Bank': [pharmacy(4, 0.0, 0.0)]}, DEMAND, 10)
+        self.assertEqual(gap_analyzer.requests, [(1, 10)])
+        self.assertEqual(len(catchments['features']), 1)
+
+
+class CatchmentGeoPackageTest(unittest.TestCase):
+    """Test writing catchments to a GeoPackage."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.directory)
+
+    def test_polygons_stored_as_multipolygons(self):
+        """Polygon catchments go into the MULTIPOLYGON table."""
+        catchments = reverse_catchments.ReverseCatchmentAnalyzer(FakeGapAnalyzer()).analyze(
+            {'Apotheke': [pharmacy(1, 0.0, 0.0)]}, DEMAND, 15)
+        path = os.path.join(self.directory, 'einzugsgebiete.gpkg')
+
+        reverse_catchments.write_catchments_geopackage(path, catchments)
+
+        connection = sqlite3.connect(path)
+        try:
+            geometry_type = connection.execute(
+                "SELECT geometry_type_name FROM gpkg_geometry_columns WHERE table_name = 'reverse_catchments'"
+            ).fetchone()[0]
+            rows = connection.execute('SELECT osm_id, population FROM "reverse_catchments"').fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(geometry_type, 'MULTIPOLYGON')
+        self.assertEqual(rows, [('1', 150.0)])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ReverseCatchmentTest),
+                                unittest.makeSuite(CatchmentGeoPackageTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
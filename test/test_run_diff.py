@@ -0,0 +1,138 @@
+# coding=utf-8
+"""Run diff test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+from utilities import plugin_module
+
+run_diff = plugin_module('run_diff')
+
+
+def poi(osm_id, service_type='Apotheke', name=None, location='Mitte', lon=7.6, lat=51.96, element_type='node'):
+    """Zeile wie AnalysisLayerStore.run_pois"""
+    return (element_type, str(osm_id), service_type, name or f"POI {osm_id}", 'amenity=pharmacy', location, lon, lat)
+
+
+def center(location, total_score, service_scores):
+    """Standort wie AnalysisLayerStore.run_centers"""
+    return {'location': location, 'lon': 7.6, 'lat': 51.96, 'total_score': total_score,
+            'service_scores': service_scores}
+
+
+class FakeStore:
+    """Gespeicherte Läufe im Speicher"""
+
+    def __init__(self, runs):
+        self.runs = runs
+
+    def run_pois(self, run_ids):
+        return [row for run_id in run_ids for row in self.runs[run_id]['pois']]
+
+    def run_centers(self, run_ids):
+        return [dict(row, run_id=run_id) for run_id in run_ids for row in self.runs[run_id]['centers']]
+
+
+class DiffRunsTest(unittest.TestCase):
+    """Test comparing two stored analysis runs."""
+
+    def test_added_removed_changed(self):
+        """POIs are matched by element type and OSM ID."""
+        store = FakeStore({
+            'mai': {'pois': [poi(1), poi(2), poi(3), poi(4)], 'centers': []},
+            'juni': {'pois': [poi(2, name='Neuer Name'), poi(3, lon=7.601), poi(4, lon=7.6001), poi(5)],
+                     'centers': []}
+        })
+        diff = run_diff.diff_runs(store, 'mai', 'juni')
+
+        self.assertEqual([p['osm_id'] for p in diff['added']], ['5'])
+        self.assertEqual([p['osm_id'] for p in diff['removed']], ['1'])
+        changed = {p['osm_id']: p for p in diff['changed']}
+        # POI 4 bewegt sich nur ca. 7 m und bleibt unter der Toleranz
+        self.assertEqual(sorted(changed), ['2', '3'])
+        self.assertEqual(changed['2']['name_before'], 'POI 2')
+        self.assertEqual(changed['2']['name'], 'Neuer Name')
+        self.assertGreater(changed['3']['moved_m'], 60)
+        self.assertEqual({p['change'] for p in diff['changed']}, {'changed'})
+
+    def test_element_type_distinguishes_ids(self):
+        """Node and way with the same ID are different POIs."""
+        store = FakeStore({
+            'a': {'pois': [poi(7, element_type='node')], 'centers': []},
+            'b': {'pois': [poi(7, element_type='way')], 'centers': []}
+        })
+        diff = run_diff.diff_runs(store, 'a', 'b')
+        self.assertEqual(len(diff['added']), 1)
+        self.assertEqual(len(diff['removed']), 1)
+
+    def test_legacy_runs_match_by_id(self):
+        """Runs without element type are matched by OSM ID only."""
+        store = FakeStore({
+            'alt': {'pois': [poi(7, element_type=None)], 'centers': []},
+            'neu': {'pois': [poi(7, element_type='way')], 'centers': []}
+        })
+        diff = run_diff.diff_runs(store, 'alt', 'neu')
+        self.assertEqual((diff['added'], diff['removed'], diff['changed']), ([], [], []))
+
+    def test_poi_in_several_locations_counted_once(self):
+        """A POI shared by two locations of a run appears once."""
+        store = FakeStore({
+            'a': {'pois': [], 'centers': []},
+            'b': {'pois': [poi(9, location='Mitte'), poi(9, location='Süd')], 'centers': []}
+        })
+        self.assertEqual(len(run_diff.diff_runs(store, 'a', 'b')['added']), 1)
+
+    def test_score_deltas(self):
+        """Counts and scores per location and service, plus a total row."""
+        store = FakeStore({
+            'mai': {'pois': [poi(1), poi(2)], 'centers': [center('Mitte', 50.0, {'Apotheke': 60.0})]},
+            'juni': {'pois': [poi(2), poi(3), poi(4)],
+                     'centers': [center('Mitte', 70.0, {'Apotheke': 85.0}), center('Süd', 40.0, {'Apotheke': 40.0})]}
+        })
+        deltas = {(row['location'], row['service_type']): row
+                  for row in run_diff.diff_runs(store, ['mai'], ['juni'])['deltas']}
+
+        pharmacy = deltas[('Mitte', 'Apotheke')]
+        self.assertEqual((pharmacy['count_before'], pharmacy['count_after'], pharmacy['count_delta']), (2, 3, 1))
+        self.assertEqual(pharmacy['score_delta'], 25.0)
+        self.assertEqual(deltas[('Mitte', run_diff.TOTAL_SERVICE)]['score_delta'], 20.0)
+
+        new_location = deltas[('Süd', 'Apotheke')]
+        self.assertIsNone(new_location['count_before'])
+        self.assertIsNone(new_location['count_delta'])
+        self.assertIsNone(new_location['score_delta'])
+        self.assertEqual(new_location['score_after'], 40.0)
+
+    def test_duplicate_location_rejected(self):
+        """Two runs of the same location in one state would mix their counts."""
+        store = FakeStore({
+            'mai_1': {'pois': [poi(1)], 'centers': [center('Mitte', 50.0, {'Apotheke': 60.0})]},
+            'mai_2': {'pois': [poi(1)], 'centers': [center('Mitte', 55.0, {'Apotheke': 60.0})]},
+            'juni': {'pois': [poi(1)], 'centers': [center('Mitte', 50.0, {'Apotheke': 60.0})]}
+        })
+        with self.assertRaises(ValueError):
+            run_diff.diff_runs(store, ['mai_1', 'mai_2'], ['juni'])
+
+    def test_resolve_run_ids(self):
+        """Selectors are run IDs or their prefix."""
+        runs = [{'run_id': '20240601T080000_b'}, {'run_id': '20240501T080000_a'}, {'run_id': '20240502T080000_c'}]
+        self.assertEqual(run_diff.resolve_run_ids(runs, ['202405']), ['20240501T080000_a', '20240502T080000_c'])
+        self.assertEqual(run_diff.resolve_run_ids(runs, ['20240601T080000_b', '202406']), ['20240601T080000_b'])
+        with self.assertRaises(ValueError):
+            run_diff.resolve_run_ids(runs, ['2023'])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(DiffRunsTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
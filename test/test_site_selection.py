@@ -0,0 +1,118 @@
+# coding=utf-8
+"""Site selection test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+import numpy as np
+
+from utilities import plugin_module
+
+site_selection = plugin_module('site_selection')
+
+
+def coverage(sites):
+    """Einzugsgebiete als (site_ptr, site_cells) wie coverage_index"""
+    site_ptr = np.cumsum([0] + [len(cells) for cells in sites])
+    site_cells = np.asarray([cell for cells in sites for cell in cells], dtype=np.intp)
+    return site_ptr, site_cells
+
+
+def weighted_score(sites, chosen, weights, base_counts, score_table):
+    """Gewichtete Score-Summe bei gegebener Auswahl"""
+    counts = np.asarray(base_counts).copy()
+    for site in chosen:
+        counts[list(sites[site])] += 1
+    counts = np.minimum(counts, len(score_table) - 1)
+    return float(np.dot(weights, np.asarray(score_table)[counts]))
+
+
+def brute_force_greedy(sites, weights, base_counts, score_table, k):
+    """Greedy-Auswahl durch Neubewertung aller Kandidaten in jedem Schritt"""
+    chosen = []
+    for _ in range(k):
+        current = weighted_score(sites, chosen, weights, base_counts, score_table)
+        gains = [(weighted_score(sites, chosen + [site], weights, base_counts, score_table) - current, site)
+                 for site in range(len(sites)) if site not in chosen]
+        if not gains:
+            break
+        gain, site = max(gains, key=lambda entry: (entry[0], -entry[1]))
+        chosen.append(site)
+    return chosen
+
+
+class GreedySelectTest(unittest.TestCase):
+    """Test the lazy greedy selection against re-evaluating all candidates."""
+
+    def test_matches_brute_force(self):
+        """Same sites in the same order as the exhaustive greedy."""
+        rng = np.random.default_rng(7)
+        score_table = [0.0, 60.0, 85.0, 100.0]
+        for _ in range(20):
+            n_cells = 40
+            sites = [sorted(rng.choice(n_cells, size=rng.integers(1, 12), replace=False).tolist())
+                     for _ in range(15)]
+            weights = rng.uniform(1, 100, n_cells)
+            base_counts = rng.integers(0, 3, n_cells)
+
+            site_ptr, site_cells = coverage(sites)
+            selected = site_selection.greedy_select(site_ptr, site_cells, weights, base_counts, score_table, 5)
+            expected = brute_force_greedy(sites, weights, base_counts, score_table, 5)
+
+            self.assertEqual([site for site, _ in selected], expected)
+
+            chosen = []
+            for site, gain in selected:
+                before = weighted_score(sites, chosen, weights, base_counts, score_table)
+                chosen.append(site)
+                after = weighted_score(sites, chosen, weights, base_counts, score_table)
+                self.assertAlmostEqual(gain, after - before)
+
+    def test_first_choice_is_best_single_site(self):
+        """With k=1 the chosen site is the optimum over all candidates."""
+        sites = [[0, 1], [1, 2, 3], [4]]
+        weights = np.array([10.0, 10.0, 10.0, 10.0, 50.0])
+        base_counts = np.zeros(5, dtype=int)
+        score_table = [0.0, 100.0]
+
+        site_ptr, site_cells = coverage(sites)
+        selected = site_selection.greedy_select(site_ptr, site_cells, weights, base_counts, score_table, 1)
+
+        self.assertEqual(selected, [(2, 5000.0)])
+
+    def test_saturated_cells_add_nothing(self):
+        """Cells already at the saturation count do not contribute gain."""
+        sites = [[0, 1], [2]]
+        weights = np.array([100.0, 100.0, 1.0])
+        base_counts = np.array([1, 1, 0])
+        score_table = [0.0, 100.0]
+
+        site_ptr, site_cells = coverage(sites)
+        selected = site_selection.greedy_select(site_ptr, site_cells, weights, base_counts, score_table, 2)
+
+        self.assertEqual(selected, [(1, 100.0), (0, 0.0)])
+
+    def test_k_larger_than_candidates(self):
+        """Never selects a candidate twice."""
+        sites = [[0], [1]]
+        site_ptr, site_cells = coverage(sites)
+        selected = site_selection.greedy_select(
+            site_ptr, site_cells, np.ones(2), np.zeros(2, dtype=int), [0.0, 100.0], 5)
+
+        self.assertEqual(sorted(site for site, _ in selected), [0, 1])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GreedySelectTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
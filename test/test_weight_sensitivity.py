@@ -0,0 +1,122 @@
+# coding=utf-8
+"""Weight sensitivity test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'awiechma@uni-muenster.de'
+__date__ = '2025-07-18'
+__copyright__ = 'Copyright 2025, Amon Wiechmann'
+
+import unittest
+
+import numpy as np
+
+from utilities import plugin_module
+
+weight_sensitivity = plugin_module('weight_sensitivity')
+
+SERVICES = ['Supermarkt', 'Apotheke']
+
+
+def result(name, raw_scores):
+    """Analyse-Ergebnis mit rohen Service-Scores"""
+    return {'location_name': name,
+            'score': {'service_scores': {service_type: {'raw_score': raw}
+                                         for service_type, raw in raw_scores.items()}}}
+
+
+class ScoreMatrixTest(unittest.TestCase):
+    """Test building the score matrix from results."""
+
+    def test_matrix_and_mask(self):
+        """Missing services are masked, results without services skipped."""
+        names, services, scores, analyzed = weight_sensitivity.score_matrix([
+            result('A', {'Supermarkt': 80.0, 'Apotheke': 40.0}),
+            result('B', {'Apotheke': 60.0}),
+            result('C', {'Bank': 100.0})
+        ], SERVICES)
+
+        self.assertEqual(names, ['A', 'B'])
+        self.assertEqual(services, SERVICES)
+        self.assertEqual(scores.tolist(), [[80.0, 40.0], [0.0, 60.0]])
+        self.assertEqual(analyzed.tolist(), [[True, True], [False, True]])
+
+
+class WeightSensitivityAnalysisTest(unittest.TestCase):
+    """Test the Monte Carlo weight sensitivity."""
+
+    def analysis(self, raw_scores, analyzed=None, weights=(1.0, 1.0), **kwargs):
+        names = [f"L{index}" for index in range(len(raw_scores))]
+        return weight_sensitivity.WeightSensitivityAnalysis(
+            names, SERVICES, np.asarray(raw_scores, dtype=float), analyzed, weights=list(weights), **kwargs)
+
+    def test_scores_normalise_by_analyzed_weights(self):
+        """Only analysed services enter numerator and denominator."""
+        analysis = self.analysis([[80.0, 40.0], [0.0, 60.0]], analyzed=[[True, True], [False, True]],
+                                 weights=(3.0, 1.0))
+        scores = analysis.scores(np.array([[0.75, 0.25], [0.5, 0.5]]))
+        np.testing.assert_allclose(scores, [[70.0, 60.0], [60.0, 60.0]])
+
+    def test_dominated_ranking_is_stable(self):
+        """A location better in every service always ranks first."""
+        sensitivity = self.analysis([[90.0, 80.0], [50.0, 40.0], [10.0, 20.0]]).run(
+            samples=2000, batch_size=300, top_k=1, seed=1)
+
+        first, second, third = sensitivity['locations']
+        self.assertEqual((first['base_rank'], first['rank_low'], first['rank_high']), (1, 1, 1))
+        self.assertEqual((third['rank_low'], third['rank_high']), (3, 3))
+        self.assertEqual(first['top_1_share'], 1.0)
+        self.assertEqual(second['top_1_share'], 0.0)
+        self.assertEqual(sensitivity['rank_stability']['spearman_min'], 1.0)
+        # Konstante Ränge haben keinen Treiber
+        self.assertIsNone(first['dominant_weight'])
+        self.assertEqual([driver['mean_abs_rank_correlation'] for driver in sensitivity['drivers']], [0.0, 0.0])
+
+    def test_score_interval(self):
+        """The interval lies between the raw scores and contains the base score."""
+        sensitivity = self.analysis([[100.0, 0.0], [40.0, 60.0]]).run(samples=3000, seed=2)
+        location = sensitivity['locations'][0]
+
+        self.assertEqual(location['base_score'], 50.0)
+        self.assertLessEqual(location['score_low'], location['base_score'])
+        self.assertGreaterEqual(location['score_high'], location['base_score'])
+        self.assertGreaterEqual(location['score_low'], 0.0)
+        self.assertLessEqual(location['score_high'], 100.0)
+        self.assertAlmostEqual(location['mean_score'], 50.0, delta=1.0)
+
+    def test_rank_swap_drivers(self):
+        """Locations that swap with the weights are driven by both services."""
+        sensitivity = self.analysis([[100.0, 0.0], [0.0, 100.0]], concentration=5.0).run(samples=4000, seed=3)
+        first, second = sensitivity['locations']
+
+        self.assertEqual((first['rank_low'], first['rank_high']), (1, 2))
+        self.assertLess(sensitivity['rank_stability']['spearman_min'], 0.0)
+        self.assertIn(first['dominant_weight'], SERVICES)
+        for driver in sensitivity['drivers']:
+            self.assertGreater(driver['mean_abs_rank_correlation'], 0.5)
+
+    def test_seed_is_reproducible(self):
+        """Equal seeds give equal results."""
+        raw_scores = np.random.default_rng(0).uniform(0, 100, (30, 2))
+        first = self.analysis(raw_scores).run(samples=500, seed=4)
+        second = self.analysis(raw_scores).run(samples=500, seed=4)
+        self.assertEqual(first, second)
+
+    def test_invalid_input(self):
+        """At least two locations and positive weights are required."""
+        with self.assertRaises(ValueError):
+            self.analysis([[50.0, 50.0]])
+        with self.assertRaises(ValueError):
+            self.analysis([[50.0, 50.0], [10.0, 20.0]], weights=(1.0, 0.0))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite([unittest.makeSuite(ScoreMatrixTest),
+                                unittest.makeSuite(WeightSensitivityAnalysisTest)])
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -1,7 +1,13 @@
 # coding=utf-8
 """Common functionality used by regression tests."""
 
+import atexit
+import glob
+import importlib
+import os
+import shutil
 import sys
+import tempfile
 import logging
 
 
@@ -11,6 +17,12 @@ CANVAS = None
 PARENT = None
 IFACE = None
 
+PLUGIN_NAME = 'walkability_analyzer'
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Source folders that ``make deploy`` copies into one flat plugin directory
+SOURCE_DIRS = ('', 'Core Files', 'Analysis Engine', 'Export & Utils', 'GUI Components')
+PACKAGE = None  # Static variable used to hold (package name, parent directory)
+
 
 def get_qgis_app():
     """ Start one QGIS application to test against.
@@ -59,3 +71,48 @@ def get_qgis_app():
         IFACE = QgisInterface(CANVAS)
 
     return QGIS_APP, CANVAS, IFACE, PARENT
+
+
+def plugin_package():
+    """ Make the plugin importable as a package.
+
+    The plugin modules use relative imports. A deployed plugin directory is
+    already a flat package; in the source tree the modules are spread over
+    several folders and are copied into a temporary flat package, like
+    ``make deploy`` does.
+
+    :returns: Package name and the directory containing the package.
+    :rtype: (str, str)
+    """
+    global PACKAGE  # pylint: disable=W0603
+
+    if PACKAGE is None:
+        if os.path.isdir(os.path.join(PLUGIN_DIR, 'Analysis Engine')):
+            parent = tempfile.mkdtemp(prefix='walkability_test_')
+            atexit.register(shutil.rmtree, parent, True)
+            package_dir = os.path.join(parent, PLUGIN_NAME)
+            os.mkdir(package_dir)
+            for source_dir in SOURCE_DIRS:
+                for pattern in ('*.py', '*.ui'):
+                    for path in glob.glob(os.path.join(PLUGIN_DIR, source_dir, pattern)):
+                        shutil.copy(path, package_dir)
+            PACKAGE = (PLUGIN_NAME, parent)
+        else:
+            PACKAGE = (os.path.basename(PLUGIN_DIR), os.path.dirname(PLUGIN_DIR))
+
+        if PACKAGE[1] not in sys.path:
+            sys.path.insert(0, PACKAGE[1])
+
+    return PACKAGE
+
+
+def plugin_module(name):
+    """ Import one plugin module, see plugin_package().
+
+    :param name: Module name inside the plugin, e.g. 'pipeline_executor'.
+    :type name: str
+
+    :returns: The imported module.
+    """
+    package, _ = plugin_package()
+    return importlib.import_module(f"{package}.{name}")